@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from src.cache import AudioCache
+
+
+class TestAudioCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        self.cache = AudioCache(self.directory, max_size=25)
+        self.downloads = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _download(self, video_id, size=10):
+        def download(destination):
+            self.downloads.append(video_id)
+            path = destination.joinpath(f"{video_id}.mp3")
+            path.write_bytes(b"x" * size)
+            return path
+
+        return download
+
+    def _fetch(self, video_id, size=10):
+        path = self.cache.fetch(video_id, "mp3", self._download(video_id, size))
+        self.cache.release(video_id, "mp3")
+        return path
+
+    def test_fetch_downloads_once(self):
+        first = self._fetch("a")
+        second = self._fetch("a")
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.downloads, ["a"])
+
+    def test_index_is_shared(self):
+        self._fetch("a")
+
+        other = AudioCache(self.directory, max_size=25)
+        self.assertEqual(other.get("a", "mp3"), self.directory.joinpath("a.mp3"))
+        self.assertIsNone(other.get("a", "opus"))
+
+    def test_lru_eviction(self):
+        self._fetch("a")
+        self._fetch("b")
+        # a is used again, so b is the least recently used file
+        self._fetch("a")
+        self._fetch("c")
+
+        self.assertIsNotNone(self.cache.get("a", "mp3"))
+        self.assertIsNone(self.cache.get("b", "mp3"))
+        self.assertFalse(self.directory.joinpath("b.mp3").exists())
+        self.assertLessEqual(self.cache.size(), 25)
+
+    def test_pinned_files_are_not_evicted(self):
+        self.cache.fetch("a", "mp3", self._download("a"))
+        self._fetch("b")
+        self._fetch("c")
+
+        self.assertTrue(self.directory.joinpath("a.mp3").exists())
+        self.assertFalse(self.directory.joinpath("b.mp3").exists())
+
+    def _pin(self, video_id, pid):
+        with self.cache._locked_index() as index:
+            index[self.cache.key(video_id, "mp3")]["pins"] = {str(pid): 1}
+
+    def test_pins_of_other_processes(self):
+        self._fetch("a")
+        self._fetch("b")
+        self._pin("a", os.getppid())
+        # the process pinning b has ended
+        ended = subprocess.Popen([sys.executable, "-c", ""])
+        ended.wait()
+        self._pin("b", ended.pid)
+        self._fetch("c")
+
+        self.assertTrue(self.directory.joinpath("a.mp3").exists())
+        self.assertFalse(self.directory.joinpath("b.mp3").exists())
+
+    def test_wait_for_download_of_other_process(self):
+        with self.cache._locked_index() as index:
+            index["a.mp3"] = {
+                "file": None,
+                "size": 0,
+                "lastAccess": time.time(),
+                "pins": {str(os.getppid()): 1},
+                "downloader": os.getppid(),
+            }
+
+        self.cache.POLL_INTERVAL = 0.01
+        result = []
+        fetch = threading.Thread(target=lambda: result.append(self._fetch("a")))
+        fetch.start()
+        time.sleep(0.1)
+        self.assertEqual(result, [])
+
+        # the other process finishes the download
+        path = self.directory.joinpath("a.mp3")
+        path.write_bytes(b"x" * 10)
+        with self.cache._locked_index() as index:
+            index["a.mp3"].update(file=path.name, size=10)
+            index["a.mp3"].pop("downloader")
+
+        fetch.join(5)
+        self.assertEqual(result, [path])
+        self.assertEqual(self.downloads, [])
+
+    def test_failed_download_is_not_claimed(self):
+        def download(destination):
+            raise ValueError("unavailable")
+
+        with self.assertRaises(ValueError):
+            self.cache.fetch("a", "mp3", download)
+
+        self._fetch("a")
+        self.assertEqual(self.downloads, ["a"])
+
+    def test_missing_file_is_downloaded_again(self):
+        self._fetch("a")
+        self.directory.joinpath("a.mp3").unlink()
+        self._fetch("a")
+
+        self.assertEqual(self.downloads, ["a", "a"])
+
+    def test_put_outside_of_cache(self):
+        with self.assertRaises(ValueError):
+            self.cache.put("a", "mp3", Path(self.tmp.name).parent.joinpath("a.mp3"))
+
+
+if __name__ == "__main__":
+    unittest.main()
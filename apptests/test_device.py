@@ -0,0 +1,51 @@
+import importlib.util
+import unittest
+from unittest import mock
+
+from src.device import configure_threads, resolve_device
+
+
+@unittest.skipIf(importlib.util.find_spec("torch") is None, "torch is not installed")
+class TestResolveDevice(unittest.TestCase):
+    def test_explicit_device(self):
+        self.assertEqual(resolve_device("cpu"), "cpu")
+
+    @mock.patch("torch.cuda.is_available", return_value=False)
+    def test_default_without_cuda(self, mock_is_available):
+        self.assertEqual(resolve_device(), "cpu")
+
+    @mock.patch("torch.cuda.is_available", return_value=True)
+    def test_default_with_cuda(self, mock_is_available):
+        self.assertEqual(resolve_device(), "cuda:0")
+
+    @mock.patch("torch.cuda.is_available", return_value=True)
+    def test_gpu_alias(self, mock_is_available):
+        self.assertEqual(resolve_device(gpu=1), "cuda:1")
+        self.assertEqual(resolve_device("cpu", gpu=1), "cpu")
+
+    @mock.patch("torch.cuda.is_available", return_value=False)
+    def test_cuda_not_available(self, mock_is_available):
+        with self.assertRaises(ValueError):
+            resolve_device("cuda:0")
+
+    def test_invalid_device(self):
+        with self.assertRaises(ValueError):
+            resolve_device("gpu0")
+
+
+@unittest.skipIf(importlib.util.find_spec("torch") is None, "torch is not installed")
+class TestConfigureThreads(unittest.TestCase):
+    @mock.patch("torch.set_num_interop_threads")
+    @mock.patch("torch.set_num_threads")
+    def test_configure_threads(self, mock_set_num_threads, mock_set_interop):
+        configure_threads(2, 1)
+
+        mock_set_num_threads.assert_called_once_with(2)
+        mock_set_interop.assert_called_once_with(1)
+
+    @mock.patch("torch.set_num_interop_threads", side_effect=RuntimeError("set"))
+    @mock.patch("torch.set_num_threads")
+    def test_inter_op_already_set(self, mock_set_num_threads, mock_set_interop):
+        configure_threads(None, 1)
+
+        mock_set_num_threads.assert_not_called()
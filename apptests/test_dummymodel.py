@@ -18,6 +18,28 @@ class TestDummyTest(unittest.TestCase):
 
         self.assertEqual(result, "This is a model for tests :)")
 
+    def test_transcribe_batch(self):
+        audio_paths = [Path("path/to/audio.wav"), Path("path/to/other.wav")]
+        result = self.dummy_test.transcribe_batch(audio_paths)
+
+        self.assertEqual(result, ["This is a model for tests :)"] * 2)
+
+    @mock.patch("src.transcript_test.inference_context")
+    def test_transcribe_inference_context(self, mock_inference_context):
+        dummy_test = DummyTest(inference_mode=True, autocast="bf16")
+        result = dummy_test.transcribe(Path("path/to/audio.wav"))
+
+        self.assertEqual(result, "This is a model for tests :)")
+        mock_inference_context.assert_called_once_with(None, True, "bf16")
+        self.assertTrue(dummy_test.runtime_settings()["inference_mode"])
+
+    @mock.patch("src.transcript_test.compile_modules")
+    def test_transcribe_compile_once(self, mock_compile_modules):
+        dummy_test = DummyTest(torch_compile=True)
+        dummy_test.transcribe_batch([Path("path/to/audio.wav")] * 2)
+
+        mock_compile_modules.assert_called_once_with([])
+
     def test_transcribe_invalid_path(self):
         invalid_path = Path("nonexistent/path/audio.wav")
         self.dummy_test.transcribe(invalid_path)
@@ -0,0 +1,98 @@
+import importlib
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.audio import SAMPLE_RATE
+
+# chunk length of Espnet2Test in samples
+CHUNK_LENGTH = 10 * SAMPLE_RATE
+
+
+def fake_modules() -> dict:
+    """
+    Stand-ins for the modules imported by models/espnet2_test.py
+
+    Returns:
+        modules to patch into sys.modules
+    """
+
+    torch = MagicMock()
+    torch.device.side_effect = lambda device: SimpleNamespace(
+        type=str(device).split(":")[0]
+    )
+    torch.cuda.is_available.return_value = False
+
+    whisper = MagicMock(__version__="test")
+    espnet2 = MagicMock()
+    espnet_model_zoo = MagicMock()
+
+    return {
+        "torch": torch,
+        "whisper": whisper,
+        "whisper.normalizers": whisper.normalizers,
+        "espnet2": espnet2,
+        "espnet2.bin": espnet2.bin,
+        "espnet2.bin.asr_inference": espnet2.bin.asr_inference,
+        "espnet_model_zoo": espnet_model_zoo,
+        "espnet_model_zoo.downloader": espnet_model_zoo.downloader,
+    }
+
+
+def fake_speech2text(chunk: np.ndarray) -> list[tuple]:
+    # Speech2Text returns the n-best (text, tokens, token ids, hypothesis) tuples
+    return [(f"CHUNK {len(chunk)}", [], [], None)]
+
+
+class Test_Espnet2Test(unittest.TestCase):
+    def setUp(self) -> None:
+        self.modules = fake_modules()
+        self.patcher = patch.dict(sys.modules, self.modules)
+        self.patcher.start()
+        sys.modules.pop("models.espnet2_test", None)
+        self.espnet2_test = importlib.import_module("models.espnet2_test")
+
+        self.tester = self.espnet2_test.Espnet2Test("model", "en", device="cpu")
+        self.tester.transcriber = MagicMock(side_effect=fake_speech2text)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+        return super().tearDown()
+
+    def test_model(self):
+        speech2text = self.modules["espnet2.bin.asr_inference"].Speech2Text
+        downloader = self.modules["espnet_model_zoo.downloader"].ModelDownloader
+
+        downloader.return_value.download_and_unpack.assert_called_once_with("model")
+        self.assertEqual(speech2text.call_args.kwargs["device"], "cpu")
+
+    def test_chunks(self):
+        audio = np.arange(2 * CHUNK_LENGTH + 100, dtype=np.float32)
+
+        transcript = self.tester.transcribe(audio)
+
+        self.assertEqual(
+            transcript, f"chunk {CHUNK_LENGTH} chunk {CHUNK_LENGTH} chunk 100"
+        )
+        self.assertEqual(self.tester.transcriber.call_count, 3)
+
+        for n, ((chunk,), _) in enumerate(self.tester.transcriber.call_args_list):
+            self.assertIsInstance(chunk, np.ndarray)
+            np.testing.assert_array_equal(
+                chunk, audio[n * CHUNK_LENGTH : (n + 1) * CHUNK_LENGTH]
+            )
+
+    def test_read_only_audio(self):
+        audio = np.zeros(CHUNK_LENGTH + 1, dtype=np.float32)
+        audio.setflags(write=False)
+
+        self.tester.transcribe(audio)
+
+        # the model gets writable copies instead of views of the memory-mapped audio
+        for (chunk,), _ in self.tester.transcriber.call_args_list:
+            self.assertTrue(chunk.flags.writeable)
+            self.assertFalse(np.shares_memory(chunk, audio))
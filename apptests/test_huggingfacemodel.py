@@ -0,0 +1,305 @@
+import importlib
+import os
+import sys
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src import plugins
+from src.test_runner import TestRegistry
+from youtube_runner import YouTubeTestRunner
+
+
+def fake_modules() -> dict:
+    """
+    Stand-ins for the modules imported by models/huggingface_test.py
+
+    Returns:
+        modules to patch into sys.modules
+    """
+
+    torch = MagicMock()
+    torch.device.side_effect = lambda device: SimpleNamespace(
+        type=str(device).split(":")[0]
+    )
+    torch.cuda.is_available.return_value = False
+
+    whisper = MagicMock(__version__="test")
+    transformers = MagicMock()
+
+    return {
+        "torch": torch,
+        "whisper": whisper,
+        "whisper.normalizers": whisper.normalizers,
+        "transformers": transformers,
+        "transformers.pipelines": transformers.pipelines,
+    }
+
+
+def fake_onnx_modules() -> dict:
+    """
+    Stand-ins for the optional modules of the onnx backend
+
+    Returns:
+        modules to patch into sys.modules
+    """
+
+    optimum = MagicMock()
+
+    return {
+        "onnxruntime": MagicMock(),
+        "optimum": optimum,
+        "optimum.onnxruntime": optimum.onnxruntime,
+    }
+
+
+class Test_HuggingfaceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.modules = fake_modules()
+        self.patcher = patch.dict(sys.modules, self.modules)
+        self.patcher.start()
+        sys.modules.pop("models.huggingface_test", None)
+        self.huggingface_test = importlib.import_module("models.huggingface_test")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+        return super().tearDown()
+
+    def test_onnx(self):
+        with patch.object(self.huggingface_test, "load_onnx_model") as mock_load:
+            tester = self.huggingface_test.HuggingfaceTest(
+                "model", None, 30, device="cpu", backend="onnx", onnx_path="onnx"
+            )
+
+        mock_load.assert_called_once_with("model", "onnx", None, None)
+        self.modules["transformers.pipelines"].pipeline.assert_called_once_with(
+            "automatic-speech-recognition",
+            model=mock_load.return_value,
+            tokenizer="model",
+            feature_extractor="model",
+            device="cpu",
+        )
+        self.assertEqual(tester.torch_modules(), [])
+        self.assertEqual(tester.output_settings()["backend"], "onnx")
+
+    def test_onnx_threads(self):
+        with patch.object(self.huggingface_test, "load_onnx_model") as mock_load:
+            self.huggingface_test.HuggingfaceTest(
+                "model",
+                None,
+                30,
+                tokenizer="tokenizer",
+                device="cpu",
+                intra_op_threads=4,
+                inter_op_threads=1,
+                backend="onnx",
+            )
+
+        mock_load.assert_called_once_with("model", None, 4, 1)
+        _, kwargs = self.modules["transformers.pipelines"].pipeline.call_args
+        self.assertEqual(kwargs["tokenizer"], "tokenizer")
+        self.assertEqual(kwargs["feature_extractor"], "model")
+
+    def test_torch(self):
+        with patch.object(self.huggingface_test, "load_onnx_model") as mock_load:
+            tester = self.huggingface_test.HuggingfaceTest("model", None, 30)
+
+        mock_load.assert_not_called()
+        self.modules["transformers.pipelines"].pipeline.assert_called_once_with(
+            "automatic-speech-recognition",
+            model="model",
+            tokenizer=None,
+            feature_extractor=None,
+            device="cpu",
+        )
+        self.assertEqual(tester.torch_modules(), [tester.model.model])
+
+    def test_onnx_on_cuda(self):
+        self.modules["torch"].cuda.is_available.return_value = True
+
+        with patch.object(self.huggingface_test, "load_onnx_model") as mock_load:
+            with self.assertRaises(ValueError):
+                self.huggingface_test.HuggingfaceTest(
+                    "model", None, 30, device="cuda:0", backend="onnx"
+                )
+
+        mock_load.assert_not_called()
+
+
+def fake_pipeline(inputs, **kwargs) -> list[dict]:
+    # the transformers pipeline consumes the inputs lazily, named after their lengths
+    return [{"text": str(len(item["raw"]))} for item in inputs]
+
+
+class Test_HuggingfaceTest_transcribe(unittest.TestCase):
+    def setUp(self) -> None:
+        self.patcher = patch.dict(sys.modules, fake_modules())
+        self.patcher.start()
+        sys.modules.pop("models.huggingface_test", None)
+        self.huggingface_test = importlib.import_module("models.huggingface_test")
+        self.audio = [np.zeros(length, dtype=np.float32) for length in range(1, 8)]
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+        return super().tearDown()
+
+    def _tester(self, num_workers: int):
+        tester = self.huggingface_test.HuggingfaceTest(
+            "model", None, 30, num_workers=num_workers, batch_size=4
+        )
+        tester.model = MagicMock(side_effect=fake_pipeline)
+        return tester
+
+    def test_order(self):
+        def load_audio(audio):
+            # the first audio files take the longest to decode
+            time.sleep((8 - len(audio)) * 0.01)
+            return audio
+
+        for num_workers in (0, 1, 3):
+            with self.subTest(num_workers=num_workers):
+                tester = self._tester(num_workers)
+
+                with patch.object(self.huggingface_test, "load_audio", load_audio):
+                    transcripts = tester.transcribe_batch(self.audio)
+
+                self.assertEqual(transcripts, [str(n) for n in range(1, 8)])
+                tester.model.assert_called_once()
+                _, kwargs = tester.model.call_args
+                self.assertEqual(
+                    kwargs,
+                    {"chunk_length_s": 30, "stride_length_s": (4, 2), "batch_size": 4},
+                )
+
+    def test_read_only_audio(self):
+        audio = np.zeros(5, dtype=np.float32)
+        audio.setflags(write=False)
+        inputs = []
+
+        tester = self._tester(1)
+        tester.model.side_effect = lambda stream, **kwargs: [
+            inputs.append(item) or {"text": ""} for item in stream
+        ]
+        tester.transcribe(audio)
+
+        # the pipeline gets a writable copy of the memory-mapped waveform
+        self.assertTrue(inputs[0]["raw"].flags.writeable)
+        self.assertFalse(np.shares_memory(inputs[0]["raw"], audio))
+        self.assertEqual(inputs[0]["sampling_rate"], 16000)
+
+    def test_decode_error(self):
+        def load_audio(audio):
+            if len(audio) == 4:
+                raise ValueError("corrupted")
+            return audio
+
+        for num_workers in (0, 2):
+            with self.subTest(num_workers=num_workers):
+                tester = self._tester(num_workers)
+
+                with patch.object(self.huggingface_test, "load_audio", load_audio):
+                    with self.assertRaisesRegex(ValueError, "corrupted"):
+                        tester.transcribe_batch(self.audio)
+
+
+class Test_load_onnx_model(unittest.TestCase):
+    def setUp(self) -> None:
+        self.modules = {**fake_modules(), **fake_onnx_modules()}
+        self.patcher = patch.dict(sys.modules, self.modules)
+        self.patcher.start()
+        sys.modules.pop("models.huggingface_test", None)
+        self.huggingface_test = importlib.import_module("models.huggingface_test")
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config = self.modules["transformers"].AutoConfig.from_pretrained
+        self.optimum = self.modules["optimum.onnxruntime"]
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        self.patcher.stop()
+        return super().tearDown()
+
+    def test_export(self):
+        onnx_path = os.path.join(self.tmp_dir.name, "onnx")
+        self.config.return_value.is_encoder_decoder = True
+
+        model = self.huggingface_test.load_onnx_model("model", onnx_path, 4)
+
+        from_pretrained = self.optimum.ORTModelForSpeechSeq2Seq.from_pretrained
+        session_options = self.modules["onnxruntime"].SessionOptions.return_value
+        from_pretrained.assert_called_once_with(
+            "model", export=True, session_options=session_options
+        )
+        model.save_pretrained.assert_called_once_with(onnx_path)
+        self.assertIs(model, from_pretrained.return_value)
+        self.assertEqual(session_options.intra_op_num_threads, 4)
+        self.optimum.ORTModelForCTC.from_pretrained.assert_not_called()
+
+    def test_load_exported(self):
+        self.config.return_value.is_encoder_decoder = False
+
+        model = self.huggingface_test.load_onnx_model("model", self.tmp_dir.name)
+
+        from_pretrained = self.optimum.ORTModelForCTC.from_pretrained
+        from_pretrained.assert_called_once_with(
+            self.tmp_dir.name,
+            session_options=self.modules["onnxruntime"].SessionOptions.return_value,
+        )
+        model.save_pretrained.assert_not_called()
+        self.assertIs(model, from_pretrained.return_value)
+
+    def test_missing_onnxruntime(self):
+        with patch.dict(sys.modules, {"onnxruntime": None}):
+            with self.assertRaises(ImportError) as context:
+                self.huggingface_test.load_onnx_model("model")
+
+        self.assertIn("optimum[onnxruntime]", str(context.exception))
+
+
+class Test_HuggingfaceTest_parser(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        manifest = plugins.TestManifest(
+            os.path.join(self.tmp_dir.name, "manifest.json")
+        )
+        self.patchers = [
+            patch.object(TestRegistry, "manifest", manifest),
+            patch.dict(sys.modules, fake_modules()),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        sys.modules.pop("models.huggingface_test", None)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        for patcher in reversed(self.patchers):
+            patcher.stop()
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_backend(self):
+        argv = ["./apptests/data/simpleTest.json", "HuggingfaceTest"]
+        argv += ["-m", "model", "-c", "30"]
+
+        args = YouTubeTestRunner.parser(argv).parse_args(argv)
+        self.assertEqual(args.backend, "torch")
+        self.assertIsNone(args.onnx_path)
+
+        argv += ["--backend", "onnx", "--onnx-path", "onnx"]
+        args = YouTubeTestRunner.parser(argv).parse_args(argv)
+        self.assertEqual(args.backend, "onnx")
+        self.assertEqual(args.onnx_path, "onnx")
+
+    def test_backend_invalid(self):
+        argv = ["./apptests/data/simpleTest.json", "HuggingfaceTest"]
+        argv += ["-m", "model", "-c", "30", "--backend", "tensorrt"]
+
+        with self.assertRaises(SystemExit), patch("sys.stderr"):
+            YouTubeTestRunner.parser(argv).parse_args(argv)
@@ -0,0 +1,72 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.journal import ResultsJournal
+
+
+class TestResultsJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name, "journals", "testplan.jsonl")
+        self.journal = ResultsJournal(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_missing_journal(self):
+        self.assertEqual(self.journal.load(), ({}, {}))
+
+    def test_append_and_load(self):
+        self.journal.append(0, {"videoId": "a", "title": "A", "results": {"wer": 0.5}})
+        self.journal.append(0, {"videoId": "b", "error": "ValueError (download): x"})
+        self.journal.append_saved(0, Path("output/results.json"))
+
+        items, saved = self.journal.load()
+
+        self.assertEqual(items[(0, "a")], {"results": {"wer": 0.5}})
+        self.assertEqual(items[(0, "b")], {"error": "ValueError (download): x"})
+        self.assertEqual(saved, {0: Path("output/results.json")})
+
+    def test_corrupted_last_line(self):
+        self.journal.append(0, {"videoId": "a", "results": {"wer": 0.5}})
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"type": "item", "iteration": 0, "vid')
+
+        items, _ = self.journal.load()
+        self.assertEqual(list(items), [(0, "a")])
+
+    def test_restore(self):
+        self.journal.append(0, {"videoId": "a", "results": {"wer": 0.5}})
+        self.journal.append(1, {"videoId": "b", "results": {"wer": 0.1}})
+        items, _ = self.journal.load()
+
+        testplan_items = [{"videoId": "a"}, {"videoId": "b"}]
+        pending = self.journal.restore(0, testplan_items, items)
+
+        self.assertEqual(pending, [{"videoId": "b"}])
+        self.assertEqual(testplan_items[0]["results"], {"wer": 0.5})
+
+    def test_unserializable_outcome(self):
+        self.journal.append(0, {"videoId": "a", "results": {"wer": object()}})
+        self.assertEqual(self.journal.load(), ({}, {}))
+
+    def test_clear(self):
+        self.journal.append(0, {"videoId": "a", "results": {"wer": 0.5}})
+        self.journal.clear()
+
+        self.assertFalse(self.path.exists())
+        self.journal.clear()
+
+    def test_lines_are_json(self):
+        self.journal.append(0, {"videoId": "ą", "results": {"wer": 0.5}})
+
+        with open(self.path, encoding="utf-8") as f:
+            entry = json.loads(f.readline())
+
+        self.assertEqual(entry["videoId"], "ą")
+
+
+if __name__ == "__main__":
+    unittest.main()
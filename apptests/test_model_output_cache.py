@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from models.dummy_test import DummyTest
+from src.cache import ModelOutputCache, file_digest
+from youtube_runner import YouTubeTestRunner
+
+
+class TestModelOutputCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        self.cache = ModelOutputCache(self.directory.joinpath("outputs"))
+
+        self.audio = self.directory.joinpath("audio.mp3")
+        self.audio.write_bytes(b"audio")
+        self.tester = DummyTest()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_file_digest(self):
+        other = self.directory.joinpath("other.mp3")
+        other.write_bytes(b"audio")
+
+        self.assertEqual(file_digest(self.audio), file_digest(other))
+
+    def test_key_depends_on_audio_and_settings(self):
+        key = self.cache.key(self.audio, self.tester)
+
+        self.assertEqual(key, self.cache.key(self.audio, DummyTest()))
+        self.assertNotEqual(key, self.cache.key(self.audio, DummyTest("Other")))
+
+        self.audio.write_bytes(b"other audio")
+        self.assertNotEqual(key, self.cache.key(self.audio, self.tester))
+
+    def test_key_ignores_runtime_settings(self):
+        key = self.cache.key(self.audio, self.tester)
+
+        runtime = DummyTest(batch_size=8, device="cpu")
+        self.assertEqual(key, self.cache.key(self.audio, runtime))
+        self.assertNotEqual(key, self.cache.key(self.audio, DummyTest(autocast="bf16")))
+
+    def test_put_and_get(self):
+        key = self.cache.key(self.audio, self.tester)
+
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "transcript", segments=[{"start": 0.0, "text": "a"}])
+
+        self.assertEqual(
+            self.cache.get(key),
+            {"text": "transcript", "segments": [{"start": 0.0, "text": "a"}]},
+        )
+
+    def test_runner_skips_inference(self):
+        tester = Mock(wraps=self.tester)
+        tester.model_name = self.tester.model_name
+        tester.language = self.tester.language
+
+        runner = YouTubeTestRunner(
+            tester=tester,
+            testplan_path="testplan.json",
+            audio_dir=self.directory,
+            output_dir=self.directory,
+            keep_audio=True,
+            transcript_cache_ttl=0,
+            model_cache=self.directory.joinpath("outputs"),
+        )
+
+        for _ in range(2):
+            transcript = runner.transcribe({"videoId": "123"}, self.audio)
+            self.assertEqual(transcript, "This is a model for tests :)")
+
+        tester.transcribe.assert_called_once()
+
+    def test_runner_reads_audio_once(self):
+        self.tester.accepts_pcm = True
+        runner = YouTubeTestRunner(
+            tester=self.tester,
+            testplan_path="testplan.json",
+            audio_dir=self.directory,
+            output_dir=self.directory,
+            keep_audio=True,
+            transcript_cache_ttl=0,
+            model_cache=self.directory.joinpath("outputs"),
+            pcm_cache=self.directory.joinpath("pcm"),
+        )
+        runner._pcm_cache._decode = lambda path: [0.0] * 16
+
+        with patch("youtube_runner.file_digest", wraps=file_digest) as digest, patch(
+            "src.cache.pcm.file_digest"
+        ) as pcm_digest:
+            runner.transcribe({"videoId": "123"}, self.audio)
+
+        digest.assert_called_once_with(self.audio)
+        pcm_digest.assert_not_called()
+        self.assertEqual(runner._audio_digests, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
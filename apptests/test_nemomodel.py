@@ -0,0 +1,160 @@
+import importlib
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.audio import SAMPLE_RATE
+from src.dataclasses.youtube_video import YouTubeVideo
+from youtube_runner import YouTubeTestRunner
+
+# chunk length of NemoTest in samples
+CHUNK_LENGTH = 240 * SAMPLE_RATE
+
+
+def fake_modules() -> dict:
+    """
+    Stand-ins for the modules imported by models/nemo_test.py
+
+    Returns:
+        modules to patch into sys.modules
+    """
+
+    torch = MagicMock()
+    torch.device.side_effect = lambda device: SimpleNamespace(
+        type=str(device).split(":")[0]
+    )
+    torch.cuda.is_available.return_value = False
+
+    whisper = MagicMock(__version__="test")
+    nemo = MagicMock()
+
+    return {
+        "torch": torch,
+        "whisper": whisper,
+        "whisper.normalizers": whisper.normalizers,
+        "nemo": nemo,
+        "nemo.collections": nemo.collections,
+        "nemo.collections.asr": nemo.collections.asr,
+    }
+
+
+def fake_transcribe(chunks: list, **kwargs) -> tuple[list[str], None]:
+    # NeMo returns the best hypotheses first, named after the chunk lengths here
+    return [str(len(chunk)) for chunk in chunks], None
+
+
+class Test_NemoTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.modules = fake_modules()
+        self.patcher = patch.dict(sys.modules, self.modules)
+        self.patcher.start()
+        sys.modules.pop("models.nemo_test", None)
+        self.nemo_test = importlib.import_module("models.nemo_test")
+
+        self.tester = self.nemo_test.NemoTest(
+            "model", "EncDecCTCModel", device="cpu", batch_size=4
+        )
+        self.tester.transcriber = MagicMock(side_effect=fake_transcribe)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+        return super().tearDown()
+
+    def test_model(self):
+        from_pretrained = self.modules[
+            "nemo.collections.asr"
+        ].models.EncDecCTCModel.from_pretrained
+
+        from_pretrained.assert_called_once()
+        self.assertEqual(from_pretrained.call_args.args, ("model",))
+        self.assertEqual(self.tester.output_settings()["modelClass"], "EncDecCTCModel")
+
+    def test_chunks(self):
+        audio = np.arange(2 * CHUNK_LENGTH + 100, dtype=np.float32)
+
+        transcript = self.tester.transcribe(audio)
+
+        self.assertEqual(transcript, f"{CHUNK_LENGTH} {CHUNK_LENGTH} 100")
+        self.tester.transcriber.assert_called_once()
+        (chunks,), kwargs = self.tester.transcriber.call_args
+        self.assertEqual(kwargs, {"channel_selector": "average", "batch_size": 4})
+
+        self.assertEqual([len(chunk) for chunk in chunks], [CHUNK_LENGTH] * 2 + [100])
+        for n, chunk in enumerate(chunks):
+            self.assertIsInstance(chunk, np.ndarray)
+            np.testing.assert_array_equal(
+                chunk, audio[n * CHUNK_LENGTH : (n + 1) * CHUNK_LENGTH]
+            )
+
+    def test_read_only_audio(self):
+        audio = np.zeros(CHUNK_LENGTH + 1, dtype=np.float32)
+        audio.setflags(write=False)
+
+        self.tester.transcribe(audio)
+
+        # the model gets writable copies instead of views of the memory-mapped audio
+        (chunks,), _ = self.tester.transcriber.call_args
+        for chunk in chunks:
+            self.assertTrue(chunk.flags.writeable)
+            self.assertFalse(np.shares_memory(chunk, audio))
+
+    def test_batch(self):
+        audio = [
+            np.zeros(CHUNK_LENGTH + 1, dtype=np.float32),
+            np.zeros(5, dtype=np.float32),
+            np.zeros(2 * CHUNK_LENGTH, dtype=np.float32),
+        ]
+
+        transcripts = self.tester.transcribe_batch(audio)
+
+        # the chunks of all audio files are transcribed at once
+        self.tester.transcriber.assert_called_once()
+        self.assertEqual(
+            transcripts,
+            [f"{CHUNK_LENGTH} 1", "5", f"{CHUNK_LENGTH} {CHUNK_LENGTH}"],
+        )
+
+    def test_missing_transcript(self):
+        self.tester.transcriber.side_effect = lambda chunks, **kwargs: (["a"], None)
+
+        with self.assertRaises(ValueError):
+            self.tester.transcribe(np.zeros(CHUNK_LENGTH + 1, dtype=np.float32))
+
+    @patch("src.dataclasses.youtube_video.YouTubeVideo.from_dict")
+    def test_missing_transcript_in_runner(self, mock_from_dict):
+        video = MagicMock(spec=YouTubeVideo)
+        video.youtube_transcript.return_value = "target"
+        video.download_audio.side_effect = (
+            lambda path, audio_format: f"{path}/audio.{audio_format}"
+        )
+        mock_from_dict.return_value = video
+        self.tester.transcriber.side_effect = lambda chunks, **kwargs: (["a"], None)
+
+        items = [{"videoId": "a"}, {"videoId": "b"}]
+        with tempfile.TemporaryDirectory() as output_dir:
+            runner = YouTubeTestRunner(
+                tester=self.tester,
+                testplan_path="./apptests/data/simpleTest.json",
+                audio_dir="mock_audio_dir",
+                output_dir=output_dir,
+                keep_audio=True,
+                batch_size=2,
+                transcript_cache_ttl=0,
+            )
+
+            with patch.object(self.nemo_test, "load_audio") as mock_load_audio:
+                mock_load_audio.return_value = np.zeros(5, dtype=np.float32)
+                runner._run_serial(items, 0)
+
+            outcomes, _ = runner._journal.load()
+
+        # the run goes on, every video of the batch is recorded with the error
+        self.assertEqual(len(outcomes), 2)
+        for item in items:
+            self.assertNotIn("results", item)
+            self.assertTrue(item["error"].startswith("ValueError (model transcript)"))
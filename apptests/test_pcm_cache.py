@@ -0,0 +1,171 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from models.dummy_test import DummyTest
+from src.audio import SAMPLE_RATE, decode_audio, load_audio, split_audio
+from src.cache import PcmCache
+from src.dataclasses.youtube_video import YouTubeVideo
+from youtube_runner import YouTubeTestRunner
+
+
+class TestPcmCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        self.audio = self.directory.joinpath("audio.mp3")
+        self.audio.write_bytes(b"audio")
+
+        self.decoded = []
+
+        def decode(path):
+            self.decoded.append(path)
+            return np.linspace(-1, 1, 100, dtype=np.float64)
+
+        self.cache = PcmCache(self.directory.joinpath("pcm"), decode=decode)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_decode_once(self):
+        first = self.cache.load(self.audio)
+        second = self.cache.load(self.audio)
+
+        self.assertEqual(self.decoded, [self.audio])
+        np.testing.assert_array_equal(first, second)
+
+    def test_memory_mapped_float32(self):
+        waveform = self.cache.load(self.audio)
+
+        self.assertIsInstance(waveform, np.memmap)
+        self.assertEqual(waveform.dtype, np.float32)
+        self.assertFalse(waveform.flags.writeable)
+
+    def test_known_digest(self):
+        missing = self.directory.joinpath("missing.mp3")
+        self.cache.load(missing, digest="abc")
+
+        self.assertTrue(self.directory.joinpath("pcm", "abc.npy").exists())
+
+    def test_lru_eviction(self):
+        self.cache.load(self.audio, digest="a")
+        file_size = self.cache.size()
+        self.cache.max_size = 2 * file_size
+
+        self.cache.load(self.audio, digest="b")
+        pcm = self.directory.joinpath("pcm")
+        os.utime(pcm.joinpath("a.npy"), (0, 0))
+        os.utime(pcm.joinpath("b.npy"), (1, 1))
+        # a is used again, so b is the least recently used file
+        self.cache.load(self.audio, digest="a")
+        self.cache.load(self.audio, digest="c")
+
+        self.assertEqual(
+            sorted(path.name for path in pcm.iterdir()), ["a.npy", "c.npy"]
+        )
+        self.assertEqual(self.cache.size(), 2 * file_size)
+
+    def test_load_audio_passes_waveform(self):
+        waveform = self.cache.load(self.audio)
+        self.assertIs(load_audio(waveform), waveform)
+
+
+class TestRunnerDecodeError(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+        def download_audio(destination, audio_format):
+            path = Path(destination).joinpath(f"123.{audio_format}")
+            path.write_bytes(b"audio")
+            return path
+
+        self.video = MagicMock(spec=YouTubeVideo)
+        self.video.videoId = "123"
+        self.video.youtube_transcript.return_value = "target"
+        self.video.download_audio.side_effect = download_audio
+
+        self.tester = DummyTest()
+        self.tester.accepts_pcm = True
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _prepare(self, **kwargs):
+        runner = YouTubeTestRunner(
+            tester=self.tester,
+            testplan_path="testplan.json",
+            audio_dir=self.directory.joinpath("audio"),
+            output_dir=self.directory,
+            transcript_cache_ttl=0,
+            pcm_cache=self.directory.joinpath("pcm"),
+            **kwargs,
+        )
+
+        def decode(path):
+            raise ValueError("corrupted")
+
+        runner._pcm_cache._decode = decode
+        video_details = {"videoId": "123"}
+
+        with patch(
+            "src.dataclasses.youtube_video.YouTubeVideo.from_dict",
+            return_value=self.video,
+        ):
+            self.assertIsNone(runner.prepare(video_details))
+
+        self.assertEqual(video_details["error"], "ValueError (decode): corrupted")
+        return runner
+
+    def test_audio_cache_released(self):
+        runner = self._prepare(audio_cache_size=100)
+
+        with runner._audio_cache._locked_index() as index:
+            self.assertEqual(index["123.mp3"]["pins"], {})
+
+    def test_audio_removed(self):
+        self.directory.joinpath("audio").mkdir()
+        self._prepare()
+
+        self.assertFalse(self.directory.joinpath("audio", "123.mp3").exists())
+
+    def test_audio_kept(self):
+        self.directory.joinpath("audio").mkdir()
+        self._prepare(keep_audio=True)
+
+        self.assertTrue(self.directory.joinpath("audio", "123.mp3").exists())
+
+
+class TestSplitAudio(unittest.TestCase):
+    def test_chunks(self):
+        waveform = np.arange(int(2.5 * SAMPLE_RATE), dtype=np.float32)
+        chunks = split_audio(waveform, chunk_length_s=1)
+
+        self.assertEqual([len(chunk) for chunk in chunks], [16000, 16000, 8000])
+        np.testing.assert_array_equal(np.concatenate(chunks), waveform)
+        self.assertTrue(all(chunk.base is waveform for chunk in chunks))
+
+    def test_empty(self):
+        self.assertEqual(split_audio(np.zeros(0, dtype=np.float32), 10), [])
+
+
+@unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg is not installed")
+class TestDecodeAudio(unittest.TestCase):
+    def test_decode_sample(self):
+        waveform = decode_audio("apptests/data/sample.mp3")
+
+        self.assertEqual(waveform.dtype, np.float32)
+        self.assertEqual(waveform.ndim, 1)
+        self.assertGreater(len(waveform), SAMPLE_RATE)
+
+    def test_decode_missing_file(self):
+        self.assertRaises(ValueError, decode_audio, "missing.mp3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import argparse
+import importlib
+import io
+import json
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from importlib.metadata import EntryPoint
+from pathlib import Path
+from unittest import mock
+
+from src import plugins, test_runner
+from src.plugins import discover_tests
+from src.test_runner import TestRegistry
+from src.transcript_test import TranscriptTest
+from src.utils import parse_size
+
+TEST_PATH = "models.dummy_test:DummyTest"
+
+
+class PluginTest(TranscriptTest):
+    @staticmethod
+    def subparser(subparser):
+        subparser.add_argument("-m", "--model-type", type=str, dest="model_name")
+        subparser.add_argument("--size", type=parse_size, dest="size", default=None)
+        subparser.add_argument("--stride", type=int, nargs=2, default=(4, 2))
+        subparser.add_argument("--gpu", type=int, choices=range(2), default=0)
+
+
+class PluginRunner(test_runner.TestRunner):
+    pass
+
+
+def entry_point(name, value):
+    return EntryPoint(name=name, value=value, group="mi_go.tests")
+
+
+class TestDiscoverTests(unittest.TestCase):
+    @mock.patch("src.plugins.entry_points")
+    def test_discover(self, mock_entry_points):
+        mock_entry_points.return_value = [
+            entry_point("PluginTest", "plugins.plugin_test:PluginTest"),
+            entry_point("Other", "plugins.plugin_test:PluginTest"),
+        ]
+
+        self.assertEqual(discover_tests(), ["plugins.plugin_test:PluginTest"])
+        mock_entry_points.assert_called_once_with(group="mi_go.tests")
+
+    @mock.patch("src.plugins.entry_points")
+    def test_register(self, mock_entry_points):
+        mock_entry_points.return_value = [
+            entry_point("PluginTest", "plugins.plugin_test:PluginTest"),
+        ]
+
+        TestRegistry.discover(PluginRunner)
+        TestRegistry.discover(PluginRunner)
+
+        self.assertEqual(TestRegistry.get_names(PluginRunner), ["PluginTest"])
+
+    @mock.patch("src.plugins.entry_points", return_value=[])
+    def test_list_tests(self, mock_entry_points):
+        parser = argparse.ArgumentParser()
+        parser.add_argument("testplan_path")
+
+        output = io.StringIO()
+        with mock.patch.dict(
+            TestRegistry._registry, {PluginRunner: [TEST_PATH, "a.b:OtherTest"]}
+        ), redirect_stdout(output), self.assertRaises(SystemExit):
+            TestRegistry.add_subparsers(PluginRunner, parser, ["--list-tests"])
+            parser.parse_args(["--list-tests"])
+
+        self.assertEqual(output.getvalue(), "DummyTest\nOtherTest\n")
+
+
+class TestTestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name, "manifest.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _parse(self, manifest, load, argv):
+        parser = argparse.ArgumentParser()
+        manifest.add_arguments(parser, TEST_PATH, load)
+        return parser.parse_args(argv)
+
+    def test_cached_arguments(self):
+        argv = ["-m", "model", "--size", "1K", "--gpu", "1", "--device", "cpu"]
+        load = mock.Mock(return_value=PluginTest)
+        args = self._parse(plugins.TestManifest(self.path), load, argv)
+
+        # a new manifest reads the arguments from the file without the import
+        load = mock.Mock(side_effect=AssertionError("imported"))
+        cached_args = self._parse(plugins.TestManifest(self.path), load, argv)
+
+        self.assertEqual(vars(args), vars(cached_args))
+        self.assertEqual(cached_args.size, 1024)
+        self.assertEqual(cached_args.stride, (4, 2))
+        load.assert_not_called()
+
+    def test_changed_source(self):
+        load = mock.Mock(return_value=PluginTest)
+        self._parse(plugins.TestManifest(self.path), load, [])
+
+        with mock.patch.object(
+            plugins.TestManifest, "_fingerprint", return_value={"changed": [0, 0]}
+        ):
+            self._parse(plugins.TestManifest(self.path), load, [])
+
+        self.assertEqual(load.call_count, 2)
+
+    def test_common_args_modules(self):
+        load = mock.Mock(return_value=PluginTest)
+        self._parse(plugins.TestManifest(self.path), load, [])
+
+        with open(self.path, encoding="utf-8") as f:
+            modules = json.load(f)[TEST_PATH]["modules"]
+
+        self.assertEqual(modules[0], PluginTest.__module__)
+        self.assertIn("src.differs", modules)
+        self.assertIn("src.normalizers", modules)
+
+    def test_changed_base_class(self):
+        source = Path(self.tmp_dir.name, "manifest_base.py")
+        source.write_text(
+            "from src.transcript_test import TranscriptTest\n\n\n"
+            "class BaseTest(TranscriptTest):\n"
+            "    pass\n"
+        )
+
+        sys.path.insert(0, self.tmp_dir.name)
+        self.addCleanup(sys.path.remove, self.tmp_dir.name)
+        self.addCleanup(sys.modules.pop, "manifest_base", None)
+        base = importlib.import_module("manifest_base")
+
+        class InheritingTest(base.BaseTest):
+            pass
+
+        load = mock.Mock(return_value=InheritingTest)
+        self._parse(plugins.TestManifest(self.path), load, [])
+        self._parse(plugins.TestManifest(self.path), load, [])
+        self.assertEqual(load.call_count, 1)
+
+        # the base class in another module than the test is changed
+        source.write_text(source.read_text() + "\n# changed\n")
+        self._parse(plugins.TestManifest(self.path), load, [])
+        self.assertEqual(load.call_count, 2)
+
+    def test_uncacheable_arguments(self):
+        class LambdaTest(TranscriptTest):
+            @staticmethod
+            def subparser(subparser):
+                subparser.add_argument("--value", type=lambda x: x)
+
+        load = mock.Mock(return_value=LambdaTest)
+        args = self._parse(plugins.TestManifest(self.path), load, ["--value", "x"])
+
+        self.assertEqual(args.value, "x")
+        self.assertFalse(self.path.exists())
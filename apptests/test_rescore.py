@@ -0,0 +1,73 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from rescore import rescore
+from src.differs import jiwer_differ
+
+
+class TestRescore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.results_dir = Path(self.tmp_dir.name, "results")
+        self.results_dir.mkdir()
+
+        self.testplan = {
+            "args": {"q": "test"},
+            "items": [
+                {
+                    "videoId": "1",
+                    "modelTranscript": "this is a sample transcript",
+                    "targetTranscript": "this is the sample transcription",
+                    "results": {"wer": 1.0, "ops": "5S", "modelName": "tiny"},
+                },
+                {
+                    "videoId": "2",
+                    "modelTranscript": "",
+                    "targetTranscript": "empty model transcript",
+                    "results": {"wer": 1.0, "modelName": "tiny"},
+                },
+                {"videoId": "3", "error": "ValueError (download): unavailable"},
+            ],
+        }
+
+        with open(self.results_dir.joinpath("test.json"), "w", encoding="utf-8") as f:
+            json.dump(self.testplan, f)
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_rescore(self):
+        output_dir = Path(self.tmp_dir.name, "rescored")
+        paths = rescore([self.results_dir], output_dir, "none", "wer", jobs=1)
+
+        self.assertEqual(paths, [output_dir.joinpath("test_none_wer.json")])
+        with open(paths[0], encoding="utf-8") as f:
+            rescored = json.load(f)
+
+        first, second, third = rescored["items"]
+        expected = jiwer_differ(first["modelTranscript"], first["targetTranscript"])
+        self.assertEqual(first["results"], {**expected, "modelName": "tiny"})
+
+        self.assertNotIn("results", second)
+        self.assertIn("ValueError (compare)", second["error"])
+        self.assertEqual(third, self.testplan["items"][2])
+
+        self.assertEqual(
+            rescored["rescore"],
+            {"source": "test.json", "normalizer": "none", "differ": "wer"},
+        )
+
+    def test_unknown_differ(self):
+        output_dir = Path(self.tmp_dir.name, "rescored")
+
+        with self.assertRaises(ValueError):
+            rescore([self.results_dir], output_dir, "none", "missing", jobs=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
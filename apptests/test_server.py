@@ -0,0 +1,176 @@
+import argparse
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from models.dummy_test import DummyTest
+from src.server import DEFAULT_SOCKET, DynamicBatcher, ModelServer, RemoteTest
+
+
+class TestModelServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = Path(self.tmp_dir.name, "model.sock")
+
+        self.tester = DummyTest()
+        self.server = ModelServer(self.tester, self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+        self.client = RemoteTest(socket_path=self.socket_path)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.thread.join()
+        self.tmp_dir.cleanup()
+
+    def test_info(self):
+        self.assertEqual(self.client.model_name, "DummyTest")
+        self.assertEqual(self.client.language, "en")
+        self.assertEqual(self.client.additional_info(), self.tester.additional_info())
+        self.assertEqual(self.client.output_settings(), self.tester.output_settings())
+
+    def test_transcribe(self):
+        self.assertEqual(
+            self.client.transcribe("audio.mp3"), "This is a model for tests :)"
+        )
+        self.assertEqual(
+            self.client.transcribe_batch(["a.mp3", "b.mp3"]),
+            ["This is a model for tests :)"] * 2,
+        )
+
+    def test_transcribe_sends_absolute_paths(self):
+        with mock.patch.object(self.tester, "transcribe") as mock_transcribe:
+            mock_transcribe.return_value = "text"
+            self.client.transcribe("audio.mp3")
+
+        mock_transcribe.assert_called_once_with(str(Path("audio.mp3").resolve()))
+
+    def test_compare(self):
+        results = self.client.compare("This is a test", "This is the test")
+
+        self.assertEqual(
+            results, self.tester.compare("This is a test", "This is the test")
+        )
+        self.assertEqual(self.client.normalizer("Some Text"), "some text")
+
+    def test_errors(self):
+        with mock.patch.object(
+            self.tester, "transcribe", side_effect=TimeoutError("too long")
+        ):
+            with self.assertRaises(TimeoutError):
+                self.client.transcribe("audio.mp3")
+
+        with mock.patch.object(self.tester, "transcribe", side_effect=KeyError("key")):
+            with self.assertRaises(RuntimeError):
+                self.client.transcribe("audio.mp3")
+
+        with mock.patch.object(
+            self.tester, "transcribe", side_effect=ValueError("no transcript")
+        ):
+            with self.assertRaises(ValueError):
+                self.client.transcribe("audio.mp3")
+
+        # the connection is still usable after the errors
+        self.assertEqual(self.client.normalizer("Text"), "text")
+
+    def test_server_settings(self):
+        with self.assertRaises(ValueError):
+            RemoteTest(socket_path=self.socket_path, device="cpu")
+
+        with self.assertRaises(ValueError):
+            RemoteTest(socket_path=self.socket_path, torch_compile=True)
+
+        client = RemoteTest(
+            socket_path=self.socket_path, device=None, inference_mode=False
+        )
+        client.close()
+
+    def test_stats(self):
+        self.client.transcribe_batch(["a.mp3", "b.mp3"])
+        stats = self.client.server_stats()
+
+        self.assertEqual(stats["batches"], 1)
+        self.assertEqual(stats["averageBatchSize"], 2)
+        self.assertEqual(stats["queueDepth"], 0)
+
+    def test_already_running(self):
+        with self.assertRaises(RuntimeError):
+            ModelServer(self.tester, self.socket_path)
+
+
+class TestRemoteTest(unittest.TestCase):
+    def test_no_server(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(ConnectionError):
+                RemoteTest(socket_path=Path(tmp_dir, "missing.sock"))
+
+    def test_parser(self):
+        parser = argparse.ArgumentParser()
+        RemoteTest.common_args(parser)
+        RemoteTest.subparser(parser)
+
+        self.assertEqual(vars(parser.parse_args([])), {"socket_path": DEFAULT_SOCKET})
+
+        # the common arguments are given to the model server
+        for argv in (["--device", "cpu"], ["--compile"], ["--autocast", "bf16"]):
+            with self.assertRaises(SystemExit), mock.patch("sys.stderr"):
+                parser.parse_args(argv)
+
+
+class TestDynamicBatcher(unittest.TestCase):
+    def setUp(self):
+        def transcribe_batch(audio):
+            if "bad" in audio:
+                raise ValueError("bad audio")
+            return [f"transcript of {path}" for path in audio]
+
+        self.tester = mock.Mock()
+        self.tester.transcribe_batch.side_effect = transcribe_batch
+        self.tester.transcribe.side_effect = lambda path: transcribe_batch([path])[0]
+
+    def test_groups_requests(self):
+        batcher = DynamicBatcher(self.tester, max_batch_size=4, max_latency=1)
+        futures = [batcher.submit([f"{n}.mp3"]) for n in range(4)]
+
+        results = [future.result(timeout=5) for future in futures]
+        batcher.stop()
+
+        self.assertEqual(results, [[f"transcript of {n}.mp3"] for n in range(4)])
+        self.tester.transcribe_batch.assert_called_once_with(
+            [f"{n}.mp3" for n in range(4)]
+        )
+        self.assertEqual(batcher.stats()["averageBatchSize"], 4)
+        self.assertEqual(batcher.stats()["requests"], 4)
+
+    def test_max_batch_size(self):
+        batcher = DynamicBatcher(self.tester, max_batch_size=3, max_latency=1)
+        futures = [batcher.submit([f"{n}a.mp3", f"{n}b.mp3"]) for n in range(3)]
+
+        for future in futures:
+            self.assertEqual(len(future.result(timeout=5)), 2)
+        batcher.stop()
+
+        # requests are not split, so each request of 2 is its own batch
+        self.assertEqual(batcher.stats()["batches"], 3)
+        self.assertEqual(batcher.stats()["largestBatchSize"], 2)
+
+    def test_failed_request_isolated(self):
+        batcher = DynamicBatcher(self.tester, max_batch_size=2, max_latency=1)
+        good = batcher.submit(["good.mp3"])
+        bad = batcher.submit(["bad"])
+
+        self.assertEqual(good.result(timeout=5), ["transcript of good.mp3"])
+        with self.assertRaises(ValueError):
+            bad.result(timeout=5)
+        batcher.stop()
+
+    def test_stop_finishes_queued(self):
+        batcher = DynamicBatcher(self.tester, max_batch_size=1, max_latency=0)
+        futures = [batcher.submit([f"{n}.mp3"]) for n in range(3)]
+        batcher.stop()
+
+        self.assertTrue(all(future.done() for future in futures))
@@ -1,20 +1,28 @@
 import json
 import os
+import queue
+import tempfile
 import unittest
 from copy import deepcopy
 from os import environ, listdir, remove
+from pathlib import Path
 from unittest.mock import MagicMock, Mock, mock_open, patch
 
 import models
 from generators.youtube_generator import generate
 from models.dummy_test import DummyTest
+from src import plugins
+from src.cache import AudioCache, TranscriptCache
+from src.comparator import Comparator
 from src.dataclasses.youtube_video import YouTubeVideo
 from src.differs import jiwer_differ
+from src.test_runner import TestRegistry
 from youtube_runner import YouTubeTestRunner
 
 
 class Test_YoutubeTestRunner_run(unittest.TestCase):
     def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
         self.tester = Mock()
         self.mock_dummy_test_instance = Mock(
             spec=models.DummyTest(
@@ -38,11 +46,12 @@ class Test_YoutubeTestRunner_run(unittest.TestCase):
             tester=self.mock_dummy_test_instance,
             testplan_path="./apptests/data/simpleTest.json",
             audio_dir="mock_audio_dir",
-            output_dir="mock_output_dir",
+            output_dir=self.tmp_dir.name,
             iterations=1,
             save_transcripts=True,
             save_to_database=False,
             keep_audio=True,
+            transcript_cache=Path(self.tmp_dir.name, "transcripts.sqlite"),
         )
         self.mock_video = MagicMock(spec=YouTubeVideo)
         self.mock_video.youtube_transcript.return_value = "This is a model for tests :)"
@@ -59,6 +68,10 @@ class Test_YoutubeTestRunner_run(unittest.TestCase):
 
         return super().setUp()
 
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
     def test_initialization(self):
         self.assertIsNotNone(self.runner.tester.transcriber)
         self.assertIsNotNone(self.runner.tester.normalizer)
@@ -158,3 +171,407 @@ class Test_YoutubeTestRunner_save_results(unittest.TestCase):
 
         for json_file in json_files:
             remove(json_file)
+
+
+class Test_YoutubeTestRunner_pipeline(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tester = Mock()
+        self.tester.language = "en"
+        self.tester.model_name = "DummyTest"
+        self.tester.transcribe.side_effect = lambda audio: f"transcript of {audio}"
+        self.tester.transcribe_batch.side_effect = lambda audio: [
+            f"transcript of {path}" for path in audio
+        ]
+        self.tester.compare.side_effect = lambda model, target: {"wer": 0.0}
+        self.tester.additional_info.return_value = {"modelName": "DummyTest"}
+
+        self.mock_video = MagicMock(spec=YouTubeVideo)
+        self.mock_video.videoId = "123"
+        self.mock_video.youtube_transcript.return_value = "target"
+        self.mock_video.download_audio.side_effect = (
+            lambda path, audio_format: f"{path}/audio.{audio_format}"
+        )
+
+        self.items = [{"videoId": str(i)} for i in range(5)]
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def _runner(self, pipeline_depth, batch_size=1, compare_workers=0):
+        return YouTubeTestRunner(
+            tester=self.tester,
+            testplan_path="./apptests/data/simpleTest.json",
+            audio_dir="mock_audio_dir",
+            output_dir=self.tmp_dir.name,
+            keep_audio=True,
+            pipeline_depth=pipeline_depth,
+            batch_size=batch_size,
+            compare_workers=compare_workers,
+            transcript_cache=Path(self.tmp_dir.name, "transcripts.sqlite"),
+        )
+
+    @patch("src.dataclasses.youtube_video.YouTubeVideo.from_dict")
+    def test_pipelined_matches_serial(self, mock_from_dict):
+        mock_from_dict.return_value = self.mock_video
+
+        serial_items = deepcopy(self.items)
+        self._runner(0)._run_serial(serial_items, 0)
+
+        pipelined_items = deepcopy(self.items)
+        self._runner(2)._run_pipelined(pipelined_items, 0)
+
+        self.assertEqual(serial_items, pipelined_items)
+        self.assertTrue(all("results" in item for item in pipelined_items))
+
+    @patch("src.dataclasses.youtube_video.YouTubeVideo.from_dict")
+    def test_pipelined_download_error(self, mock_from_dict):
+        mock_from_dict.return_value = self.mock_video
+        self.mock_video.download_audio.side_effect = ValueError("unavailable")
+
+        items = deepcopy(self.items)
+        self._runner(2)._run_pipelined(items, 0)
+
+        self.tester.transcribe.assert_not_called()
+        self.assertTrue(all("download" in item["error"] for item in items))
+
+    @patch("src.dataclasses.youtube_video.YouTubeVideo.from_dict")
+    def test_batched_matches_serial(self, mock_from_dict):
+        mock_from_dict.return_value = self.mock_video
+
+        serial_items = deepcopy(self.items)
+        self._runner(0)._run_serial(serial_items, 0)
+
+        batched_items = deepcopy(self.items)
+        self._runner(0, batch_size=2)._run_serial(batched_items, 0)
+
+        pipelined_items = deepcopy(self.items)
+        self._runner(2, batch_size=2)._run_pipelined(pipelined_items, 0)
+
+        self.assertEqual(serial_items, batched_items)
+        self.assertEqual(serial_items, pipelined_items)
+
+        # 5 videos in batches of 2, the last single video goes through transcribe
+        self.assertEqual(self.tester.transcribe_batch.call_count, 4)
+        self.assertEqual(self.tester.transcribe.call_count, 5 + 2)
+
+    @patch("src.dataclasses.youtube_video.YouTubeVideo.from_dict")
+    def test_batch_timeout(self, mock_from_dict):
+        mock_from_dict.return_value = self.mock_video
+        self.tester.transcribe_batch.side_effect = TimeoutError("timeout")
+
+        items = deepcopy(self.items[:2])
+        self._runner(0, batch_size=2)._run_serial(items, 0)
+
+        self.tester.compare.assert_not_called()
+        self.assertTrue(all("model transcript" in item["error"] for item in items))
+
+    @patch("src.dataclasses.youtube_video.YouTubeVideo.from_dict")
+    def test_batch_wrong_length(self, mock_from_dict):
+        mock_from_dict.return_value = self.mock_video
+        self.tester.transcribe_batch.side_effect = lambda audio: ["transcript"]
+
+        items = deepcopy(self.items[:2])
+        self._runner(2, batch_size=2)._run_pipelined(items, 0)
+
+        self.tester.compare.assert_not_called()
+        for item in items:
+            self.assertTrue(item["error"].startswith("ValueError (model transcript)"))
+
+    @patch("src.dataclasses.youtube_video.YouTubeVideo.from_dict")
+    def test_compare_workers_match_serial(self, mock_from_dict):
+        mock_from_dict.return_value = self.mock_video
+        comparator = Comparator(str.lower, jiwer_differ, detectedLanguage="en")
+        self.tester.compare.side_effect = comparator
+        self.tester.comparator.return_value = comparator
+
+        serial_items = deepcopy(self.items)
+        self._runner(0)._run_serial(serial_items, 0)
+        self.assertEqual(self.tester.compare.call_count, len(self.items))
+
+        for pipeline_depth in (0, 2):
+            items = deepcopy(self.items)
+            runner = self._runner(pipeline_depth, compare_workers=2)
+
+            with runner._compare_stage():
+                if pipeline_depth:
+                    runner._run_pipelined(items, 0)
+                else:
+                    runner._run_serial(items, 0)
+                runner._join_comparisons()
+
+            self.assertEqual(serial_items, items)
+            outcomes, _ = runner._journal.load()
+            self.assertEqual(len(outcomes), len(self.items))
+
+        # the runners compared in the workers
+        self.assertEqual(self.tester.compare.call_count, len(self.items))
+
+    def test_compare_workers_unpicklable(self):
+        self.tester.comparator.return_value = Comparator(lambda x: x, jiwer_differ)
+        runner = self._runner(0, compare_workers=2)
+
+        with runner._compare_stage():
+            self.assertIsNone(runner._compare_pool)
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            self._runner(0, batch_size=0)
+
+
+class CrashingTest(DummyTest):
+    # the worker process transcribing the video "crash" exits
+    def transcribe(self, audio_path):
+        if Path(audio_path).stem == "crash":
+            os._exit(3)
+        return super().transcribe(audio_path)
+
+
+class Test_YoutubeTestRunner_workers(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.audio_dir = self.root.joinpath("audio")
+        self.transcript_cache = self.root.joinpath("transcripts.sqlite")
+        self.testplan_path = self.root.joinpath("testplan.json")
+
+        with open("./apptests/data/simpleTest.json", encoding="utf-8") as f:
+            self.testplan = json.load(f)
+
+        # the target transcripts and the audio are cached, nothing is downloaded
+        item = self.testplan["items"][0]
+        self.testplan["items"] = [
+            {**item, "videoId": video_id} for video_id in ("a", "b", "c", "d", "e")
+        ]
+        with open(self.testplan_path, "w", encoding="utf-8") as f:
+            json.dump(self.testplan, f)
+
+        self._cache(video_id for video_id in ("a", "b", "c", "d", "e", "crash"))
+
+        manifest = plugins.TestManifest(self.root.joinpath("manifest.json"))
+        self.patchers = [
+            patch.object(TestRegistry, "manifest", manifest),
+            patch("src.test_runner.logger"),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        for patcher in self.patchers:
+            patcher.stop()
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def _cache(self, video_ids):
+        transcripts = TranscriptCache(self.transcript_cache, ttl=24 * 60 * 60)
+        audio = AudioCache(self.audio_dir, max_size=10**6)
+
+        for video_id in video_ids:
+            transcripts.put(video_id, "en", False, f"this is a target for {video_id}")
+            path = self.audio_dir.joinpath(f"{video_id}.mp3")
+            path.write_bytes(b"audio")
+            audio.put(video_id, "mp3", path)
+            audio.release(video_id, "mp3")
+
+    def _from_command_line(self, workers):
+        argv = [
+            "youtube_runner.py",
+            str(self.testplan_path),
+            "--audio-path",
+            str(self.audio_dir),
+            "--audio-cache-size",
+            "1M",
+            "--transcript-cache",
+            str(self.transcript_cache),
+            "-o",
+            str(self.root.joinpath("output")),
+            "-bs",
+            "2",
+            "-w",
+            str(workers),
+            "DummyTest",
+        ]
+
+        with patch("sys.argv", argv):
+            return YouTubeTestRunner.from_command_line()
+
+    def test_workers_match_serial(self):
+        runner = self._from_command_line(workers=2)
+        # the workers create their own testers
+        self.assertIsNone(runner._tester)
+
+        items = deepcopy(self.testplan["items"])
+        runner._run_workers(items, 0)
+        self.assertIsNone(runner._tester)
+
+        serial_items = deepcopy(self.testplan["items"])
+        self._from_command_line(workers=1)._run_serial(serial_items, 0)
+
+        self.assertEqual(items, serial_items)
+        self.assertTrue(all("results" in item for item in items))
+
+        outcomes, _ = runner._journal.load()
+        self.assertEqual(len(outcomes), len(items))
+
+    def test_exited_worker(self):
+        runner = YouTubeTestRunner(
+            testplan_path=self.testplan_path,
+            audio_dir=self.audio_dir,
+            output_dir=self.root.joinpath("output"),
+            audio_cache_size=10**6,
+            transcript_cache=self.transcript_cache,
+            workers=2,
+            tester_cls=CrashingTest,
+            tester_args={},
+        )
+
+        items = deepcopy(self.testplan["items"])
+        items[1]["videoId"] = "crash"
+        runner._run_workers(items, 0)
+
+        self.assertIn("RuntimeError (worker)", items[1]["error"])
+        self.assertIn("exited with code 3", items[1]["error"])
+        self.assertNotIn("results", items[1])
+
+        # the other videos are processed by the remaining worker
+        for item in items[:1] + items[2:]:
+            self.assertIn("results", item)
+            self.assertNotIn("error", item)
+
+    def _runner(self, **kwargs):
+        return YouTubeTestRunner(
+            testplan_path=self.testplan_path,
+            audio_dir=self.audio_dir,
+            output_dir=self.root.joinpath("output"),
+            transcript_cache=self.transcript_cache,
+            tester_cls=DummyTest,
+            tester_args={},
+            **kwargs,
+        )
+
+    def test_results_after_exit(self):
+        runner = self._runner(workers=2, batch_size=2)
+        items = deepcopy(self.testplan["items"][:4])
+
+        # worker-0 exits right after sending the results of its batch, the runner
+        # records the batch with the error before the results arrive
+        alive = [True, True]
+        sent = [
+            queue.Empty(),
+            (0, [(0, {"results": {"wer": 0}}), (1, {"results": {"wer": 0}})]),
+            (1, [(2, {"results": {"wer": 0}}), (3, {"results": {"wer": 0}})]),
+        ]
+
+        def get(timeout):
+            alive[0] = False
+            result = sent.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        def process(target, args, name, daemon):
+            worker = MagicMock(is_alive=lambda: alive[args[0]])
+            worker.name = name
+            worker.exitcode = -9
+            return worker
+
+        context = MagicMock()
+        context.Queue.return_value.get.side_effect = get
+        context.Process.side_effect = process
+
+        with patch("youtube_runner.multiprocessing.get_context", return_value=context):
+            runner._run_workers(items, 0)
+
+        for item in items[:2]:
+            self.assertIn("worker-0 exited with code -9", item["error"])
+            self.assertNotIn("results", item)
+        for item in items[2:]:
+            self.assertIn("results", item)
+
+        # the batch of the exited worker is recorded once, the last batch is not lost
+        self.assertEqual(runner._journal.path.read_text().count('"type": "item"'), 4)
+
+    def test_pipeline_depth_with_workers(self):
+        runner = self._runner(workers=2, pipeline_depth=2)
+
+        with patch.object(runner, "_run_workers") as mock_run_workers, patch.object(
+            runner, "save_results", return_value=self.root
+        ), patch("youtube_runner.logger") as mock_logger:
+            runner.run()
+
+        mock_run_workers.assert_called_once()
+        self.assertIn("Pipeline depth", mock_logger.warning.call_args.args[0])
+
+
+class Test_YoutubeTestRunner_parser(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        manifest = plugins.TestManifest(
+            os.path.join(self.tmp_dir.name, "manifest.json")
+        )
+        self.patcher = patch.object(TestRegistry, "manifest", manifest)
+        self.patcher.start()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_common_args(self):
+        argv = [
+            "./apptests/data/simpleTest.json",
+            "DummyTest",
+            "--device",
+            "cpu",
+            "--intra-op-threads",
+            "4",
+            "--inter-op-threads",
+            "1",
+        ]
+        args = YouTubeTestRunner.parser(argv).parse_args(argv)
+
+        self.assertEqual(args.device, "cpu")
+        self.assertEqual(args.intra_op_threads, 4)
+        self.assertEqual(args.inter_op_threads, 1)
+
+    def test_common_args_default(self):
+        argv = ["./apptests/data/simpleTest.json", "DummyTest"]
+        args = YouTubeTestRunner.parser(argv).parse_args(argv)
+        tester = DummyTest(**vars(args))
+
+        self.assertIsNone(tester.device)
+        self.assertIsNone(tester.intra_op_threads)
+        self.assertEqual(
+            tester.runtime_settings(),
+            {
+                "device": None,
+                "intra_op_threads": None,
+                "inter_op_threads": None,
+                "inference_mode": False,
+                "autocast": None,
+                "torch_compile": False,
+            },
+        )
+
+    def test_only_selected_test_imported(self):
+        argv = ["./apptests/data/simpleTest.json", "DummyTest"]
+
+        with patch("src.test_runner.TestRegistry._load") as mock_load:
+            mock_load.return_value = DummyTest
+            YouTubeTestRunner.parser(argv)
+
+        mock_load.assert_called_once_with("models.dummy_test:DummyTest")
+
+    def test_registered_names(self):
+        names = TestRegistry.get_names(YouTubeTestRunner)
+
+        self.assertIn("DummyTest", names)
+        self.assertIn("WhisperTest", names)
+        self.assertIs(TestRegistry.get_test(YouTubeTestRunner, "DummyTest"), DummyTest)
+        with self.assertRaises(ValueError):
+            TestRegistry.get_test(YouTubeTestRunner, "MissingTest")
@@ -0,0 +1,81 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from src.cache import TranscriptCache
+from src.dataclasses.youtube_video import YouTubeVideo
+
+
+class TestTranscriptCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name, "transcripts.sqlite")
+        self.cache = TranscriptCache(self.path, ttl=60)
+
+    def tearDown(self):
+        self.cache.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_lazy_database(self):
+        self.assertFalse(self.path.exists())
+        self.assertIsNone(self.cache.get("a", "en", False))
+        self.assertTrue(self.path.exists())
+
+    def test_put_and_get(self):
+        self.cache.put("a", "en", False, "Zażółć gęślą jaźń")
+
+        self.assertEqual(self.cache.get("a", "en", False), "Zażółć gęślą jaźń")
+        self.assertIsNone(self.cache.get("a", "en", True))
+        self.assertIsNone(self.cache.get("a", "en-GB", False))
+
+    def test_overwrite(self):
+        self.cache.put("a", "en", False, "old")
+        self.cache.put("a", "en", False, "new")
+
+        self.assertEqual(self.cache.get("a", "en", False), "new")
+
+    def test_expired(self):
+        self.cache.put("a", "en", False, "transcript")
+
+        with patch("src.cache.transcript.time.time", return_value=10**12):
+            self.assertIsNone(self.cache.get("a", "en", False))
+
+
+class TestYouTubeTranscriptCache(unittest.TestCase):
+    def setUp(self):
+        self.video = YouTubeVideo(
+            title="Title",
+            videoId="123",
+            defaultAudioLanguage="en",
+            generatedTranscripts=["en"],
+            manuallyCreatedTranscripts=["en-GB", "de"],
+        )
+        self.cache = MagicMock(spec=TranscriptCache)
+
+    @patch("src.dataclasses.youtube_video.YouTubeTranscriptApi.list_transcripts")
+    def test_cache_hit_skips_network(self, mock_list_transcripts):
+        self.cache.get.return_value = "cached transcript"
+
+        transcript = self.video.youtube_transcript("en", cache=self.cache)
+
+        self.assertEqual(transcript, "cached transcript")
+        self.cache.get.assert_called_once_with("123", "en-GB", False)
+        mock_list_transcripts.assert_not_called()
+
+    @patch("src.dataclasses.youtube_video.YouTubeTranscriptApi.list_transcripts")
+    def test_cache_miss_stores_transcript(self, mock_list_transcripts):
+        self.cache.get.return_value = None
+        found = mock_list_transcripts.return_value.find_generated_transcript
+        found.return_value.fetch.return_value = [{"text": "a"}, {"text": "b"}]
+
+        transcript = self.video.youtube_transcript(
+            "en", generated=True, cache=self.cache
+        )
+
+        self.assertEqual(transcript, "a b")
+        self.cache.put.assert_called_once_with("123", "en", True, "a b")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,16 @@
+import os
+import pickle
+import random
+import tempfile
 import unittest
+from unittest.mock import Mock
 
-from src.differs import jiwer_differ
-from src.normalizers import title_normalizer
+from src.alignment import decode_ops
+from src.comparator import Comparator
+from src.differs import alignment_differ, get_differ, jiwer_differ, wer_differ
+from src.normalizers import MemoizedNormalizer, title_normalizer
+from src.utils import parse_size
+from src.vocabulary import Vocabulary, tokens_from_bytes, tokens_to_bytes
 
 
 class TestTitleNormalizer(unittest.TestCase):
@@ -38,6 +47,84 @@ class TestTitleNormalizer(unittest.TestCase):
         self.assertEqual(result, None)
 
 
+class TestMemoizedNormalizer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, "normalized.sqlite")
+        self.normalizer = Mock(side_effect=str.lower)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_memory(self):
+        memoized = MemoizedNormalizer(self.normalizer, name="lower", max_size=2)
+
+        self.assertEqual(memoized.normalize_many(["A", "B", "A"]), ["a", "b", "a"])
+        self.assertEqual(memoized("B"), "b")
+        self.assertEqual(self.normalizer.call_count, 2)
+
+        # the least recently used transcript is dropped
+        memoized("C")
+        memoized("A")
+        self.assertEqual(self.normalizer.call_count, 4)
+
+    def test_persistent(self):
+        MemoizedNormalizer(self.normalizer, "lower", self.cache_path)("Target")
+
+        memoized = MemoizedNormalizer(self.normalizer, "lower", self.cache_path)
+        self.assertEqual(
+            memoized.normalize_many(["Target", "Model"]), ["target", "model"]
+        )
+        self.assertEqual(self.normalizer.call_count, 2)
+
+        # results of another normalizer are not shared
+        MemoizedNormalizer(self.normalizer, "other", self.cache_path)("Target")
+        self.assertEqual(self.normalizer.call_count, 3)
+
+    def test_pickle(self):
+        memoized = MemoizedNormalizer(str.lower, "lower", self.cache_path)
+        memoized("Target")
+
+        restored = pickle.loads(pickle.dumps(memoized))
+        self.assertEqual(restored.name, "lower")
+        self.assertEqual(restored("Target"), "target")
+
+    def test_name_required(self):
+        with self.assertRaises(ValueError):
+            MemoizedNormalizer(self.normalizer, cache_path=self.cache_path)
+
+    def test_model_transcript_not_persisted(self):
+        memoized = MemoizedNormalizer(self.normalizer, "lower", self.cache_path)
+        Comparator(memoized, wer_differ)("Model", "Target")
+
+        restored = MemoizedNormalizer(self.normalizer, "lower", self.cache_path)
+        restored("Target")
+        self.assertEqual(self.normalizer.call_count, 2)
+        restored("Model")
+        self.assertEqual(self.normalizer.call_count, 3)
+
+    def test_tokenize(self):
+        memoized = MemoizedNormalizer(self.normalizer, "lower", self.cache_path)
+        model, target = memoized.tokenize_many(["This  is A test", "this is the Test"])
+
+        self.assertEqual(list(model), [0, 1, 2, 3])
+        self.assertEqual(list(target), [0, 1, 4, 3])
+        self.assertEqual(
+            wer_differ(model, target),
+            jiwer_differ("this is a test", "this is the test"),
+        )
+
+        # the word ids are restored from the persistent cache into a new vocabulary
+        restored = MemoizedNormalizer(self.normalizer, "lower", self.cache_path)
+        self.assertEqual(
+            restored.normalize_many(["this is the Test", "This  is A test"]),
+            ["this is the test", "this is a test"],
+        )
+        self.assertEqual(self.normalizer.call_count, 2)
+
+
 class TestJiwerDiffer(unittest.TestCase):
     def test_with_detail(self):
         model_transcript = "This is a sample transcript."
@@ -90,5 +177,121 @@ class TestJiwerDiffer(unittest.TestCase):
         )
 
 
+class TestWerDiffer(unittest.TestCase):
+    def _transcripts(self, rng, length, vocabulary_size):
+        words = [f"w{rng.randrange(vocabulary_size)}" for _ in range(length)]
+        target = list(words)
+        for _ in range(rng.randrange(length + 1)):
+            position = rng.randrange(len(target) + 1)
+            operation = rng.random()
+            if operation < 0.35:
+                target.insert(position, f"w{rng.randrange(vocabulary_size)}")
+            elif position < len(target) and operation < 0.7:
+                target[position] = f"w{rng.randrange(vocabulary_size)}"
+            elif position < len(target):
+                del target[position]
+
+        return " ".join(words), "  ".join(target)
+
+    def test_same_as_jiwer(self):
+        rng = random.Random(0)
+
+        for length in (1, 2, 5, 30, 100, 700, 3000):
+            for vocabulary_size in (2, 3, 50):
+                with self.subTest(length=length, vocabulary_size=vocabulary_size):
+                    model, target = self._transcripts(rng, length, vocabulary_size)
+                    self.assertEqual(
+                        wer_differ(model, target), jiwer_differ(model, target)
+                    )
+
+    def test_whitespace(self):
+        for model, target in [
+            ("  this is\ta   test ", "this\tis a test"),
+            ("this is a test", ""),
+            ("this is a test", "   "),
+            ("a b c", "c b a"),
+        ]:
+            with self.subTest(model=model, target=target):
+                self.assertEqual(wer_differ(model, target), jiwer_differ(model, target))
+
+    def test_empty_model_transcript(self):
+        self.assertRaises(ValueError, wer_differ, "", "this is a test")
+        self.assertRaises(ValueError, wer_differ, "  ", "this is a test")
+
+    def test_tokens(self):
+        vocabulary = Vocabulary()
+        model, target = vocabulary.encode("a b c"), vocabulary.encode("a  c d")
+
+        self.assertEqual(wer_differ(model, target), jiwer_differ("a b c", "a c d"))
+        self.assertRaises(TypeError, wer_differ, model, "a c d")
+
+    def test_get_differ(self):
+        self.assertIs(get_differ("wer"), wer_differ)
+        self.assertIs(get_differ(jiwer_differ), jiwer_differ)
+        self.assertRaises(ValueError, get_differ, "missing")
+
+
+class TestAlignmentDiffer(unittest.TestCase):
+    def test_same_as_jiwer(self):
+        rng = random.Random(1)
+
+        for length in (1, 5, 100, 3000):
+            with self.subTest(length=length):
+                model, target = TestWerDiffer()._transcripts(rng, length, 3)
+                result = alignment_differ(model, target)
+                result.pop("ops")
+                self.assertEqual(result, jiwer_differ(model, target))
+
+    def test_ops(self):
+        model = "this is a sample transcript of the video"
+        target = "this is the sample transcript of a the video today"
+
+        result = alignment_differ(model, target)
+        self.assertEqual(result["ops"], "2=1S3=1I2=1I")
+
+        model_words, target_words = model.split(), target.split()
+        aligned = []
+        for operation, model_index, target_index in decode_ops(result["ops"]):
+            if operation == "=":
+                self.assertEqual(model_words[model_index], target_words[target_index])
+            if operation != "D":
+                aligned.append(target_words[target_index])
+
+        self.assertEqual(aligned, target_words)
+
+
+class TestVocabulary(unittest.TestCase):
+    def test_encode(self):
+        vocabulary = Vocabulary(["the"])
+        tokens = vocabulary.encode(" the  video of the day ")
+
+        self.assertEqual(tokens.typecode, "I")
+        self.assertEqual(list(tokens), [0, 1, 2, 0, 3])
+        self.assertEqual(len(vocabulary), 4)
+        self.assertEqual(vocabulary.decode(tokens), "the video of the day")
+
+    def test_bytes(self):
+        tokens = Vocabulary().encode("a b a c")
+        data = tokens_to_bytes(tokens)
+
+        self.assertEqual(len(data), 4 * len(tokens))
+        self.assertEqual(data[:4], b"\x00\x00\x00\x00")
+        self.assertEqual(data[4:8], b"\x01\x00\x00\x00")
+        self.assertEqual(tokens_from_bytes(data), tokens)
+
+
+class TestParseSize(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(parse_size("512"), 512)
+        self.assertEqual(parse_size("2K"), 2048)
+        self.assertEqual(parse_size("200G"), 200 * 1024**3)
+        self.assertEqual(parse_size("1.5t"), int(1.5 * 1024**4))
+        self.assertEqual(parse_size("500MiB"), 500 * 1024**2)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, parse_size, "many")
+        self.assertRaises(ValueError, parse_size, "10X")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,152 @@
+import importlib
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from src import plugins
+from src.test_runner import TestRegistry
+from youtube_runner import YouTubeTestRunner
+
+
+def fake_modules(cuda: bool = False) -> dict:
+    """
+    Stand-ins for the modules imported by models/whisper_test.py
+
+    Args:
+        cuda: value returned by torch.cuda.is_available
+
+    Returns:
+        modules to patch into sys.modules
+    """
+
+    torch = MagicMock()
+    torch.device.side_effect = lambda device: SimpleNamespace(
+        type=str(device).split(":")[0]
+    )
+    torch.cuda.is_available.return_value = cuda
+
+    whisper = MagicMock(__version__="test")
+
+    return {
+        "torch": torch,
+        "whisper": whisper,
+        "whisper.normalizers": whisper.normalizers,
+    }
+
+
+class Test_WhisperTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.modules = fake_modules()
+        self.patcher = patch.dict(sys.modules, self.modules)
+        self.patcher.start()
+        sys.modules.pop("models.whisper_test", None)
+        self.whisper_test = importlib.import_module("models.whisper_test")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+        return super().tearDown()
+
+    def test_int8(self):
+        with patch.object(self.whisper_test, "quantize_int8") as mock_quantize:
+            tester = self.whisper_test.WhisperTest(
+                "tiny", device="cpu", quantize="int8"
+            )
+
+        model = self.modules["whisper"].load_model.return_value
+        mock_quantize.assert_called_once_with(model)
+        self.assertIs(tester.model, mock_quantize.return_value)
+        self.assertIs(tester.transcriber, mock_quantize.return_value.transcribe)
+
+    def test_fp32(self):
+        with patch.object(self.whisper_test, "quantize_int8") as mock_quantize:
+            tester = self.whisper_test.WhisperTest("tiny", device="cpu")
+
+        mock_quantize.assert_not_called()
+        self.assertIs(tester.model, self.modules["whisper"].load_model.return_value)
+
+    def test_int8_on_cuda(self):
+        self.modules["torch"].cuda.is_available.return_value = True
+
+        with patch.object(self.whisper_test, "quantize_int8") as mock_quantize:
+            with self.assertRaises(ValueError):
+                self.whisper_test.WhisperTest("tiny", device="cuda:0", quantize="int8")
+
+        mock_quantize.assert_not_called()
+
+    def test_settings(self):
+        with patch.object(self.whisper_test, "quantize_int8"):
+            tester = self.whisper_test.WhisperTest(
+                "tiny", device="cpu", quantize="int8"
+            )
+
+        self.assertEqual(tester.output_settings()["quantize"], "int8")
+        self.assertIn("'quantize': 'int8'", tester.additional_info()["modelSettings"])
+
+
+class Test_WhisperTest_parser(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        manifest = plugins.TestManifest(
+            os.path.join(self.tmp_dir.name, "manifest.json")
+        )
+        self.patchers = [
+            patch.object(TestRegistry, "manifest", manifest),
+            patch.dict(sys.modules, fake_modules()),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        sys.modules.pop("models.whisper_test", None)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        for patcher in reversed(self.patchers):
+            patcher.stop()
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_quantize(self):
+        argv = ["./apptests/data/simpleTest.json", "WhisperTest", "-m", "tiny"]
+
+        args = YouTubeTestRunner.parser(argv).parse_args(argv)
+        self.assertIsNone(args.quantize)
+
+        argv += ["--quantize", "int8"]
+        args = YouTubeTestRunner.parser(argv).parse_args(argv)
+        self.assertEqual(args.quantize, "int8")
+
+    def test_quantize_invalid(self):
+        argv = ["./apptests/data/simpleTest.json", "WhisperTest", "-m", "tiny"]
+        argv += ["-q", "int4"]
+
+        with self.assertRaises(SystemExit), patch("sys.stderr"):
+            YouTubeTestRunner.parser(argv).parse_args(argv)
+
+
+@unittest.skipIf(
+    importlib.util.find_spec("torch") is None
+    or importlib.util.find_spec("whisper") is None,
+    "torch or whisper is not installed",
+)
+class Test_quantize_int8(unittest.TestCase):
+    def test_linear_subclass(self):
+        import torch
+
+        from models.whisper_test import quantize_int8
+
+        class Linear(torch.nn.Linear):
+            pass
+
+        model = torch.nn.Sequential(Linear(8, 4), torch.nn.ReLU(), Linear(4, 2))
+        inputs = torch.randn(3, 8)
+        expected = model(inputs)
+
+        model = quantize_int8(model)
+
+        self.assertIsInstance(model[0], torch.ao.nn.quantized.dynamic.Linear)
+        self.assertIsInstance(model[2], torch.ao.nn.quantized.dynamic.Linear)
+        self.assertTrue(torch.allclose(model(inputs), expected, atol=0.1))
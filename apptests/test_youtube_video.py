@@ -0,0 +1,75 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.dataclasses.youtube_video import YouTubeVideo
+
+
+class TestDownloadAudio(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.destination = Path(self.tmp.name)
+        self.video = YouTubeVideo(
+            title="Same title",
+            videoId="abc",
+            defaultAudioLanguage="en",
+            generatedTranscripts=[],
+            manuallyCreatedTranscripts=["en"],
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _options(self, mock_ydl):
+        return mock_ydl.call_args.args[0]
+
+    @patch("src.dataclasses.youtube_video.youtube_dl.YoutubeDL")
+    def test_mp3(self, mock_ydl):
+        path = self.video.download_mp3(self.destination)
+
+        options = self._options(mock_ydl)
+        self.assertEqual(path, self.destination.joinpath("abc.mp3"))
+        self.assertEqual(options["postprocessors"][0]["preferredcodec"], "mp3")
+
+    @patch("src.dataclasses.youtube_video.youtube_dl.YoutubeDL")
+    def test_flac(self, mock_ydl):
+        path = self.video.download_audio(self.destination, "flac")
+
+        options = self._options(mock_ydl)
+        self.assertEqual(path, self.destination.joinpath("abc.flac"))
+        self.assertEqual(options["postprocessors"][0]["preferredcodec"], "flac")
+        self.assertEqual(
+            options["postprocessor_args"]["extractaudio"], ["-ar", "16000", "-ac", "1"]
+        )
+
+    @patch("src.dataclasses.youtube_video.youtube_dl.YoutubeDL")
+    def test_native(self, mock_ydl):
+        ydl = mock_ydl.return_value.__enter__.return_value
+        ydl.extract_info.return_value = {
+            "requested_downloads": [{"filepath": f"{self.destination}/abc.webm"}]
+        }
+
+        path = self.video.download_audio(self.destination, "native")
+
+        self.assertNotIn("postprocessors", self._options(mock_ydl))
+        self.assertEqual(path, self.destination.joinpath("abc.webm"))
+
+    @patch("src.dataclasses.youtube_video.youtube_dl.YoutubeDL")
+    def test_existing_file(self, mock_ydl):
+        self.destination.joinpath("abc.m4a").write_bytes(b"audio")
+        self.destination.joinpath("abc.m4a.part").write_bytes(b"audio")
+
+        path = self.video.download_audio(self.destination, "native")
+
+        self.assertEqual(path, self.destination.joinpath("abc.m4a"))
+        mock_ydl.assert_not_called()
+
+    def test_unknown_format(self):
+        self.assertRaises(
+            ValueError, self.video.download_audio, self.destination, "aac"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
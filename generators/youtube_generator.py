@@ -6,22 +6,32 @@ import time
 from functools import lru_cache
 from pathlib import Path
 
-import googleapiclient.discovery
 from loguru import logger
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import TranscriptsDisabled
 
 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
-api_key = os.environ.get("GoogleAPI")
 
 # Youtube API constants
 api_service_name = "youtube"
 api_version = "v3"
 
-# Initialize the Youtube API
-youtube_api = googleapiclient.discovery.build(
-    api_service_name, api_version, developerKey=api_key
-)
+
+@lru_cache
+def youtube_api():
+    """
+    Youtube API client, built on the first request instead of at import
+
+    Returns:
+        youtube api resource
+    """
+
+    # the discovery client is slow to import, only the requests need it
+    import googleapiclient.discovery
+
+    return googleapiclient.discovery.build(
+        api_service_name, api_version, developerKey=os.environ.get("GoogleAPI")
+    )
 
 
 def videos_details_request(videos: list) -> dict:
@@ -36,8 +46,8 @@ def videos_details_request(videos: list) -> dict:
     """
 
     logger.info("Request videos details")
-    request = youtube_api.videos().list(
-        part="contentDetails,snippet", id=",".join(videos)
+    request = (
+        youtube_api().videos().list(part="contentDetails,snippet", id=",".join(videos))
     )
 
     return request.execute()
@@ -57,8 +67,10 @@ def categories_request(hl: str, region_code: str) -> dict:
     """
 
     logger.info("Request categories")
-    request = youtube_api.videoCategories().list(
-        part="snippet", hl=hl, regionCode=region_code
+    request = (
+        youtube_api()
+        .videoCategories()
+        .list(part="snippet", hl=hl, regionCode=region_code)
     )
 
     return request.execute()
@@ -106,11 +118,15 @@ def search_request(
     logger.info(
         f"Request search with args: part={part}, type={video_type}, videoCaption={caption} and {args}"
     )
-    request = youtube_api.search().list(
-        **args,
-        part=part,
-        type=video_type,
-        videoCaption=caption,
+    request = (
+        youtube_api()
+        .search()
+        .list(
+            **args,
+            part=part,
+            type=video_type,
+            videoCaption=caption,
+        )
     )
     response = request.execute()
     response["videoCategoryId"] = args["videoCategoryId"]
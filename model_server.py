@@ -0,0 +1,5 @@
+from src.server import ModelServer
+from youtube_runner import YouTubeTestRunner
+
+if __name__ == "__main__":
+    ModelServer.from_command_line(YouTubeTestRunner).serve_forever()
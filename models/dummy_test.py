@@ -1,6 +1,5 @@
 from pathlib import Path
 
-from src.differs import jiwer_differ
 from src.transcript_test import TranscriptTest
 
 
@@ -12,7 +11,6 @@ class DummyTest(TranscriptTest):
         self.model_name = model_name
         self.transcriber = lambda x: "This is a model for tests :)"
         self.normalizer = lambda x: x.lower()
-        self.differ = jiwer_differ
 
     def transcribe(self, audio_path: Path) -> str:
         return self.transcriber(audio_path)
@@ -21,6 +19,6 @@ class DummyTest(TranscriptTest):
         normalized_model = self.normalizer(model_transcript)
         normalized_target = self.normalizer(target_transcript)
 
-        differ_results = jiwer_differ(normalized_model, normalized_target)
+        differ_results = self.differ(normalized_model, normalized_target)
 
         return differ_results
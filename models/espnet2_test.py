@@ -1,15 +1,16 @@
 import argparse
-import os
-from pathlib import Path
+from typing import Optional
 
-import soundfile
+import numpy as np
 import torch
 from espnet2.bin.asr_inference import Speech2Text
 from espnet_model_zoo.downloader import ModelDownloader
-from pydub import AudioSegment
 from whisper.normalizers import EnglishTextNormalizer
 
-from src.differs import jiwer_differ
+from src.audio import Audio, load_audio, split_audio
+from src.comparator import Comparator
+from src.device import resolve_device
+from src.normalizers import MemoizedNormalizer, whisper_cache_name
 from src.transcript_test import TranscriptTest
 
 
@@ -18,62 +19,65 @@ class Espnet2Test(TranscriptTest):
     Test to evaluate the difference between the model transcript and the target transcript
     """
 
-    def __init__(self, model_name: str, language: str, gpu: int = 0, **kwargs):
+    def __init__(
+        self, model_name: str, language: str, gpu: Optional[int] = None, **kwargs
+    ):
         super().__init__(model_name, language, **kwargs)
         self.model_name = model_name
         self.language = language
 
+        self.device = resolve_device(self.device, gpu)
+
         downloader = ModelDownloader()
         # "Shinji Watanabe/librispeech_asr_train_asr_transformer_e18_raw_bpe_sp_valid.acc.best"
         self.model = Speech2Text(
-            **downloader.download_and_unpack(self.model_name), device=f"cuda:{gpu}"
+            **downloader.download_and_unpack(self.model_name), device=self.device
         )
 
-        self.normalizer = EnglishTextNormalizer()
+        self.normalizer = MemoizedNormalizer(
+            EnglishTextNormalizer(),
+            name=whisper_cache_name("whisper"),
+            cache_path=self.normalizer_cache,
+        )
         self.transcriber = self.model
-        self.differ = jiwer_differ
+        self.accepts_pcm = True
+
+    def additional_info(self) -> dict:
+        return {
+            "modelName": self.model_name,
+            "language": self.language,
+            "modelSettings": str(self.runtime_settings()),
+        }
+
+    def torch_modules(self) -> list[torch.nn.Module]:
+        # the decoder is called step by step by the beam search
+        return [self.model.asr_model.encoder]
 
-    def transcribe(self, audio_path: Path) -> str:
+    def transcribe(self, audio_path: Audio) -> str:
         """
         Transcribe the audio file by model and return the transcript
 
         Args:
-            audio_path: path to audio file
+            audio_path: path to audio file or decoded waveform
 
         Returns:
             Transcript
         """
-        # Load audio file
-        audio = AudioSegment.from_file(audio_path)
-        aduio = audio.set_channels(1)
-        audio = audio.set_frame_rate(16000)
+        # Load audio file, decoded as 16 kHz mono
+        audio = load_audio(audio_path)
 
         # Split audio into chunks to avoid memory issues
-        chunk_length_ms = 10 * 1000  # in milliseconds
-        chunks = [
-            audio[i : i + chunk_length_ms]
-            for i in range(0, len(audio), chunk_length_ms)
-        ]
+        chunks = split_audio(audio, chunk_length_s=10)
 
         # Transcribe each chunk
         transcripts = []
-        for i, chunk in enumerate(chunks):
-            # Save chunk to a temporary file
-            chunk_path = f"{audio_path.stem}_chunk{i}.wav"
-            chunk.export(chunk_path, format="wav")
-
-            # Load chunk
-            audio, _ = soundfile.read(chunk_path)
-
-            # Transcribe chunk
-            nbests = self.transcriber(audio)
+        for chunk in chunks:
+            # Transcribe chunk, copied as the waveform can be a read-only memory map
+            nbests = self.transcriber(np.array(chunk))
             results, *_ = nbests[0]
 
             transcripts.append(results.lower())
 
-            # remove temporary file
-            os.remove(chunk_path)
-
         # Join transcripts
         transcript = " ".join(transcripts)
 
@@ -91,13 +95,17 @@ class Espnet2Test(TranscriptTest):
             dict with the results of the comparison
         """
 
-        normalized_model = self.normalizer(model_transcript)
-        normalized_target = self.normalizer(target_transcript)
+        return self.comparator()(model_transcript, target_transcript)
 
-        differ_results = jiwer_differ(normalized_model, normalized_target)
-        differ_results["detectedLanguage"] = self.language
+    def comparator(self) -> Comparator:
+        """
+        Comparator doing the same as compare, without the model
+
+        Returns:
+            comparator of the test
+        """
 
-        return differ_results
+        return Comparator(self.normalizer, self.differ, detectedLanguage=self.language)
 
     @staticmethod
     def subparser(subparser: argparse.ArgumentParser):
@@ -116,16 +124,14 @@ class Espnet2Test(TranscriptTest):
             required=True,
         )
 
-        gpus = torch.cuda.device_count()
-
         subparser.add_argument(
             "-g",
             "--gpu",
             type=int,
             dest="gpu",
-            choices=range(gpus),
-            default=0,
-            help=f"GPU to use (default: 0, max: {gpus - 1})",
+            default=None,
+            required=False,
+            help="Deprecated, same as --device cuda:GPU",
         )
 
         subparser.add_argument(
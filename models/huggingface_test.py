@@ -1,11 +1,19 @@
 import argparse
 from pathlib import Path
+from typing import Iterator, Optional
 
+import numpy as np
 import torch
+from loguru import logger
+from transformers import AutoConfig
 from transformers.pipelines import pipeline
 from whisper.normalizers import EnglishTextNormalizer
 
-from src.differs import jiwer_differ
+from src.audio import SAMPLE_RATE, Audio, load_audio
+from src.comparator import Comparator
+from src.device import resolve_device
+from src.normalizers import MemoizedNormalizer, whisper_cache_name
+from src.pipeline import prefetch
 from src.transcript_test import TranscriptTest
 
 
@@ -23,7 +31,10 @@ class HuggingfaceTest(TranscriptTest):
         tokenizer: str = None,
         feature_extractor: str = None,
         decoder: str = None,
-        gpu: int = 0,
+        gpu: Optional[int] = None,
+        num_workers: int = 1,
+        backend: str = "torch",
+        onnx_path: Optional[str] = None,
         **kwargs,
     ):
         super().__init__(model_name, language, **kwargs)
@@ -34,17 +45,40 @@ class HuggingfaceTest(TranscriptTest):
         self.tokenizer = tokenizer
         self.feature_extractor = feature_extractor
         self.decoder = decoder
+        self.num_workers = num_workers
+        self.backend = backend
+        self.onnx_path = onnx_path
+
+        self.device = resolve_device(self.device, gpu)
+
+        model = model_name
+        if self.backend == "onnx":
+            if torch.device(self.device).type != "cpu":
+                raise ValueError(
+                    f"onnx backend is supported only on cpu, got {self.device}"
+                )
+            model = load_onnx_model(
+                model_name, onnx_path, self.intra_op_threads, self.inter_op_threads
+            )
+
+            # the pipeline can not guess them from the ONNX Runtime model
+            tokenizer = tokenizer or model_name
+            feature_extractor = feature_extractor or model_name
 
         self.model = pipeline(
             "automatic-speech-recognition",
-            model=model_name,
+            model=model,
             tokenizer=tokenizer,
             feature_extractor=feature_extractor,
-            device=gpu,
+            device=self.device,
         )
         self.transcriber = self.model
-        self.normalizer = EnglishTextNormalizer()
-        self.differ = jiwer_differ
+        self.normalizer = MemoizedNormalizer(
+            EnglishTextNormalizer(),
+            name=whisper_cache_name("whisper"),
+            cache_path=self.normalizer_cache,
+        )
+        self.accepts_pcm = True
 
     def additional_info(self) -> dict:
         model_settings = {
@@ -53,6 +87,9 @@ class HuggingfaceTest(TranscriptTest):
             "tokenizer": self.tokenizer,
             "feature_extractor": self.feature_extractor,
             "decoder": self.decoder,
+            "batch_size": self.batch_size,
+            "backend": self.backend,
+            **self.runtime_settings(),
         }
 
         return {
@@ -61,21 +98,69 @@ class HuggingfaceTest(TranscriptTest):
             "modelSettings": str(model_settings),
         }
 
-    def transcribe(self, audio_path: Path) -> str:
+    def output_settings(self) -> dict:
+        return {
+            **super().output_settings(),
+            "chunk_length_s": self.chunk_length_s,
+            "stride_length_s": self.stride_length_s,
+            "tokenizer": self.tokenizer,
+            "feature_extractor": self.feature_extractor,
+            "decoder": self.decoder,
+            "backend": self.backend,
+        }
+
+    def torch_modules(self) -> list[torch.nn.Module]:
+        # the ONNX Runtime model is not a torch module
+        return [self.model.model] if self.backend == "torch" else []
+
+    def transcribe(self, audio_path: Audio) -> str:
         """
         Transcribe the audio file by model and return the transcript
 
         Args:
-            audio_path: path to audio file
+            audio_path: path to audio file or decoded waveform
 
         Returns:
             Transcript
         """
-        return self.model(
-            str(audio_path),
+        return self.transcribe_batch([audio_path])[0]
+
+    def transcribe_batch(self, audio_paths: list[Audio]) -> list[str]:
+        """
+        Transcribe the audio files by model, the decoded audio files are streamed
+        into the pipeline, which infers the chunks of consecutive audio files
+        together in batches of batch_size
+
+        Args:
+            audio_paths: paths to audio files or decoded waveforms
+
+        Returns:
+            Transcripts in the order of the audio files
+        """
+        outputs = self.model(
+            self._stream(audio_paths),
             chunk_length_s=self.chunk_length_s,
             stride_length_s=self.stride_length_s,
-        )["text"]
+            batch_size=self.batch_size,
+        )
+
+        return [output["text"] for output in outputs]
+
+    def _stream(self, audio_paths: list[Audio]) -> Iterator[dict]:
+        # decode the upcoming audio files in num_workers threads while the pipeline
+        # infers the current ones, the pipeline itself keeps its default num_workers
+        # as it does not support more than one worker for chunked inputs
+        if self.num_workers < 1:
+            yield from map(self._pipeline_input, audio_paths)
+            return
+
+        for _, future in prefetch(self._pipeline_input, audio_paths, self.num_workers):
+            yield future.result()
+
+    @staticmethod
+    def _pipeline_input(audio_path: Audio) -> dict:
+        # the waveform is copied as the memory-mapped or decoded one is read-only
+        return {"raw": np.array(load_audio(audio_path)), "sampling_rate": SAMPLE_RATE}
 
     def compare(self, model_transcript, target_transcript) -> dict:
         """
@@ -89,13 +174,17 @@ class HuggingfaceTest(TranscriptTest):
             dict with the results of the comparison
         """
 
-        normalized_model = self.normalizer(model_transcript)
-        normalized_target = self.normalizer(target_transcript)
+        return self.comparator()(model_transcript, target_transcript)
 
-        differ_results = jiwer_differ(normalized_model, normalized_target)
-        differ_results["detectedLanguage"] = self.language
+    def comparator(self) -> Comparator:
+        """
+        Comparator doing the same as compare, without the model
 
-        return differ_results
+        Returns:
+            comparator of the test
+        """
+
+        return Comparator(self.normalizer, self.differ, detectedLanguage=self.language)
 
     @staticmethod
     def subparser(subparser: argparse.ArgumentParser):
@@ -168,13 +257,98 @@ class HuggingfaceTest(TranscriptTest):
             help=f"Decoder file",
         )
 
-        gpus = torch.cuda.device_count()
+        subparser.add_argument(
+            "--num-workers",
+            type=int,
+            dest="num_workers",
+            default=1,
+            required=False,
+            help=f"Threads decoding the audio ahead of the pipeline, 0 decodes "
+            f"the audio inline (default: 1)",
+        )
+
+        subparser.add_argument(
+            "--backend",
+            type=str,
+            dest="backend",
+            choices=["torch", "onnx"],
+            default="torch",
+            required=False,
+            help="Run the model with torch or with ONNX Runtime on cpu (default: torch)",
+        )
+
+        subparser.add_argument(
+            "--onnx-path",
+            type=str,
+            dest="onnx_path",
+            default=None,
+            required=False,
+            help="Directory of the exported ONNX model, the model is exported "
+            "there if it does not exist (default: None, export on every run)",
+        )
+
         subparser.add_argument(
             "-g",
             "--gpu",
             type=int,
             dest="gpu",
-            choices=range(gpus),
-            default=0,
-            help=f"GPU to use (default: 0, max: {gpus - 1})",
+            default=None,
+            required=False,
+            help="Deprecated, same as --device cuda:GPU",
         )
+
+
+def load_onnx_model(
+    model_name: str,
+    onnx_path: Optional[str] = None,
+    intra_op_threads: Optional[int] = None,
+    inter_op_threads: Optional[int] = None,
+):
+    """
+    Load the model exported to ONNX for ONNX Runtime, the model is exported
+    from the transformers checkpoint if it was not exported before
+
+    Args:
+        model_name: name or path of the transformers model
+        onnx_path: directory of the exported model
+        intra_op_threads: threads used by ONNX Runtime inside a single operation
+        inter_op_threads: threads used by ONNX Runtime to run independent operations
+
+    Returns:
+        ONNX Runtime model usable by the transformers pipeline
+    """
+
+    try:
+        from onnxruntime import SessionOptions
+        from optimum.onnxruntime import ORTModelForCTC, ORTModelForSpeechSeq2Seq
+    except ImportError as e:
+        raise ImportError(
+            "onnx backend requires optimum with onnxruntime, "
+            "install it with: pip install optimum[onnxruntime]"
+        ) from e
+
+    config = AutoConfig.from_pretrained(model_name)
+    model_cls = (
+        ORTModelForSpeechSeq2Seq if config.is_encoder_decoder else ORTModelForCTC
+    )
+
+    # the torch thread settings do not apply to ONNX Runtime sessions
+    session_options = SessionOptions()
+    if intra_op_threads is not None:
+        session_options.intra_op_num_threads = intra_op_threads
+    if inter_op_threads is not None:
+        session_options.inter_op_num_threads = inter_op_threads
+
+    if onnx_path is not None and Path(onnx_path).exists():
+        logger.info(f"Loading ONNX model - {onnx_path}")
+        return model_cls.from_pretrained(onnx_path, session_options=session_options)
+
+    logger.info(f"Exporting {model_name} to ONNX")
+    model = model_cls.from_pretrained(
+        model_name, export=True, session_options=session_options
+    )
+
+    if onnx_path is not None:
+        model.save_pretrained(onnx_path)
+
+    return model
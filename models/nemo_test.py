@@ -1,13 +1,15 @@
 import argparse
-import os
-from pathlib import Path
+from typing import Optional
 
 import nemo.collections.asr as nemo_asr
+import numpy as np
 import torch
-from pydub import AudioSegment
 from whisper.normalizers import EnglishTextNormalizer
 
-from src.differs import jiwer_differ
+from src.audio import Audio, load_audio, split_audio
+from src.comparator import Comparator
+from src.device import resolve_device
+from src.normalizers import MemoizedNormalizer, whisper_cache_name
 from src.transcript_test import TranscriptTest
 
 
@@ -21,7 +23,7 @@ class NemoTest(TranscriptTest):
         model_name: str,
         model_class: str,
         language: str = None,
-        gpu: int = 0,
+        gpu: Optional[int] = None,
         **kwargs,
     ):
         super().__init__(model_name, language, **kwargs)
@@ -29,63 +31,93 @@ class NemoTest(TranscriptTest):
         self.model_class = model_class
         self.language = language
 
+        self.device = resolve_device(self.device, gpu)
+
         model_cls = nemo_asr.models
         self.model = getattr(model_cls, model_class).from_pretrained(
-            model_name, map_location=torch.device(f"cuda:{gpu}")
+            model_name, map_location=torch.device(self.device)
         )
         self.model.transcribe
 
-        self.model_settings = {"channel_selector": "average", "batch_size": 1}
+        self.model_settings = {
+            "channel_selector": "average",
+            "batch_size": self.batch_size,
+        }
 
-        self.normalizer = EnglishTextNormalizer()
+        self.normalizer = MemoizedNormalizer(
+            EnglishTextNormalizer(),
+            name=whisper_cache_name("whisper"),
+            cache_path=self.normalizer_cache,
+        )
         self.transcriber = self.model.transcribe
-        self.differ = jiwer_differ
+        self.accepts_pcm = True
 
     def additional_info(self) -> dict:
         return {
             "modelName": f"{self.model_name} ({self.model_class})",
             "language": self.language,
-            "modelSettings": str(self.model_settings),
+            "modelSettings": str({**self.model_settings, **self.runtime_settings()}),
+        }
+
+    def output_settings(self) -> dict:
+        return {
+            **super().output_settings(),
+            "modelClass": self.model_class,
+            "channel_selector": self.model_settings["channel_selector"],
         }
 
-    def transcribe(self, audio_path: Path) -> str:
+    def torch_modules(self) -> list[torch.nn.Module]:
+        return [self.model]
+
+    def transcribe(self, audio_path: Audio) -> str:
         """
         Transcribe the audio file by model and return the transcript
 
         Args:
-            audio_path: path to audio file
+            audio_path: path to audio file or decoded waveform
 
         Returns:
             Transcript
         """
-        # Load audio file
-        audio = AudioSegment.from_file(audio_path)
+        return self.transcribe_batch([audio_path])[0]
 
-        # Split audio into chunks to avoid memory issues
-        chunk_length_ms = 240 * 1000  # in milliseconds
-        chunks = [
-            audio[i : i + chunk_length_ms]
-            for i in range(0, len(audio), chunk_length_ms)
-        ]
+    def transcribe_batch(self, audio_paths: list[Audio]) -> list[str]:
+        """
+        Transcribe the audio files by model, the chunks of all audio files
+        are passed to the model at once and inferred in batches of batch_size
 
-        # Transcribe each chunk
-        transcripts = []
-        for i, chunk in enumerate(chunks):
-            # Save chunk to a temporary file
-            chunk_path = f"{audio_path.stem}_chunk{i}.wav"
-            chunk.export(chunk_path, format="wav")
+        Args:
+            audio_paths: paths to audio files or decoded waveforms
 
-            # Transcribe chunk
-            results = self.transcriber([str(chunk_path)], **self.model_settings)
-            transcripts.append(results[0][0])
+        Returns:
+            Transcripts in the order of the audio files
+        """
+        chunks = []
+        owners = []
+        for n, audio_path in enumerate(audio_paths):
+            # Load audio file, decoded as 16 kHz mono
+            audio = load_audio(audio_path)
 
-            # remove temporary file
-            os.remove(chunk_path)
+            # Split audio into chunks to avoid memory issues, copied
+            # as the waveform can be a read-only memory map
+            for chunk in split_audio(audio, chunk_length_s=240):
+                chunks.append(np.array(chunk))
+                owners.append(n)
 
-        # Join transcripts
-        transcript = " ".join(transcripts)
+        results = self.transcriber(chunks, **self.model_settings)
 
-        return transcript
+        # a missing transcript would shift the transcripts of the other audio files
+        if len(results[0]) != len(chunks):
+            raise ValueError(
+                f"Model returned {len(results[0])} transcripts for {len(chunks)} chunks"
+            )
+
+        # Join the transcripts of the chunks of every audio file
+        transcripts = [[] for _ in audio_paths]
+        for n, text in zip(owners, results[0]):
+            transcripts[n].append(text)
+
+        return [" ".join(texts) for texts in transcripts]
 
     def compare(self, model_transcript, target_transcript) -> dict:
         """
@@ -99,14 +131,22 @@ class NemoTest(TranscriptTest):
             dict with the results of the comparison
         """
 
-        normalized_model = self.normalizer(model_transcript)
-        normalized_target = self.normalizer(target_transcript)
+        return self.comparator()(model_transcript, target_transcript)
 
-        differ_results = jiwer_differ(normalized_model, normalized_target)
-        differ_results["detectedLanguage"] = self.language
-        differ_results["model_name"] = self.model_name
+    def comparator(self) -> Comparator:
+        """
+        Comparator doing the same as compare, without the model
+
+        Returns:
+            comparator of the test
+        """
 
-        return differ_results
+        return Comparator(
+            self.normalizer,
+            self.differ,
+            detectedLanguage=self.language,
+            model_name=self.model_name,
+        )
 
     @staticmethod
     def subparser(subparser: argparse.ArgumentParser):
@@ -139,14 +179,12 @@ class NemoTest(TranscriptTest):
             help=f"Model language (default: None)",
         )
 
-        gpus = torch.cuda.device_count()
-
         subparser.add_argument(
             "-g",
             "--gpu",
             type=int,
             dest="gpu",
-            choices=range(gpus),
-            default=0,
-            help=f"GPU to use (default: 0, max: {gpus - 1})",
+            default=None,
+            required=False,
+            help="Deprecated, same as --device cuda:GPU",
         )
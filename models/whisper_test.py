@@ -1,12 +1,15 @@
 import argparse
-from pathlib import Path
+from typing import Optional
 
 import numpy as np
 import torch
 import whisper
 from whisper.normalizers import EnglishTextNormalizer
 
-from src.differs import jiwer_differ
+from src.audio import Audio
+from src.comparator import Comparator
+from src.device import resolve_device
+from src.normalizers import MemoizedNormalizer, whisper_cache_name
 from src.transcript_test import TranscriptTest
 
 
@@ -15,29 +18,71 @@ class WhisperTest(TranscriptTest):
     Test to evaluate the difference between the model transcript and the target transcript
     """
 
-    def __init__(self, model_name: str, language: str = None, gpu: int = 0, **kwargs):
+    def __init__(
+        self,
+        model_name: str,
+        language: str = None,
+        gpu: Optional[int] = None,
+        quantize: Optional[str] = None,
+        **kwargs,
+    ):
         super().__init__(model_name, language, **kwargs)
         self.model_name = model_name
         self.language = language
-        self.model = whisper.load_model(model_name, device=torch.device(f"cuda:{gpu}"))
-
-        self.normalizer = EnglishTextNormalizer()
+        self.quantize = quantize
+        self.device = resolve_device(self.device, gpu)
+        self.model = whisper.load_model(model_name, device=torch.device(self.device))
+
+        if self.quantize == "int8":
+            if torch.device(self.device).type != "cpu":
+                raise ValueError(
+                    f"int8 quantization is supported only on cpu, got {self.device}"
+                )
+            self.model = quantize_int8(self.model)
+
+        self.normalizer = MemoizedNormalizer(
+            EnglishTextNormalizer(),
+            name=whisper_cache_name("whisper"),
+            cache_path=self.normalizer_cache,
+        )
         self.transcriber = self.model.transcribe
-        self.differ = jiwer_differ
+        self.accepts_pcm = True
+
+    def additional_info(self) -> dict:
+        return {
+            "modelName": self.model_name,
+            "language": self.language,
+            "modelSettings": str(
+                {"quantize": self.quantize, **self.runtime_settings()}
+            ),
+        }
+
+    def output_settings(self) -> dict:
+        return {**super().output_settings(), "quantize": self.quantize}
 
-    def transcribe(self, audio_path: Path) -> str:
+    def torch_modules(self) -> list[torch.nn.Module]:
+        return [self.model.encoder, self.model.decoder]
+
+    def transcribe(self, audio_path: Audio) -> str:
         """
         Transcribe the audio file by model and return the transcript
 
         Args:
-            audio_path: path to audio file
+            audio_path: path to audio file or decoded waveform
 
         Returns:
             Transcript
         """
 
+        # torch can not share memory with a read-only memory-mapped waveform
+        audio = (
+            np.array(audio_path)
+            if isinstance(audio_path, np.ndarray)
+            else str(audio_path)
+        )
+
         results = self.transcriber(
-            audio=str(audio_path),
+            audio=audio,
             verbose=False,
             language=self.language,
             fp16=False,
@@ -57,13 +102,17 @@ class WhisperTest(TranscriptTest):
             dict with the results of the comparison
         """
 
-        normalized_model = self.normalizer(model_transcript)
-        normalized_target = self.normalizer(target_transcript)
+        return self.comparator()(model_transcript, target_transcript)
 
-        differ_results = jiwer_differ(normalized_model, normalized_target)
-        differ_results["detectedLanguage"] = self.language
+    def comparator(self) -> Comparator:
+        """
+        Comparator doing the same as compare, without the model
+
+        Returns:
+            comparator of the test
+        """
 
-        return differ_results
+        return Comparator(self.normalizer, self.differ, detectedLanguage=self.language)
 
     @staticmethod
     def subparser(subparser: argparse.ArgumentParser):
@@ -82,16 +131,26 @@ class WhisperTest(TranscriptTest):
             required=True,
         )
 
-        gpus = torch.cuda.device_count()
-
         subparser.add_argument(
             "-g",
             "--gpu",
             type=int,
             dest="gpu",
-            choices=range(gpus),
-            default=0,
-            help=f"GPU to use (default: 0, max: {gpus - 1})",
+            default=None,
+            required=False,
+            help="Deprecated, same as --device cuda:GPU",
+        )
+
+        subparser.add_argument(
+            "-q",
+            "--quantize",
+            type=str,
+            dest="quantize",
+            choices=["int8"],
+            default=None,
+            required=False,
+            help="Quantize the linear layers dynamically for the cpu inference "
+            "(default: None, fp32)",
         )
 
         subparser.add_argument(
@@ -103,3 +162,26 @@ class WhisperTest(TranscriptTest):
             required=False,
             help=f"Model language (default: None)",
         )
+
+
+def quantize_int8(model: whisper.Whisper) -> whisper.Whisper:
+    """
+    Quantize the linear layers of the model to int8, the activations are quantized
+    dynamically during the inference
+
+    Args:
+        model: whisper model on the cpu
+
+    Returns:
+        quantized model
+    """
+
+    # whisper uses its own subclass of Linear, which quantize_dynamic does not match,
+    # in fp32 it computes exactly the same as torch.nn.Linear
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            module.__class__ = torch.nn.Linear
+
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
@@ -0,0 +1,268 @@
+import argparse
+import json
+import os
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Optional
+
+import sqlalchemy as db
+from loguru import logger
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.comparator import Comparator, ComparePool
+from src.database import YouTubeBase
+from src.differs import DIFFERS, get_differ
+from src.normalizers import (
+    NORMALIZERS,
+    MemoizedNormalizer,
+    get_normalizer,
+    whisper_cache_name,
+)
+from src.utils import insert_youtube_result
+
+# keys of the results written by the differs, the other keys e.g. modelName are kept
+METRIC_KEYS = (
+    "wer",
+    "mer",
+    "wil",
+    "wip",
+    "hits",
+    "substitutions",
+    "deletions",
+    "insertions",
+    "ops",
+)
+
+
+def find_results(paths: list[Path]) -> list[Path]:
+    """
+    Find the result files, directories are searched for json files
+
+    Args:
+        paths: result files or directories
+
+    Returns:
+        paths to the result files
+    """
+
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.json")))
+        else:
+            files.append(path)
+
+    return files
+
+
+def rescore(
+    paths: list[Path],
+    output_dir: Path,
+    normalizer: str = "whisper",
+    differ: str = "jiwer",
+    jobs: Optional[int] = None,
+    session: Optional[Session] = None,
+    normalizer_cache: Optional[Path] = None,
+) -> list[Path]:
+    """
+    Recompute the metrics of saved results from their transcripts, without the models.
+    Only the videos saved with their transcripts (--save-transcript) can be rescored
+
+    Args:
+        paths: result files or directories with them
+        output_dir: directory for the rescored results
+        normalizer: name of the normalizer, see src/normalizers.py
+        differ: name of the differ, see src/differs.py
+        jobs: number of processes comparing the transcripts, number of CPUs if None
+        session: database session to save the rescored results to
+        normalizer_cache: sqlite file keeping the normalized transcripts, see
+            MemoizedNormalizer in src/normalizers.py
+
+    Returns:
+        paths to the rescored results
+    """
+
+    normalize = get_normalizer(normalizer)
+    if normalize is not None:
+        # the target transcripts are shared by the results of all models
+        normalize = MemoizedNormalizer(
+            normalize, whisper_cache_name(normalizer), normalizer_cache
+        )
+
+    comparator = Comparator(normalize, get_differ(differ))
+    files = find_results(paths)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    rescored = []
+    with ComparePool(comparator, jobs or os.cpu_count() or 1) as pool:
+        # submit the videos of all files first, so all processes are busy
+        testplans = []
+        for path in files:
+            with open(path, encoding="utf-8") as f:
+                testplan = json.load(f)
+            testplans.append((path, testplan, _submit(pool, path, testplan)))
+
+        for path, testplan, comparisons in testplans:
+            for video_details, comparison in comparisons:
+                _update(video_details, comparison)
+
+            testplan["rescore"] = {
+                "source": path.name,
+                "normalizer": normalizer,
+                "differ": differ,
+            }
+
+            filename = f"{path.stem}_{normalizer}_{differ}.json"
+            output_path = output_dir.joinpath(filename)
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(testplan, f, ensure_ascii=False)
+
+            logger.info(
+                f"Rescored {len(comparisons)}/{len(testplan['items'])} videos "
+                f"- {output_path}"
+            )
+
+            if session is not None and not insert_youtube_result(
+                session, filename, testplan
+            ):
+                logger.warning(f"Failed to save {filename} to database")
+
+            rescored.append(output_path)
+
+    return rescored
+
+
+def _submit(
+    pool: ComparePool, path: Path, testplan: dict[str, Any]
+) -> list[tuple[dict, Future]]:
+    comparisons = []
+    skipped = 0
+
+    for video_details in testplan["items"]:
+        if "modelTranscript" not in video_details:
+            skipped += 1
+            continue
+
+        comparison = pool.submit(
+            video_details["modelTranscript"], video_details["targetTranscript"]
+        )
+        comparisons.append((video_details, comparison))
+
+    if skipped:
+        logger.warning(f"{skipped} videos of {path} have no transcripts, not rescored")
+
+    return comparisons
+
+
+def _update(video_details: dict, comparison: Future) -> None:
+    try:
+        results = comparison.result()
+    except ValueError as e:
+        logger.warning(
+            f"Skipping the video {video_details['videoId']}, ValueError (compare): {e}"
+        )
+        video_details.pop("results", None)
+        video_details["error"] = f"ValueError (compare): {e}"
+        return
+
+    # keep the information about the model stored with the old metrics
+    previous = video_details.get("results", {})
+    video_details["results"] = {
+        **{key: value for key, value in previous.items() if key not in METRIC_KEYS},
+        **results,
+    }
+    video_details.pop("error", None)
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="Rescore",
+        description="Recompute the metrics of saved results from their transcripts",
+    )
+
+    parser.add_argument(
+        "results",
+        type=Path,
+        nargs="+",
+        help="Result files or directories with them, saved with --save-transcript",
+    )
+
+    parser.add_argument(
+        "-n",
+        "--normalizer",
+        required=False,
+        type=str,
+        choices=list(NORMALIZERS),
+        default="whisper",
+        help="Normalizer of the transcripts (default: whisper)",
+    )
+
+    parser.add_argument(
+        "-d",
+        "--differ",
+        required=False,
+        type=str,
+        choices=list(DIFFERS),
+        default="jiwer",
+        help="Differ calculating the metrics (default: jiwer)",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        required=False,
+        type=int,
+        default=None,
+        help="Number of processes comparing the transcripts (default: number of CPUs)",
+    )
+
+    parser.add_argument(
+        "--normalizer-cache",
+        required=False,
+        type=Path,
+        default=None,
+        dest="normalizer_cache",
+        help="SQLite file keeping the normalized transcripts between the runs "
+        "(default: None, only in memory)",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=False,
+        type=Path,
+        default=Path("./output/rescored"),
+        dest="output_dir",
+    )
+
+    parser.add_argument(
+        "-db",
+        "--save-to-database",
+        required=False,
+        action="store_true",
+        default=False,
+        dest="save_to_database",
+        help="Save the rescored results to the database",
+    )
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = parser().parse_args()
+
+    session = None
+    if args.save_to_database:
+        engine = db.create_engine(f"sqlite:///youtube.sqlite")
+        YouTubeBase.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+
+    rescore(
+        args.results,
+        args.output_dir,
+        args.normalizer,
+        args.differ,
+        args.jobs,
+        session,
+        args.normalizer_cache,
+    )
@@ -0,0 +1,76 @@
+import re
+from typing import Iterator, Sequence
+
+from rapidfuzz.distance import Levenshtein
+
+# operations of the compact alignment, e.g. "12=1S3=2I1D"
+EQUAL = "="
+SUBSTITUTE = "S"
+DELETE = "D"
+INSERT = "I"
+
+_OPERATIONS = {
+    "equal": EQUAL,
+    "replace": SUBSTITUTE,
+    "delete": DELETE,
+    "insert": INSERT,
+}
+_RUN = re.compile(r"(\d+)([=SDI])")
+
+
+def align(truth: Sequence[int], hypothesis: Sequence[int]) -> list[tuple[str, int]]:
+    """
+    Align the word ids of the truth and the hypothesis, same alignment as in jiwer.
+    rapidfuzz splits the long transcripts in half (Hirschberg) until the bit matrix
+    of a part fits in 1 MiB, so the memory is linear in the length of the transcripts
+
+    Args:
+        truth: word ids of the reference
+        hypothesis: word ids of the hypothesis
+
+    Returns:
+        runs of the operations turning the truth into the hypothesis,
+        as (operation, length) tuples
+    """
+
+    runs = []
+    for opcode in Levenshtein.opcodes(truth, hypothesis):
+        truth_length = opcode.src_end - opcode.src_start
+        hypothesis_length = opcode.dest_end - opcode.dest_start
+        runs.append((_OPERATIONS[opcode.tag], max(truth_length, hypothesis_length)))
+
+    return runs
+
+
+def encode_ops(runs: list[tuple[str, int]]) -> str:
+    """
+    Encode the runs of the operations into the compact string form
+
+    Args:
+        runs: runs returned by align
+
+    Returns:
+        runs as a string e.g. "12=1S3=2I1D"
+    """
+
+    return "".join(f"{length}{operation}" for operation, length in runs)
+
+
+def decode_ops(ops: str) -> Iterator[tuple[str, int, int]]:
+    """
+    Expand the compact string form into the single operations
+
+    Args:
+        ops: runs encoded by encode_ops
+
+    Returns:
+        operation, index in the truth and index in the hypothesis for every word
+    """
+
+    truth_index = hypothesis_index = 0
+
+    for length, operation in _RUN.findall(ops):
+        for _ in range(int(length)):
+            yield operation, truth_index, hypothesis_index
+            truth_index += operation != INSERT
+            hypothesis_index += operation != DELETE
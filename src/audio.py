@@ -0,0 +1,84 @@
+import subprocess
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+# sample rate expected by the models, all decoded audio is 16 kHz mono float32
+SAMPLE_RATE = 16000
+
+Audio = Union[str, Path, np.ndarray]
+
+
+def decode_audio(path: Union[str, Path], sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode the audio file with ffmpeg, downmixing and resampling it on the way
+
+    Args:
+        path: path to the audio file
+        sample_rate: sample rate of the decoded audio
+
+    Returns:
+        mono float32 waveform in range [-1, 1]
+    """
+
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads",
+        "0",
+        "-i",
+        str(path),
+        "-f",
+        "f32le",
+        "-ac",
+        "1",
+        "-acodec",
+        "pcm_f32le",
+        "-ar",
+        str(sample_rate),
+        "-",
+    ]
+
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"Failed to decode audio {path}: {e.stderr.decode()}") from e
+
+    return np.frombuffer(out, np.float32)
+
+
+def load_audio(audio: Audio) -> np.ndarray:
+    """
+    Get the waveform of the audio, decoding it if a path is given
+
+    Args:
+        audio: path to the audio file or already decoded waveform
+
+    Returns:
+        mono float32 waveform sampled at SAMPLE_RATE
+    """
+
+    if isinstance(audio, np.ndarray):
+        return audio
+
+    return decode_audio(audio)
+
+
+def split_audio(waveform: np.ndarray, chunk_length_s: float) -> list[np.ndarray]:
+    """
+    Split the waveform into chunks without copying it
+
+    Args:
+        waveform: waveform sampled at SAMPLE_RATE
+        chunk_length_s: length of the chunks in seconds, the last one can be shorter
+
+    Returns:
+        list of views of the waveform
+    """
+
+    chunk_length = int(chunk_length_s * SAMPLE_RATE)
+
+    return [
+        waveform[i : i + chunk_length] for i in range(0, len(waveform), chunk_length)
+    ]
@@ -0,0 +1,5 @@
+from .audio import AudioCache
+from .model_output import ModelOutputCache, file_digest
+from .normalization import NormalizationCache
+from .pcm import PcmCache
+from .transcript import TranscriptCache
@@ -0,0 +1,296 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+class AudioCache:
+    """
+    Cache of downloaded audio files keyed by videoId and audio format.
+
+    The files are tracked in an index file next to them and the least recently used
+    files are removed when the size of the cache exceeds the byte budget. The index
+    is guarded by a file lock, so the cache can be shared by worker processes.
+    The files in use are pinned in the index by the processes using them and a video
+    is downloaded by the process which claimed it first, the others wait for it.
+    """
+
+    INDEX_NAME = "index.json"
+    LOCK_NAME = "index.lock"
+
+    # seconds between the checks of a video downloaded by another process
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, directory: Path, max_size: int):
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+        # keys claimed by this process and not downloaded yet
+        self._downloading: set[str] = set()
+        self._lock = threading.RLock()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(video_id: str, audio_format: str) -> str:
+        return f"{video_id}.{audio_format}"
+
+    def get(self, video_id: str, audio_format: str) -> Optional[Path]:
+        """
+        Get the cached audio file and mark it as recently used
+
+        Args:
+            video_id: id of the video
+            audio_format: format of the audio
+
+        Returns:
+            path to the audio file or None if it is not cached
+        """
+
+        key = self.key(video_id, audio_format)
+
+        with self._locked_index() as index:
+            return self._lookup(index, key)
+
+    def put(self, video_id: str, audio_format: str, path: Path) -> Path:
+        """
+        Add the audio file stored in the cache directory to the index
+        and evict the least recently used files if the cache is too big
+
+        Args:
+            video_id: id of the video
+            audio_format: format of the audio
+            path: path to the audio file
+
+        Returns:
+            path to the audio file
+        """
+
+        path = Path(path)
+        if path.parent.resolve() != self.directory.resolve():
+            raise ValueError(
+                f"File {path} is not in the cache directory {self.directory}"
+            )
+
+        key = self.key(video_id, audio_format)
+
+        with self._locked_index() as index:
+            # the pins of the processes waiting for the download are kept
+            pins = index.get(key, {}).get("pins", {})
+            if key in self._downloading:
+                self._downloading.discard(key)
+            else:
+                _pin(pins)
+
+            index[key] = {
+                "file": path.name,
+                "size": path.stat().st_size,
+                "lastAccess": time.time(),
+                "pins": pins,
+            }
+            self._evict(index)
+
+        return path
+
+    def fetch(
+        self, video_id: str, audio_format: str, download: Callable[[Path], Path]
+    ) -> Path:
+        """
+        Get the audio file from the cache or download it into the cache
+
+        Args:
+            video_id: id of the video
+            audio_format: format of the audio
+            download: function downloading the audio into the given directory
+
+        Returns:
+            path to the audio file
+        """
+
+        key = self.key(video_id, audio_format)
+
+        while True:
+            with self._locked_index() as index:
+                if (path := self._lookup(index, key)) is not None:
+                    logger.info(
+                        f"Audio of the video {video_id} found in the cache - {path}"
+                    )
+                    return path
+
+                if self._claim(index, key):
+                    break
+
+            time.sleep(self.POLL_INTERVAL)
+
+        try:
+            path = download(self.directory)
+        except BaseException:
+            # let another process download the video
+            with self._locked_index() as index:
+                if index.get(key, {}).get("downloader") == os.getpid():
+                    index.pop(key)
+                self._downloading.discard(key)
+            raise
+
+        return self.put(video_id, audio_format, path)
+
+    def release(self, video_id: str, audio_format: str) -> None:
+        """
+        Allow the audio file to be evicted again
+
+        Args:
+            video_id: id of the video
+            audio_format: format of the audio
+        """
+
+        with self._locked_index() as index:
+            entry = index.get(self.key(video_id, audio_format))
+            if entry is not None:
+                _unpin(entry.setdefault("pins", {}))
+
+    def size(self) -> int:
+        """
+        Returns:
+            total size of the indexed files in bytes
+        """
+
+        with self._locked_index() as index:
+            return sum(entry["size"] for entry in index.values())
+
+    def _lookup(self, index: dict, key: str) -> Optional[Path]:
+        # the cached file pinned for this process, None if it is not downloaded yet
+        entry = index.get(key)
+        if entry is None or entry["file"] is None:
+            return None
+
+        path = self.directory.joinpath(entry["file"])
+        if not path.exists():
+            index.pop(key)
+            return None
+
+        entry["lastAccess"] = time.time()
+        _pin(entry.setdefault("pins", {}))
+        return path
+
+    def _claim(self, index: dict, key: str) -> bool:
+        # claim the download of the key, False if another download is in progress
+        entry = index.get(key)
+        if entry is not None:
+            downloader = entry.get("downloader")
+            if downloader == os.getpid() and key in self._downloading:
+                return False
+            if downloader != os.getpid() and _alive(downloader):
+                return False
+
+        # the entry of a process which ended during the download is replaced
+        pins = {}
+        _pin(pins)
+
+        index[key] = {
+            "file": None,
+            "size": 0,
+            "lastAccess": time.time(),
+            "pins": pins,
+            "downloader": os.getpid(),
+        }
+        self._downloading.add(key)
+        return True
+
+    def _evict(self, index: dict) -> None:
+        total = sum(entry["size"] for entry in index.values())
+
+        for key, entry in sorted(index.items(), key=lambda x: x[1]["lastAccess"]):
+            if total <= self.max_size:
+                break
+
+            if entry["file"] is None or _pinned(entry.get("pins", {})):
+                continue
+
+            logger.info(f"Evicting {entry['file']} from the audio cache")
+            self.directory.joinpath(entry["file"]).unlink(missing_ok=True)
+            total -= entry["size"]
+            index.pop(key)
+
+        if total > self.max_size:
+            logger.warning(
+                f"Audio cache exceeds its size limit ({total} > {self.max_size} bytes), "
+                f"all remaining files are in use"
+            )
+
+    @contextmanager
+    def _locked_index(self):
+        index_path = self.directory.joinpath(self.INDEX_NAME)
+
+        with self._lock, open(
+            self.directory.joinpath(self.LOCK_NAME), "a", encoding="utf-8"
+        ) as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            try:
+                index = {}
+                if index_path.exists():
+                    with open(index_path, encoding="utf-8") as f:
+                        index = json.load(f)
+
+                yield index
+
+                # write the index atomically, readers never see a partial file
+                tmp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(index, f, indent=4)
+                os.replace(tmp_path, index_path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _pin(pins: dict[str, int]) -> None:
+    pid = str(os.getpid())
+    pins[pid] = pins.get(pid, 0) + 1
+
+
+def _unpin(pins: dict[str, int]) -> None:
+    pid = str(os.getpid())
+    if pins.get(pid, 0) > 1:
+        pins[pid] -= 1
+    else:
+        pins.pop(pid, None)
+
+
+def _pinned(pins: dict[str, int]) -> bool:
+    # the pins of the processes which ended without releasing the files are dropped
+    for pid in list(pins):
+        if not _alive(int(pid)):
+            pins.pop(pid)
+
+    return bool(pins)
+
+
+def _alive(pid: Optional[int]) -> bool:
+    if pid is None:
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # os.kill terminates the process on Windows, the pins are kept
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
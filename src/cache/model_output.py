@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+
+from src.transcript_test import TranscriptTest
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    Calculate the sha256 digest of the file content
+
+    Args:
+        path: path to the file
+        chunk_size: size of the chunks read from the file
+
+    Returns:
+        hex digest of the file
+    """
+
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class ModelOutputCache:
+    """
+    Cache of the raw model outputs keyed by the audio content and the model configuration,
+    so the inference can be skipped when only the normalizer or the differ has changed
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    @staticmethod
+    def key(audio: Path, tester: TranscriptTest, digest: Optional[str] = None) -> str:
+        """
+        Create the key of the model output
+
+        Args:
+            audio: path to the transcribed audio
+            tester: tester which transcribes the audio
+            digest: sha256 digest of the audio if it is already known, see file_digest
+
+        Returns:
+            key of the model output
+        """
+
+        config = {
+            "audio": digest or file_digest(audio),
+            "tester": f"{type(tester).__module__}.{type(tester).__qualname__}",
+            "settings": tester.output_settings(),
+        }
+        config = json.dumps(config, sort_keys=True, default=str)
+
+        return hashlib.sha256(config.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        """
+        Get the cached model output
+
+        Args:
+            key: key of the model output
+
+        Returns:
+            model output with at least the "text" key or None if it is not cached
+        """
+
+        path = self._path(key)
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring corrupted model output {path}")
+            return None
+
+    def put(self, key: str, text: str, **extra: Any) -> None:
+        """
+        Store the model output
+
+        Args:
+            key: key of the model output
+            text: transcript returned by the model
+            extra: additional outputs of the model, e.g. segments
+        """
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"text": text, **extra}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _path(self, key: str) -> Path:
+        return self.directory.joinpath(key[:2], f"{key}.json")
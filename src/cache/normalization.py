@@ -0,0 +1,145 @@
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterable
+
+import sqlalchemy as db
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from src.database import CachedNormalization, CachedWord, NormalizationCacheBase
+from src.vocabulary import tokens_from_bytes, tokens_to_bytes
+
+# bound parameters per statement, below the limit of the older SQLite versions
+_CHUNK_SIZE = 500
+
+
+class NormalizationCache:
+    """
+    SQLite store of the normalized transcripts keyed by the normalizer and
+    the sha256 digest of the transcript before normalization. The transcripts are
+    stored as the ids of their words, the words are interned once for the whole file
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: path to the sqlite file
+        """
+
+        self.path = Path(path)
+        self._engine = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self) -> db.Engine:
+        # the database is created on the first use
+        with self._lock:
+            if self._engine is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._engine = db.create_engine(
+                    f"sqlite:///{self.path}",
+                    connect_args={"check_same_thread": False, "timeout": 30},
+                )
+                NormalizationCacheBase.metadata.create_all(self._engine)
+
+        return self._engine
+
+    def get_many(self, normalizer: str, digests: list[str]) -> dict[str, list[str]]:
+        """
+        Get the cached normalized transcripts
+
+        Args:
+            normalizer: name of the normalizer
+            digests: digests of the transcripts
+
+        Returns:
+            words of the normalized transcripts keyed by the digest,
+            the missing ones are left out
+        """
+
+        with Session(self.engine) as session:
+            entries = session.scalars(
+                db.select(CachedNormalization).where(
+                    CachedNormalization.normalizer == normalizer,
+                    CachedNormalization.digest.in_(digests),
+                )
+            )
+            tokens = {
+                entry.digest: tokens_from_bytes(zlib.decompress(entry.tokens))
+                for entry in entries
+            }
+
+            ids = {token for entry_tokens in tokens.values() for token in entry_tokens}
+            words = {}
+            for chunk in _chunks(ids):
+                words.update(
+                    session.execute(
+                        db.select(CachedWord.id, CachedWord.word).where(
+                            CachedWord.id.in_(chunk)
+                        )
+                    ).all()
+                )
+
+        return {
+            digest: [words[token] for token in entry_tokens]
+            for digest, entry_tokens in tokens.items()
+        }
+
+    def put_many(self, normalizer: str, transcripts: dict[str, list[str]]) -> None:
+        """
+        Store the normalized transcripts in the cache
+
+        Args:
+            normalizer: name of the normalizer
+            transcripts: words of the normalized transcripts keyed by the digest
+        """
+
+        words = {word for transcript in transcripts.values() for word in transcript}
+
+        with Session(self.engine) as session:
+            ids = self._intern(session, words)
+
+            for digest, transcript in transcripts.items():
+                tokens = tokens_to_bytes([ids[word] for word in transcript])
+                session.merge(
+                    CachedNormalization(
+                        normalizer=normalizer,
+                        digest=digest,
+                        tokens=zlib.compress(tokens),
+                    )
+                )
+            session.commit()
+
+    @staticmethod
+    def _intern(session: Session, words: set[str]) -> dict[str, int]:
+        # the other processes can add the same words, the existing ids are kept
+        ids = {}
+        for chunk in _chunks(words):
+            session.execute(
+                insert(CachedWord)
+                .values([{"word": word} for word in chunk])
+                .on_conflict_do_nothing(index_elements=["word"])
+            )
+            ids.update(
+                session.execute(
+                    db.select(CachedWord.word, CachedWord.id).where(
+                        CachedWord.word.in_(chunk)
+                    )
+                ).all()
+            )
+
+        return ids
+
+    def __getstate__(self) -> dict:
+        # the engine is created again in the process the cache is sent to
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"])
+
+
+def _chunks(values: Iterable) -> Iterable[list]:
+    values = list(values)
+    for start in range(0, len(values), _CHUNK_SIZE):
+        yield values[start : start + _CHUNK_SIZE]
@@ -0,0 +1,116 @@
+import os
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+from loguru import logger
+
+from src.audio import decode_audio
+from src.cache.model_output import file_digest
+
+
+class PcmCache:
+    """
+    Cache of decoded audio, every file is decoded once to 16 kHz mono float32
+    and stored as .npy, which is memory-mapped when it is loaded again.
+
+    The least recently used files are removed when the size of the cache exceeds
+    the byte budget, the modification time of a file is updated when it is loaded.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_size: Optional[int] = None,
+        decode: Callable[[Path], np.ndarray] = decode_audio,
+    ):
+        """
+        Args:
+            directory: directory of the decoded files
+            max_size: size limit of the cache in bytes, None for no limit
+            decode: function decoding the audio file
+        """
+
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self._decode = decode
+
+    def load(self, audio: Path, digest: Optional[str] = None) -> np.ndarray:
+        """
+        Get the decoded waveform of the audio file
+
+        Args:
+            audio: path to the audio file
+            digest: sha256 digest of the audio file if it is already known,
+                see file_digest
+
+        Returns:
+            read-only memory-mapped waveform
+        """
+
+        path = self.directory.joinpath(f"{digest or file_digest(audio)}.npy")
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            logger.info(f"Decoding {audio} into the PCM cache")
+            waveform = np.asarray(self._decode(audio), dtype=np.float32)
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, waveform)
+            os.replace(tmp_path, path)
+
+            self._evict(path)
+
+        return np.load(path, mmap_mode="r")
+
+    def size(self) -> int:
+        """
+        Returns:
+            total size of the decoded files in bytes
+        """
+
+        return sum(size for _, size, _ in self._files())
+
+    def _files(self) -> list[tuple[float, int, Path]]:
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".npy"):
+                continue
+
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+
+        return files
+
+    def _evict(self, keep: Path) -> None:
+        if self.max_size is None:
+            return
+
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+
+        for _, size, path in sorted(files):
+            if total <= self.max_size:
+                break
+
+            if path == keep:
+                continue
+
+            # the waveforms already loaded stay memory-mapped after the removal
+            logger.info(f"Evicting {path.name} from the PCM cache")
+            try:
+                path.unlink(missing_ok=True)
+            except PermissionError:
+                continue
+            total -= size
+
+        if total > self.max_size:
+            logger.warning(
+                f"PCM cache exceeds its size limit ({total} > {self.max_size} bytes)"
+            )
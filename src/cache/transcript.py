@@ -0,0 +1,94 @@
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+
+import sqlalchemy as db
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from src.database import CachedTranscript, TranscriptCacheBase
+
+
+class TranscriptCache:
+    """
+    SQLite store of the target transcripts keyed by videoId, language code and
+    the manually created/generated flag. Entries older than the TTL are fetched again.
+    """
+
+    def __init__(self, path: Path, ttl: float):
+        """
+        Args:
+            path: path to the sqlite file
+            ttl: time to live of the entries in seconds
+        """
+
+        self.path = Path(path)
+        self.ttl = ttl
+        self._engine = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self) -> db.Engine:
+        # the database is created on the first use
+        with self._lock:
+            if self._engine is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._engine = db.create_engine(
+                    f"sqlite:///{self.path}",
+                    connect_args={"check_same_thread": False, "timeout": 30},
+                )
+                TranscriptCacheBase.metadata.create_all(self._engine)
+
+        return self._engine
+
+    def get(self, video_id: str, language: str, generated: bool) -> Optional[str]:
+        """
+        Get the cached transcript
+
+        Args:
+            video_id: id of the video
+            language: language code of the transcript
+            generated: whether the transcript was generated
+
+        Returns:
+            transcript or None if it is not cached or it is expired
+        """
+
+        with Session(self.engine) as session:
+            entry = session.get(CachedTranscript, (video_id, language, generated))
+
+            if entry is None:
+                return None
+
+            if time.time() - entry.fetched_at > self.ttl:
+                logger.info(f"Cached transcript of the video {video_id} expired")
+                return None
+
+            return zlib.decompress(entry.transcript).decode("utf-8")
+
+    def put(
+        self, video_id: str, language: str, generated: bool, transcript: str
+    ) -> None:
+        """
+        Store the transcript in the cache
+
+        Args:
+            video_id: id of the video
+            language: language code of the transcript
+            generated: whether the transcript was generated
+            transcript: transcript to store
+        """
+
+        with Session(self.engine) as session:
+            session.merge(
+                CachedTranscript(
+                    video_id=video_id,
+                    language=language,
+                    generated=generated,
+                    transcript=zlib.compress(transcript.encode("utf-8")),
+                    fetched_at=time.time(),
+                )
+            )
+            session.commit()
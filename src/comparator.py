@@ -0,0 +1,127 @@
+import multiprocessing
+import pickle
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Optional
+
+from .differs import TOKEN_DIFFERS
+
+
+class Comparator:
+    """
+    Normalizes the transcripts and compares them with the differ, without the model.
+    Picklable if the normalizer and the differ are, so the comparisons can run in
+    worker processes while the model transcribes the next videos
+    """
+
+    def __init__(
+        self,
+        normalizer: Optional[Callable[[str], str]],
+        differ: Callable[[str, str], dict],
+        **fields,
+    ):
+        """
+        Args:
+            normalizer: function normalizing a transcript, None to compare them as they are
+            differ: function calculating the metrics, see src/differs.py
+            fields: added to the results of every comparison
+        """
+
+        self.normalizer = normalizer
+        self.differ = differ
+        self.fields = fields
+
+    def __call__(self, model_transcript: str, target_transcript: str) -> dict:
+        normalize_many = None
+        if self.differ in TOKEN_DIFFERS and hasattr(self.normalizer, "tokenize_many"):
+            # the words are split and interned once by the normalizer
+            normalize_many = self.normalizer.tokenize_many
+        elif hasattr(self.normalizer, "normalize_many"):
+            normalize_many = self.normalizer.normalize_many
+
+        if normalize_many is not None:
+            # only the target transcripts are shared by the models and runs
+            (model_transcript,) = normalize_many([model_transcript], persist=False)
+            (target_transcript,) = normalize_many([target_transcript])
+        elif self.normalizer is not None:
+            model_transcript = self.normalizer(model_transcript)
+            target_transcript = self.normalizer(target_transcript)
+
+        results = self.differ(model_transcript, target_transcript)
+        results.update(self.fields)
+        return results
+
+    def picklable(self) -> bool:
+        """
+        Check if the comparator can be sent to the worker processes
+
+        Returns:
+            True if the comparator can be pickled
+        """
+
+        try:
+            pickle.dumps(self)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+
+        return True
+
+
+class ComparePool:
+    """
+    Process pool running the comparisons, the comparator is sent to every worker
+    once when it starts, the tasks carry only the transcripts
+    """
+
+    def __init__(self, comparator: Comparator, workers: int):
+        """
+        Args:
+            comparator: comparator of the tester
+            workers: number of worker processes
+        """
+
+        # spawn, the workers must not inherit the model and the device context
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(comparator,),
+        )
+
+    def submit(self, model_transcript: str, target_transcript: str) -> Future:
+        """
+        Submit a comparison to the workers
+
+        Args:
+            model_transcript: transcript from the model
+            target_transcript: transcript from the target
+
+        Returns:
+            future of the results of the comparison
+        """
+
+        return self._executor.submit(_compare, model_transcript, target_transcript)
+
+    def shutdown(self) -> None:
+        """
+        Wait for the submitted comparisons and stop the workers
+        """
+
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "ComparePool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+
+_comparator: Optional[Comparator] = None
+
+
+def _init_worker(comparator: Comparator) -> None:
+    global _comparator
+    _comparator = comparator
+
+
+def _compare(model_transcript: str, target_transcript: str) -> dict:
+    return _comparator(model_transcript, target_transcript)
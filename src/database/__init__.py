@@ -1 +1,3 @@
+from .normalization_cache import CachedNormalization, CachedWord, NormalizationCacheBase
+from .transcript_cache import CachedTranscript, TranscriptCacheBase
 from .youtube import YouTubeBase
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, LargeBinary, String
+from sqlalchemy.orm import declarative_base
+
+NormalizationCacheBase = declarative_base()
+
+
+class CachedNormalization(NormalizationCacheBase):
+    __tablename__ = "normalized_tokens"
+
+    normalizer = Column(String, primary_key=True)
+
+    # sha256 hex digest of the transcript before normalization
+    digest = Column(String, primary_key=True)
+
+    # zlib compressed ids of the words, little-endian uint32, see CachedWord
+    tokens = Column(LargeBinary)
+
+
+class CachedWord(NormalizationCacheBase):
+    __tablename__ = "normalized_word"
+
+    id = Column(Integer, primary_key=True)
+    word = Column(String, unique=True, nullable=False)
@@ -0,0 +1,16 @@
+from sqlalchemy import Boolean, Column, Float, LargeBinary, String
+from sqlalchemy.orm import declarative_base
+
+TranscriptCacheBase = declarative_base()
+
+
+class CachedTranscript(TranscriptCacheBase):
+    __tablename__ = "youtube_transcript"
+
+    video_id = Column(String, primary_key=True)
+    language = Column(String, primary_key=True)
+    generated = Column(Boolean, primary_key=True)
+
+    # zlib compressed utf-8 transcript
+    transcript = Column(LargeBinary)
+    fetched_at = Column(Float)
@@ -1,12 +1,20 @@
 import dataclasses
+import glob
 import re
 from pathlib import Path
+from typing import Optional
 
 import yt_dlp as youtube_dl
 from loguru import logger
 from youtube_transcript_api import YouTubeTranscriptApi
 
-from src.normalizers import title_normalizer
+from src.audio import SAMPLE_RATE
+from src.cache import TranscriptCache
+
+AUDIO_FORMATS = ("mp3", "flac", "native")
+
+# extensions of the audio streams served by YouTube
+NATIVE_EXTENSIONS = ("webm", "opus", "m4a", "mp4", "ogg")
 
 
 @dataclasses.dataclass
@@ -32,42 +40,94 @@ class YouTubeVideo:
             Path to downloaded file
         """
 
-        title = title_normalizer(self.title)
+        return self.download_audio(destination, "mp3")
+
+    def download_audio(self, destination: Path, audio_format: str = "mp3") -> Path:
+        """
+        Download the audio of the video
+
+        Args:
+            destination: destination directory
+            audio_format: one of AUDIO_FORMATS, "mp3" transcodes the best audio stream
+                to 192 kbps mp3, "flac" to lossless 16 kHz mono flac and "native" keeps
+                the downloaded stream (usually opus or m4a) without transcoding
+
+        Returns:
+            Path to downloaded file
+        """
+
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(
+                f"Unknown audio format {audio_format}, expected one of {AUDIO_FORMATS}"
+            )
+
+        # videoId is unique, normalized titles of different videos can collide
+        filename = self.videoId
         url = f"https://www.youtube.com/watch?v={self.videoId}"
 
         logger.info(
-            f"Downloading... (videoId={self.videoId}) '{self.title}' as '{title}.mp3'"
+            f"Downloading... (videoId={self.videoId}) '{self.title}' as '{filename}' ({audio_format})"
         )
 
-        if destination.joinpath(f"{title}.mp3").exists():
-            logger.info(f"File '{title}.mp3' already exists, skipping download")
-            return destination.joinpath(f"{title}.mp3")
+        if (path := self._downloaded_audio(destination, audio_format)) is not None:
+            logger.info(f"File '{path.name}' already exists, skipping download")
+            return path
 
         ydl_opts = {
             "format": "bestaudio/best",
-            ""
-            "postprocessors": [
+            "outtmpl": f"{destination}/{filename}.%(ext)s",
+        }
+
+        if audio_format == "mp3":
+            ydl_opts["postprocessors"] = [
                 {
                     "key": "FFmpegExtractAudio",
                     "preferredcodec": "mp3",
                     "preferredquality": "192",
                 }
-            ],
-            "outtmpl": f"{destination}/{title}",
-        }
+            ]
+        elif audio_format == "flac":
+            # resample while extracting, the models decode it without resampling
+            ydl_opts["postprocessors"] = [
+                {"key": "FFmpegExtractAudio", "preferredcodec": "flac"}
+            ]
+            ydl_opts["postprocessor_args"] = {
+                "extractaudio": ["-ar", str(SAMPLE_RATE), "-ac", "1"]
+            }
 
         with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+            info = ydl.extract_info(url, download=True)
+
+        if audio_format == "native":
+            return Path(info["requested_downloads"][0]["filepath"])
+
+        return destination.joinpath(f"{filename}.{audio_format}")
+
+    def _downloaded_audio(self, destination: Path, audio_format: str) -> Optional[Path]:
+        if audio_format != "native":
+            path = destination.joinpath(f"{self.videoId}.{audio_format}")
+            return path if path.exists() else None
 
-        return destination.joinpath(f"{title}.mp3")
+        # the extension of the native stream is known only after the download
+        for path in destination.glob(f"{glob.escape(self.videoId)}.*"):
+            if path.suffix[1:] in NATIVE_EXTENSIONS:
+                return path
 
-    def youtube_transcript(self, language: str, generated: bool = False) -> str:
+        return None
+
+    def youtube_transcript(
+        self,
+        language: str,
+        generated: bool = False,
+        cache: Optional[TranscriptCache] = None,
+    ) -> str:
         """
         Download transcript from YouTube
 
         Args:
             language: language of transcript
             generated: if True, download generated transcript, otherwise manually created
+            cache: transcript cache consulted before YouTube is asked for the transcript
 
         Returns:
             Transcript as string
@@ -96,22 +156,37 @@ class YouTubeVideo:
 
             return matches[0]
 
+        # the language code is known from the testplan, no request is needed
+        if generated:
+            language = _find(self.generatedTranscripts)
+        else:
+            language = _find(self.manuallyCreatedTranscripts)
+
+        if cache is not None:
+            transcript = cache.get(self.videoId, language, generated)
+            if transcript is not None:
+                logger.info(f"Transcript {language} found in the cache")
+                return transcript
+
         transcripts = YouTubeTranscriptApi.list_transcripts(self.videoId)
 
         if generated:
-            language = _find(self.generatedTranscripts)
             srt = transcripts.find_generated_transcript(
                 language_codes=[language]
             ).fetch()
         else:
-            language = _find(self.manuallyCreatedTranscripts)
             srt = transcripts.find_manually_created_transcript(
                 language_codes=[language]
             ).fetch()
 
         logger.info(f"Downloaded transcript {language}")
 
-        return " ".join(fragment["text"] for fragment in srt)
+        transcript = " ".join(fragment["text"] for fragment in srt)
+
+        if cache is not None:
+            cache.put(self.videoId, language, generated, transcript)
+
+        return transcript
 
     @classmethod
     def from_dict(cls, data: dict) -> "YouTubeVideo":
@@ -0,0 +1,116 @@
+from contextlib import ExitStack, contextmanager
+from typing import Iterator, Optional
+
+from loguru import logger
+
+
+def resolve_device(device: Optional[str] = None, gpu: Optional[int] = None) -> str:
+    """
+    Resolve the torch device the model should run on
+
+    Args:
+        device: requested device e.g. cpu or cuda:1, takes precedence over the gpu
+        gpu: index of the requested GPU, kept for the old --gpu option
+
+    Returns:
+        device name, cuda:0 if nothing was requested and CUDA is available, otherwise cpu
+    """
+
+    import torch
+
+    if device is None:
+        if gpu is not None:
+            device = f"cuda:{gpu}"
+        else:
+            device = "cuda:0" if torch.cuda.is_available() else "cpu"
+    elif gpu is not None:
+        logger.warning(f"Both device {device} and GPU {gpu} given, using {device}")
+
+    try:
+        device_type = torch.device(device).type
+    except RuntimeError as e:
+        raise ValueError(f"Invalid device {device}: {e}") from e
+
+    if device_type == "cuda" and not torch.cuda.is_available():
+        raise ValueError(f"Device {device} requested, but CUDA is not available")
+
+    return device
+
+
+def configure_threads(
+    intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None
+) -> None:
+    """
+    Set the number of threads torch uses for the CPU inference
+
+    Args:
+        intra_op_threads: threads used inside a single operation, e.g. a matrix multiplication
+        inter_op_threads: threads used to run independent operations in parallel
+    """
+
+    import torch
+
+    if intra_op_threads is not None:
+        torch.set_num_threads(intra_op_threads)
+
+    if inter_op_threads is not None:
+        # can be set only once and before any parallel work has started
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            logger.warning(f"Failed to set the inter-op threads: {e}")
+
+    logger.info(
+        f"Torch threads: {torch.get_num_threads()} intra-op, "
+        f"{torch.get_num_interop_threads()} inter-op"
+    )
+
+
+@contextmanager
+def inference_context(
+    device: Optional[str] = None,
+    inference_mode: bool = False,
+    autocast: Optional[str] = None,
+) -> Iterator[None]:
+    """
+    Run the inference with autograd disabled and/or with autocast to reduced precision
+
+    Args:
+        device: device the model runs on, cpu if None
+        inference_mode: use torch.inference_mode
+        autocast: reduced precision of the autocast, only bf16 is supported
+    """
+
+    import torch
+
+    with ExitStack() as stack:
+        if inference_mode:
+            stack.enter_context(torch.inference_mode())
+
+        if autocast == "bf16":
+            device_type = torch.device(device or "cpu").type
+            stack.enter_context(torch.autocast(device_type, dtype=torch.bfloat16))
+        elif autocast is not None:
+            raise ValueError(f"Unsupported autocast {autocast}")
+
+        yield
+
+
+def compile_modules(modules: list) -> None:
+    """
+    Compile the forward pass of the modules with torch.compile, the modules are
+    compiled lazily by torch during their first call
+
+    Args:
+        modules: torch modules to compile
+    """
+
+    import torch
+
+    if not modules:
+        logger.warning("No torch modules to compile, running without torch.compile")
+        return
+
+    for module in modules:
+        module.forward = torch.compile(module.forward)
+        logger.info(f"Compiling {type(module).__name__} with torch.compile")
@@ -1,4 +1,14 @@
+from collections import Counter
+from typing import Callable, Sequence, Union
+
 import jiwer
+from rapidfuzz.distance import Levenshtein
+
+from .alignment import DELETE, INSERT, SUBSTITUTE, align, encode_ops
+from .vocabulary import Vocabulary
+
+# transcript as text, or as the word ids of a vocabulary shared by both transcripts
+Transcript = Union[str, Sequence[int]]
 
 
 def jiwer_differ(model_transcript: str, yt_transcript: str) -> dict:
@@ -18,3 +28,181 @@ def jiwer_differ(model_transcript: str, yt_transcript: str) -> dict:
     results.pop("truth", None)
     results.pop("hypothesis", None)
     return results
+
+
+def wer_differ(model_transcript: Transcript, yt_transcript: Transcript) -> dict:
+    """
+    Calculate the speach-to-text metrics on the words interned to integer ids,
+    gives the same results as jiwer_differ without building the alignment
+
+    Args:
+        model_transcript: transcript from the model, text or word ids
+        yt_transcript: transcript from the target, text or word ids
+
+    Returns:
+        dict with the results of the comparison
+    """
+
+    truth, hypothesis = word_ids(model_transcript, yt_transcript)
+
+    if len(truth) == 0:
+        raise ValueError("one or more references are empty strings")
+
+    substitutions, deletions, insertions = edit_counts(truth, hypothesis)
+    return measures(len(truth), len(hypothesis), substitutions, deletions, insertions)
+
+
+def alignment_differ(model_transcript: Transcript, yt_transcript: Transcript) -> dict:
+    """
+    Calculate the speach-to-text metrics like wer_differ and keep the word-level
+    operations, the alignment needs memory linear in the length of the transcripts
+
+    Args:
+        model_transcript: transcript from the model, text or word ids
+        yt_transcript: transcript from the target, text or word ids
+
+    Returns:
+        dict with the results of the comparison, the operations turning the model
+        transcript into the target transcript are under the ops key, see src/alignment.py
+    """
+
+    truth, hypothesis = word_ids(model_transcript, yt_transcript)
+
+    if len(truth) == 0:
+        raise ValueError("one or more references are empty strings")
+
+    runs = align(truth, hypothesis)
+    counts = {SUBSTITUTE: 0, DELETE: 0, INSERT: 0}
+    for operation, length in runs:
+        if operation in counts:
+            counts[operation] += length
+
+    results = measures(
+        len(truth), len(hypothesis), counts[SUBSTITUTE], counts[DELETE], counts[INSERT]
+    )
+    results["ops"] = encode_ops(runs)
+    return results
+
+
+def word_ids(
+    model_transcript: Transcript, yt_transcript: Transcript
+) -> tuple[Sequence[int], Sequence[int]]:
+    """
+    Intern the words of the transcripts, split the same way as the default jiwer
+    transform, the word ids e.g. from MemoizedNormalizer.tokenize_many are used as they are
+
+    Args:
+        model_transcript: transcript from the model, text or word ids
+        yt_transcript: transcript from the target, text or word ids
+
+    Returns:
+        word ids of both transcripts from the same vocabulary
+    """
+
+    if isinstance(model_transcript, str) != isinstance(yt_transcript, str):
+        raise TypeError("both transcripts must be text or both must be word ids")
+
+    if not isinstance(model_transcript, str):
+        return model_transcript, yt_transcript
+
+    vocabulary = Vocabulary()
+    return vocabulary.encode(model_transcript), vocabulary.encode(yt_transcript)
+
+
+def edit_counts(
+    truth: Sequence[int], hypothesis: Sequence[int]
+) -> tuple[int, int, int]:
+    """
+    Count the edit operations turning the truth into the hypothesis, the alignment
+    is computed by the bit-parallel Levenshtein of rapidfuzz, same as in jiwer
+
+    Args:
+        truth: word ids of the reference
+        hypothesis: word ids of the hypothesis
+
+    Returns:
+        number of substitutions, deletions and insertions
+    """
+
+    if len(truth) == 0 or len(hypothesis) == 0:
+        return 0, len(truth), len(hypothesis)
+
+    tags = Counter(
+        tag for tag, _, _ in Levenshtein.editops(truth, hypothesis).as_list()
+    )
+    return tags["replace"], tags["delete"], tags["insert"]
+
+
+def measures(
+    truth_length: int,
+    hypothesis_length: int,
+    substitutions: int,
+    deletions: int,
+    insertions: int,
+) -> dict:
+    """
+    Calculate the metrics from the edit operations, with the formulas of jiwer
+
+    Args:
+        truth_length: number of words in the reference
+        hypothesis_length: number of words in the hypothesis
+        substitutions: number of substituted words
+        deletions: number of deleted words
+        insertions: number of inserted words
+
+    Returns:
+        dict with the metrics and the counts of the operations
+    """
+
+    hits = truth_length - (substitutions + deletions)
+    errors = substitutions + deletions + insertions
+
+    wip = (
+        (float(hits) / truth_length) * (float(hits) / hypothesis_length)
+        if hypothesis_length >= 1
+        else 0
+    )
+
+    return {
+        "wer": float(errors) / float(truth_length),
+        "mer": float(errors) / float(truth_length + insertions),
+        "wil": 1 - wip,
+        "wip": wip,
+        "hits": hits,
+        "substitutions": substitutions,
+        "deletions": deletions,
+        "insertions": insertions,
+    }
+
+
+# differs selectable with the --differ argument of the tests
+DIFFERS: dict[str, Callable[[str, str], dict]] = {
+    "jiwer": jiwer_differ,
+    "wer": wer_differ,
+    "alignment": alignment_differ,
+}
+
+# differs comparing the word ids of the transcripts, see Comparator in src/comparator.py
+TOKEN_DIFFERS = frozenset({wer_differ, alignment_differ})
+
+
+def get_differ(differ: Union[str, Callable[[str, str], dict]]) -> Callable:
+    """
+    Get the differ by its name
+
+    Args:
+        differ: name of the differ, see DIFFERS, or the differ itself
+
+    Returns:
+        differ function
+    """
+
+    if callable(differ):
+        return differ
+
+    try:
+        return DIFFERS[differ]
+    except KeyError:
+        raise ValueError(
+            f"Unknown differ {differ}, available: {', '.join(DIFFERS)}"
+        ) from None
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+
+# keys of a testplan item which are written by the runner
+OUTCOME_KEYS = ("results", "error", "modelTranscript", "targetTranscript")
+
+
+class ResultsJournal:
+    """
+    Append-only journal of the processed testplan items, one json object per line.
+    Every line is flushed to the disk as soon as it is written, so a crashed run
+    can be resumed from the last processed video
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def append(self, iteration: int, video_details: dict[str, Any]) -> None:
+        """
+        Append the outcome of a processed video to the journal
+
+        Args:
+            iteration: index of the testplan iteration
+            video_details: processed testplan item
+        """
+
+        outcome = {
+            key: video_details[key] for key in OUTCOME_KEYS if key in video_details
+        }
+
+        # the journal only speeds up resuming, a failed entry must not stop the run
+        try:
+            self._write(
+                {
+                    "type": "item",
+                    "iteration": iteration,
+                    "videoId": video_details["videoId"],
+                    "outcome": outcome,
+                }
+            )
+        except (TypeError, ValueError, OSError) as e:
+            logger.warning(
+                f"Failed to journal the video {video_details['videoId']}: {e}"
+            )
+
+    def append_saved(self, iteration: int, path: Path) -> None:
+        """
+        Mark the testplan iteration as finished and saved
+
+        Args:
+            iteration: index of the testplan iteration
+            path: path to the saved results
+        """
+
+        self._write({"type": "saved", "iteration": iteration, "path": str(path)})
+
+    def load(self) -> tuple[dict[tuple[int, str], dict], dict[int, Path]]:
+        """
+        Load the journal, a partially written last line is ignored
+
+        Returns:
+            outcomes of the processed videos keyed by (iteration, videoId)
+            and paths to the saved results keyed by iteration
+        """
+
+        items = {}
+        saved = {}
+
+        if not self.path.exists():
+            return items, saved
+
+        with open(self.path, encoding="utf-8") as f:
+            for n, line in enumerate(f, start=1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(
+                        f"Ignoring corrupted line {n} of the journal {self.path}"
+                    )
+                    continue
+
+                if entry["type"] == "item":
+                    items[(entry["iteration"], entry["videoId"])] = entry["outcome"]
+                elif entry["type"] == "saved":
+                    saved[entry["iteration"]] = Path(entry["path"])
+
+        logger.info(
+            f"Loaded journal {self.path}, {len(items)} videos and {len(saved)} testplans done"
+        )
+        return items, saved
+
+    def restore(
+        self, iteration: int, items: list[dict], outcomes: dict[tuple[int, str], dict]
+    ) -> list[dict]:
+        """
+        Copy the journaled outcomes into the testplan items
+
+        Args:
+            iteration: index of the testplan iteration
+            items: testplan items
+            outcomes: outcomes loaded from the journal
+
+        Returns:
+            items which still have to be processed
+        """
+
+        pending = []
+        for video_details in items:
+            outcome: Optional[dict] = outcomes.get(
+                (iteration, video_details["videoId"])
+            )
+
+            if outcome is None:
+                pending.append(video_details)
+            else:
+                video_details.update(outcome)
+
+        if skipped := len(items) - len(pending):
+            logger.info(
+                f"Skipping {skipped} videos already processed according to the journal"
+            )
+
+        return pending
+
+    def clear(self) -> None:
+        """
+        Remove the journal
+        """
+
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+            # a single O_APPEND write per entry, synced before the video is reported as done
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
@@ -1,5 +1,17 @@
+import hashlib
 import re
+import threading
 import unicodedata
+from array import array
+from collections import OrderedDict
+from os import PathLike
+from typing import Callable, Optional, Sequence
+
+from src.cache.normalization import NormalizationCache
+from src.vocabulary import Vocabulary, split_words
+
+_TITLE_SYMBOLS = re.compile(r"[^\w\s-]")
+_TITLE_SEPARATORS = re.compile(r"[-\s]+")
 
 
 def title_normalizer(string, allow_unicode=False) -> str:
@@ -25,6 +37,219 @@ def title_normalizer(string, allow_unicode=False) -> str:
             .decode("ascii")
         )
 
-    string = re.sub(r"[^\w\s-]", "", string.lower())
+    string = _TITLE_SYMBOLS.sub("", string.lower())
+
+    return _TITLE_SEPARATORS.sub("-", string).strip("-_")
+
+
+class MemoizedNormalizer:
+    """
+    Normalizer remembering its results, the recently normalized transcripts are kept
+    in memory and optionally all of them in a SQLite file keyed by the sha256 of
+    the transcript, so a target transcript is normalized once for all the models and runs.
+    The normalized transcripts are kept as the ids of their words in the vocabulary
+    of the normalizer, see src/vocabulary.py
+    """
+
+    def __init__(
+        self,
+        normalizer: Callable[[str], str],
+        name: Optional[str] = None,
+        cache_path: Optional[PathLike] = None,
+        max_size: int = 128,
+    ):
+        """
+        Args:
+            normalizer: normalizer to memoize
+            name: name of the normalizer in the persistent cache, required with
+                the cache_path, change it when the normalizer changes e.g. with
+                whisper_cache_name
+            cache_path: path to the sqlite file of the persistent cache, None to keep
+                the transcripts only in memory
+            max_size: number of transcripts kept in memory
+        """
+
+        if cache_path is not None and not name:
+            raise ValueError("The name of the normalizer is required with cache_path")
+
+        self.normalizer = normalizer
+        self.name = name
+        self.cache_path = cache_path
+        self.max_size = max_size
+        self.vocabulary = Vocabulary()
+        self._memory: OrderedDict[str, array] = OrderedDict()
+        self._lock = threading.Lock()
+        self._cache = None if cache_path is None else NormalizationCache(cache_path)
+
+    def __call__(self, transcript: str) -> str:
+        return self.normalize_many([transcript])[0]
+
+    def normalize_many(
+        self, transcripts: Sequence[str], persist: bool = True
+    ) -> list[str]:
+        """
+        Normalize the transcripts, the persistent cache is read and updated
+        once for all of them
+
+        Args:
+            transcripts: transcripts to normalize
+            persist: False for the transcripts normalized only once e.g. the model
+                transcripts, they are normalized without the caches
+
+        Returns:
+            normalized transcripts in the order of the transcripts,
+            the words are separated by single spaces
+        """
+
+        return [
+            self.vocabulary.decode(tokens)
+            for tokens in self.tokenize_many(transcripts, persist)
+        ]
+
+    def tokenize_many(
+        self, transcripts: Sequence[str], persist: bool = True
+    ) -> list[array]:
+        """
+        Normalize the transcripts and intern their words, the word ids can be compared
+        by the differs accepting them, see TOKEN_DIFFERS in src/differs.py
+
+        Args:
+            transcripts: transcripts to normalize
+            persist: False for the transcripts normalized only once e.g. the model
+                transcripts, they are normalized without the caches
+
+        Returns:
+            word ids of the normalized transcripts in the order of the transcripts
+        """
+
+        if not persist:
+            return [
+                self.vocabulary.add(split_words(self.normalizer(transcript)))
+                for transcript in transcripts
+            ]
+
+        tokenized: dict[str, array] = {}
+
+        with self._lock:
+            for transcript in transcripts:
+                if transcript in self._memory:
+                    self._memory.move_to_end(transcript)
+                    tokenized[transcript] = self._memory[transcript]
+
+        missing = {
+            _digest(transcript): transcript
+            for transcript in transcripts
+            if transcript not in tokenized
+        }
+
+        if missing and self._cache is not None:
+            for digest, words in self._cache.get_many(self.name, list(missing)).items():
+                tokenized[missing.pop(digest)] = self.vocabulary.add(words)
+
+        if missing:
+            results = {
+                digest: split_words(self.normalizer(transcript))
+                for digest, transcript in missing.items()
+            }
+            for digest, words in results.items():
+                tokenized[missing[digest]] = self.vocabulary.add(words)
+
+            if self._cache is not None:
+                self._cache.put_many(self.name, results)
+
+        with self._lock:
+            for transcript, tokens in tokenized.items():
+                self._memory[transcript] = tokens
+                self._memory.move_to_end(transcript)
+
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+        return [tokenized[transcript] for transcript in transcripts]
+
+    def __getstate__(self) -> dict:
+        # the memory, the vocabulary and the lock stay in the process,
+        # e.g. of the compare workers
+        return {
+            "normalizer": self.normalizer,
+            "name": self.name,
+            "cache_path": self.cache_path,
+            "max_size": self.max_size,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+
+def _digest(transcript: str) -> str:
+    return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+
+def whisper_normalizer() -> Callable[[str], str]:
+    """
+    English normalizer of Whisper, used by the model tests
+
+    Returns:
+        normalizer
+    """
+
+    from whisper.normalizers import EnglishTextNormalizer
+
+    return EnglishTextNormalizer()
+
+
+def whisper_basic_normalizer() -> Callable[[str], str]:
+    """
+    Language independent normalizer of Whisper, removes the punctuation and the case
+
+    Returns:
+        normalizer
+    """
+
+    from whisper.normalizers import BasicTextNormalizer
+
+    return BasicTextNormalizer()
+
+
+def whisper_cache_name(name: str) -> str:
+    """
+    Name of a Whisper normalizer in the persistent cache of MemoizedNormalizer,
+    the transcripts normalized by other versions of openai-whisper are not reused
+
+    Args:
+        name: name of the normalizer, see NORMALIZERS
+
+    Returns:
+        name with the version of openai-whisper
+    """
+
+    import whisper
+
+    return f"{name}-{whisper.__version__}"
+
+
+# normalizers of the transcripts selectable by name, created when they are requested
+NORMALIZERS: dict[str, Callable[[], Optional[Callable[[str], str]]]] = {
+    "whisper": whisper_normalizer,
+    "whisper-basic": whisper_basic_normalizer,
+    "none": lambda: None,
+}
+
+
+def get_normalizer(name: str) -> Optional[Callable[[str], str]]:
+    """
+    Create the normalizer by its name
+
+    Args:
+        name: name of the normalizer, see NORMALIZERS
+
+    Returns:
+        normalizer, None if the transcripts are compared as they are
+    """
+
+    if name not in NORMALIZERS:
+        raise ValueError(
+            f"Unknown normalizer {name}, available: {', '.join(NORMALIZERS)}"
+        )
 
-    return re.sub(r"[-\s]+", "-", string).strip("-_")
+    return NORMALIZERS[name]()
@@ -0,0 +1,68 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def prefetch(
+    func: Callable[[T], R], items: Iterable[T], depth: int
+) -> Iterator[tuple[T, Future]]:
+    """
+    Run func over the items in background threads, keeping at most depth items in flight
+
+    Items are yielded in their original order together with the future of their result,
+    so the consumer can work on the current item while the next ones are being prepared.
+
+    Args:
+        func: function applied to every item
+        items: items to process
+        depth: maximum number of items processed ahead of the consumer
+
+    Returns:
+        iterator of (item, future) pairs
+    """
+
+    if depth < 1:
+        raise ValueError(f"Prefetch depth must be at least 1, got {depth}")
+
+    items = iter(items)
+    pending: deque[tuple[T, Future]] = deque()
+
+    with ThreadPoolExecutor(max_workers=depth, thread_name_prefix="prefetch") as pool:
+        for item in items:
+            pending.append((item, pool.submit(func, item)))
+            if len(pending) >= depth:
+                break
+
+        while pending:
+            item, future = pending.popleft()
+
+            # keep the queue full while the consumer works on the current item
+            for next_item in items:
+                pending.append((next_item, pool.submit(func, next_item)))
+                break
+
+            yield item, future
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """
+    Split the items into consecutive batches, the last batch can be shorter
+
+    Args:
+        items: items to split
+        size: maximum number of items in a batch
+
+    Returns:
+        iterator of batches
+    """
+
+    if size < 1:
+        raise ValueError(f"Batch size must be at least 1, got {size}")
+
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
@@ -0,0 +1,231 @@
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+# entry point group of the tests provided by other packages, e.g. in pyproject.toml
+# [project.entry-points."mi_go.tests"]
+# MyTest = "my_package.my_test:MyTest"
+ENTRY_POINT_GROUP = "mi_go.tests"
+
+# modules the common arguments of the tests are built from, e.g. the differ choices
+_COMMON_ARGS_MODULES = ("src.transcript_test", "src.differs", "src.normalizers")
+
+
+def discover_tests(group: str = ENTRY_POINT_GROUP) -> list[str]:
+    """
+    Find the tests provided through the package entry points, without importing them
+
+    Args:
+        group: entry point group
+
+    Returns:
+        import paths of the tests e.g. "my_package.my_test:MyTest"
+    """
+
+    paths = []
+    for entry_point in entry_points(group=group):
+        if entry_point.value.rpartition(":")[2] != entry_point.name:
+            logger.warning(
+                f"Entry point {entry_point.name} = {entry_point.value} is skipped, "
+                f"its name must match the test class"
+            )
+            continue
+        paths.append(entry_point.value)
+
+    return paths
+
+
+class _RecordingParser:
+    """
+    Stands in for the subparser while the arguments of a test are recorded
+    """
+
+    def __init__(self):
+        self.arguments: list[tuple[tuple, dict]] = []
+
+    def add_argument(self, *args, **kwargs) -> None:
+        self.arguments.append((args, kwargs))
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+class TestManifest:
+    """
+    Cache of the command line arguments of the tests, so the subparser of a test can be
+    built without importing the test and its model libraries. An entry is used only
+    while the sources of the classes of the test and of the modules the common
+    arguments are built from are unchanged
+    """
+
+    def __init__(self, path: os.PathLike):
+        self.path = Path(path)
+        self._entries: Optional[dict[str, Any]] = None
+
+    def add_arguments(
+        self,
+        subparser: argparse.ArgumentParser,
+        test_path: str,
+        load: Callable[[str], type],
+    ) -> None:
+        """
+        Add the arguments of the test to its subparser, from the manifest if it has
+        an up-to-date entry, otherwise the test is imported and its entry is updated
+
+        Args:
+            subparser: subparser of the test
+            test_path: import path of the test
+            load: function importing the test from its path
+        """
+
+        entry = self._load().get(test_path)
+
+        # the modules of the test are known only once it was imported
+        if (
+            entry is not None
+            and "modules" in entry
+            and entry["fingerprint"] == self._fingerprint(entry["modules"])
+        ):
+            arguments = [(args, _decode(kwargs)) for args, kwargs in entry["arguments"]]
+        else:
+            test = load(test_path)
+            recorder = _RecordingParser()
+            test.common_args(recorder)
+            test.subparser(recorder)
+            arguments = recorder.arguments
+
+            modules = _source_modules(test)
+            if (fingerprint := self._fingerprint(modules)) is not None:
+                self._update(test_path, modules, fingerprint, arguments)
+
+        for args, kwargs in arguments:
+            subparser.add_argument(*args, **kwargs)
+
+    def _update(
+        self,
+        test_path: str,
+        modules: list[str],
+        fingerprint: dict,
+        arguments: list[tuple[tuple, dict]],
+    ) -> None:
+        try:
+            encoded = [(list(args), _encode(kwargs)) for args, kwargs in arguments]
+        except _Uncacheable as e:
+            logger.debug(f"Arguments of {test_path} can not be cached: {e}")
+            return
+
+        entries = self._load()
+        entries[test_path] = {
+            "modules": modules,
+            "fingerprint": fingerprint,
+            "arguments": encoded,
+        }
+
+        # the manifest only speeds up the start, a failed write must not stop the run
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save the test manifest {self.path}: {e}")
+
+    def _load(self) -> dict[str, Any]:
+        if self._entries is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self._entries = {}
+
+        return self._entries
+
+    @staticmethod
+    def _fingerprint(modules: list[str]) -> Optional[dict[str, Any]]:
+        fingerprint = {}
+
+        for module in modules:
+            try:
+                spec = importlib.util.find_spec(module)
+            except (ImportError, ValueError):
+                return None
+
+            if spec is None or spec.origin is None:
+                return None
+
+            try:
+                stat = os.stat(spec.origin)
+            except OSError:
+                return None
+            fingerprint[spec.origin] = [stat.st_mtime_ns, stat.st_size]
+
+        return fingerprint
+
+
+def _source_modules(test: type) -> list[str]:
+    """
+    Modules the arguments of the test can come from, the modules of the classes
+    of the test and the modules the common arguments are built from
+
+    Args:
+        test: test class
+
+    Returns:
+        names of the modules
+    """
+
+    modules = [cls.__module__ for cls in test.__mro__ if cls is not object]
+    return list(dict.fromkeys([*modules, *_COMMON_ARGS_MODULES]))
+
+
+def _encode(kwargs: dict[str, Any]) -> dict[str, Any]:
+    encoded = {}
+
+    for key, value in kwargs.items():
+        if key == "type":
+            encoded[key] = {"callable": _callable_path(value)}
+        elif key == "choices":
+            encoded[key] = list(value)
+        elif isinstance(value, tuple):
+            encoded[key] = {"tuple": list(value)}
+        elif value is None or isinstance(value, (str, int, float, bool)):
+            encoded[key] = value
+        else:
+            raise _Uncacheable(f"{key}={value!r}")
+
+    return encoded
+
+
+def _decode(kwargs: dict[str, Any]) -> dict[str, Any]:
+    decoded = {}
+
+    for key, value in kwargs.items():
+        if isinstance(value, dict) and "callable" in value:
+            module, _, name = value["callable"].partition(":")
+            decoded[key] = getattr(importlib.import_module(module), name)
+        elif isinstance(value, dict) and "tuple" in value:
+            decoded[key] = tuple(value["tuple"])
+        else:
+            decoded[key] = value
+
+    return decoded
+
+
+def _callable_path(value: Any) -> str:
+    module = getattr(value, "__module__", None)
+    name = getattr(value, "__qualname__", "")
+
+    # builtins and module level functions or classes can be imported again
+    if module and name and "<" not in name and "." not in name:
+        return f"{module}:{name}"
+
+    raise _Uncacheable(f"type={value!r}")
@@ -0,0 +1,595 @@
+import argparse
+import json
+import pprint
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from os import PathLike
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from loguru import logger
+
+from .audio import Audio
+from .test_runner import TestRegistry, TestRunner
+from .transcript_test import TranscriptTest
+
+DEFAULT_SOCKET = "./cache/model.sock"
+
+# every message is a json object prefixed by its length
+_HEADER = struct.Struct(">I")
+
+# errors raised by the testers which are re-raised by the clients,
+# the runner records them as the errors of the videos they were raised for
+_ERRORS = {"TimeoutError": TimeoutError, "ValueError": ValueError}
+
+# common arguments of the tests which apply to the served model only,
+# they are given to the model server instead of the clients
+_SERVER_SETTINGS = (
+    "device",
+    "intra_op_threads",
+    "inter_op_threads",
+    "inference_mode",
+    "autocast",
+    "torch_compile",
+)
+
+
+def send_message(sock: socket.socket, message: dict[str, Any]) -> None:
+    """
+    Send a message over the socket
+
+    Args:
+        sock: connected socket
+        message: json serializable message
+    """
+
+    data = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock: socket.socket) -> Optional[dict[str, Any]]:
+    """
+    Receive a message from the socket
+
+    Args:
+        sock: connected socket
+
+    Returns:
+        received message or None if the connection was closed
+    """
+
+    header = _recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+
+    (size,) = _HEADER.unpack(header)
+    data = _recv_exactly(sock, size)
+    if data is None:
+        raise ConnectionError("Connection closed in the middle of a message")
+
+    return json.loads(data)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    buffer = bytearray()
+
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            if buffer:
+                raise ConnectionError("Connection closed in the middle of a message")
+            return None
+        buffer += chunk
+
+    return bytes(buffer)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        while (request := recv_message(self.request)) is not None:
+            send_message(self.request, self.server.model_server.handle(request))
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _Request(NamedTuple):
+    audio: list[str]
+    future: Future
+
+
+class DynamicBatcher:
+    """
+    Groups the transcription requests of the clients into batches, a batch is run
+    once it has max_batch_size audio files or max_latency seconds after its first
+    request arrived, the model runs one batch at a time
+    """
+
+    def __init__(
+        self, tester: TranscriptTest, max_batch_size: int = 1, max_latency: float = 0.05
+    ):
+        self.tester = tester
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+
+        self._queue: queue.Queue[Optional[_Request]] = queue.Queue()
+        self._carry: Optional[_Request] = None
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._audio = 0
+        self._largest_batch = 0
+
+        self._thread = threading.Thread(target=self._run, name="batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio: list[str]) -> Future:
+        """
+        Queue the audio files of a request for the transcription
+
+        Args:
+            audio: paths to the audio files
+
+        Returns:
+            future of the transcripts in the order of the audio files
+        """
+
+        request = _Request(audio, Future())
+        self._queue.put(request)
+        return request.future
+
+    def stop(self) -> None:
+        """
+        Transcribe the queued requests and stop the batching thread
+        """
+
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Statistics of the batching
+
+        Returns:
+            dict with the queue depth and the achieved batch sizes
+        """
+
+        with self._stats_lock:
+            return {
+                "queueDepth": self._queue.qsize(),
+                "batches": self._batches,
+                "requests": self._requests,
+                "audio": self._audio,
+                "averageBatchSize": self._audio / self._batches if self._batches else 0,
+                "largestBatchSize": self._largest_batch,
+            }
+
+    def _run(self) -> None:
+        while (batch := self._collect()) is not None:
+            self._process(batch)
+
+    def _collect(self) -> Optional[list[_Request]]:
+        first = self._carry if self._carry is not None else self._queue.get()
+        self._carry = None
+        if first is None:
+            return None
+
+        batch = [first]
+        size = len(first.audio)
+        deadline = time.monotonic() + self.max_latency
+
+        while size < self.max_batch_size:
+            try:
+                request = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+
+            # the queued requests are finished before stopping
+            if request is None:
+                self._queue.put(None)
+                break
+
+            # a request which does not fit is left for the next batch
+            if size + len(request.audio) > self.max_batch_size:
+                self._carry = request
+                break
+
+            batch.append(request)
+            size += len(request.audio)
+
+        return batch
+
+    def _process(self, batch: list[_Request]) -> None:
+        audio = [path for request in batch for path in request.audio]
+
+        try:
+            if len(audio) == 1:
+                transcripts = [self.tester.transcribe(audio[0])]
+            else:
+                transcripts = self.tester.transcribe_batch(audio)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+
+            # the other requests should not fail together with the broken one
+            logger.warning(f"Batch failed, transcribing its requests separately: {e}")
+            for request in batch:
+                self._process([request])
+            return
+
+        offset = 0
+        for request in batch:
+            request.future.set_result(transcripts[offset : offset + len(request.audio)])
+            offset += len(request.audio)
+
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._audio += len(audio)
+            self._largest_batch = max(self._largest_batch, len(audio))
+
+        logger.info(
+            f"Transcribed batch of {len(audio)} audio files from {len(batch)} requests, "
+            f"queue depth: {self._queue.qsize()}"
+        )
+
+
+class ModelServer:
+    """
+    Keeps a tester with its model loaded and serves it over a Unix socket,
+    so the runners started one after another skip loading the model, see RemoteTest.
+    The transcription requests of the clients are batched by DynamicBatcher
+    """
+
+    def __init__(
+        self,
+        tester: TranscriptTest,
+        socket_path: PathLike = DEFAULT_SOCKET,
+        max_latency: float = 0.05,
+    ):
+        self.tester = tester
+        self.socket_path = Path(socket_path)
+
+        self._remove_stale_socket()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # batches of up to batch_size audio files, as the runner does
+        self._batcher = DynamicBatcher(tester, tester.batch_size, max_latency)
+
+        self._server = _UnixServer(str(self.socket_path), _RequestHandler)
+        self._server.model_server = self
+
+    def serve_forever(self) -> None:
+        """
+        Serve the requests until shutdown is called or the process is interrupted
+        """
+
+        logger.info(f"Serving {self.tester.model_name} on {self.socket_path}")
+
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self.socket_path.unlink(missing_ok=True)
+            self._batcher.stop()
+            logger.info(f"Batching stats:\n{pprint.pformat(self._batcher.stats())}")
+
+    def shutdown(self) -> None:
+        """
+        Stop serve_forever, must be called from another thread
+        """
+
+        self._server.shutdown()
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        """
+        Handle a single request of a client
+
+        Args:
+            request: request with the operation and its arguments
+
+        Returns:
+            response, with the error and its message if the request failed
+        """
+
+        try:
+            return self._handle(request)
+        except (TimeoutError, ValueError) as e:
+            return {"error": type(e).__name__, "message": str(e)}
+        except Exception as e:
+            logger.exception(f"Failed to handle the {request.get('op')} request")
+            return {"error": type(e).__name__, "message": str(e)}
+
+    def _handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        op = request.get("op")
+
+        if op == "info":
+            return {
+                "modelName": self.tester.model_name,
+                "language": self.tester.language,
+                "additionalInfo": self.tester.additional_info(),
+                "outputSettings": self.tester.output_settings(),
+            }
+
+        if op == "transcribe":
+            transcripts = self._batcher.submit(request["audio"]).result()
+            return {"transcripts": transcripts}
+
+        if op == "stats":
+            return {"stats": self._batcher.stats()}
+
+        if op == "normalize":
+            return {"text": self.tester.normalizer(request["text"])}
+
+        if op == "compare":
+            results = self.tester.compare(
+                request["modelTranscript"], request["targetTranscript"]
+            )
+            return {"results": results}
+
+        raise ValueError(f"Unknown operation {op}")
+
+    def _remove_stale_socket(self) -> None:
+        if not self.socket_path.exists():
+            return
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(str(self.socket_path))
+            except ConnectionRefusedError:
+                logger.info(f"Removing stale socket {self.socket_path}")
+                self.socket_path.unlink()
+                return
+
+        raise RuntimeError(f"Model server is already running on {self.socket_path}")
+
+    @classmethod
+    def from_command_line(cls, test_runner: type[TestRunner]) -> "ModelServer":
+        """
+        Creates a model server from command line arguments
+
+        Args:
+            test_runner: test runner whose registered tests can be served
+        """
+
+        args, unknown = cls.parser(test_runner).parse_known_args()
+        logger.info(f"Command line args:\n{pprint.pformat(vars(args))}")
+
+        tester = TestRegistry.get_test(test_runner, args.test_class)
+        logger.info(f"Chosen tester name: {tester.__name__}")
+
+        # serving a client of another server makes no sense
+        if issubclass(tester, RemoteTest):
+            raise ValueError(f"{tester.__name__} can not be served")
+
+        return cls(tester(**vars(args)), args.socket_path, args.max_latency)
+
+    @staticmethod
+    def parser(
+        test_runner: type[TestRunner], argv: Optional[list[str]] = None
+    ) -> argparse.ArgumentParser:
+        """
+        Creates a parser for the model server
+
+        Args:
+            test_runner: test runner whose registered tests can be served
+            argv: command line arguments, used to import only the selected test,
+                sys.argv if None
+        """
+
+        parser = argparse.ArgumentParser()
+
+        parser.add_argument(
+            "--socket",
+            required=False,
+            type=str,
+            default=DEFAULT_SOCKET,
+            dest="socket_path",
+            help=f"Path to the Unix socket (default: {DEFAULT_SOCKET})",
+        )
+
+        parser.add_argument(
+            "-bs",
+            "--batch-size",
+            required=False,
+            type=int,
+            default=1,
+            dest="batch_size",
+            help="Maximum number of audio files transcribed at once, the requests "
+            "of the clients are grouped up to this size (default: 1)",
+        )
+
+        parser.add_argument(
+            "--max-latency",
+            required=False,
+            type=float,
+            default=0.05,
+            dest="max_latency",
+            help="Seconds a request waits for other requests to fill its batch "
+            "(default: 0.05)",
+        )
+
+        TestRegistry.add_subparsers(
+            test_runner, parser, argv, help="Select the test you want to serve"
+        )
+
+        return parser
+
+
+class RemoteTest(TranscriptTest):
+    """
+    Client of a ModelServer, transcribes and compares the transcripts
+    by the tester loaded in the server
+    """
+
+    def __init__(self, socket_path: PathLike = DEFAULT_SOCKET, **kwargs):
+        if settings := [name for name in _SERVER_SETTINGS if kwargs.get(name)]:
+            raise ValueError(
+                f"{', '.join(settings)} can not be set for the client, "
+                f"start the model server with them instead"
+            )
+
+        self.socket_path = Path(socket_path)
+        self._lock = threading.Lock()
+        self._socket: Optional[socket.socket] = None
+
+        info = self._request({"op": "info"})
+        super().__init__(info["modelName"], info["language"], **kwargs)
+        self._additional_info = info["additionalInfo"]
+        self._output_settings = info["outputSettings"]
+
+        self.transcriber = self.transcribe
+        self.normalizer = self.normalize
+
+    def additional_info(self) -> dict:
+        return self._additional_info
+
+    def output_settings(self) -> dict:
+        return self._output_settings
+
+    def transcribe(self, audio_path: Audio) -> str:
+        """
+        Transcribe the audio file by the served model and return the transcript
+
+        Args:
+            audio_path: path to audio file
+
+        Returns:
+            Transcript
+        """
+        return self.transcribe_batch([audio_path])[0]
+
+    def transcribe_batch(self, audio_paths: list[Audio]) -> list[str]:
+        """
+        Transcribe the audio files by the served model, the server
+        can use its native batching
+
+        Args:
+            audio_paths: paths to audio files
+
+        Returns:
+            Transcripts in the order of the audio files
+        """
+
+        # the server can run in another working directory
+        audio = [str(Path(audio_path).resolve()) for audio_path in audio_paths]
+
+        return self._request({"op": "transcribe", "audio": audio})["transcripts"]
+
+    def server_stats(self) -> dict[str, Any]:
+        """
+        Batching statistics of the server
+
+        Returns:
+            dict with the queue depth and the achieved batch sizes
+        """
+        return self._request({"op": "stats"})["stats"]
+
+    def normalize(self, text: str) -> str:
+        return self._request({"op": "normalize", "text": text})["text"]
+
+    def compare(self, model_transcript, target_transcript) -> dict:
+        """
+        Compare the model transcript to the target transcript by the served tester
+
+        Args:
+            model_transcript: transcript from the model
+            target_transcript: transcript from the target
+
+        Returns:
+            dict with the results of the comparison
+        """
+
+        response = self._request(
+            {
+                "op": "compare",
+                "modelTranscript": model_transcript,
+                "targetTranscript": target_transcript,
+            }
+        )
+        return response["results"]
+
+    def close(self) -> None:
+        """
+        Close the connection to the server
+        """
+
+        with self._lock:
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+
+    def _request(self, request: dict[str, Any]) -> dict[str, Any]:
+        # the runner can transcribe and compare on different threads
+        with self._lock:
+            try:
+                if self._socket is None:
+                    self._socket = self._connect()
+
+                send_message(self._socket, request)
+                response = recv_message(self._socket)
+            except OSError:
+                if self._socket is not None:
+                    self._socket.close()
+                    self._socket = None
+                raise
+
+        if response is None:
+            self.close()
+            raise ConnectionError(f"Model server on {self.socket_path} disconnected")
+
+        if "error" in response:
+            error = _ERRORS.get(response["error"], RuntimeError)
+            raise error(f"{response['error']} (model server): {response['message']}")
+
+        return response
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            sock.connect(str(self.socket_path))
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            sock.close()
+            raise ConnectionError(
+                f"No model server is running on {self.socket_path}, "
+                f"start it with model_server.py"
+            ) from e
+
+        return sock
+
+    @staticmethod
+    def common_args(subparser: argparse.ArgumentParser):
+        """
+        The served tester transcribes and compares, so the arguments shared by the
+        other tests are given to model_server.py and none of them is added here
+
+        Args:
+            subparser: parser to add arguments to
+        """
+        pass
+
+    @staticmethod
+    def subparser(subparser: argparse.ArgumentParser):
+        """
+        Add arguments to the subparser
+
+        Args:
+            subparser: parser to add arguments to
+        """
+
+        subparser.add_argument(
+            "--socket",
+            type=str,
+            dest="socket_path",
+            default=DEFAULT_SOCKET,
+            required=False,
+            help=f"Path to the Unix socket of the model server (default: {DEFAULT_SOCKET})",
+        )
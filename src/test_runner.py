@@ -1,27 +1,39 @@
 import argparse
+import importlib
 import pprint
+import sys
 import time
 from collections import defaultdict
+from pathlib import Path
+from typing import Any, Optional, Union
 
 from loguru import logger
 
+from .plugins import ENTRY_POINT_GROUP, TestManifest, discover_tests
 from .transcript_test import TranscriptTest
 
 
 class TestRegistry:
     """
-    Registry for tests, use this to register tests in the test runners
+    Registry for tests, use this to register tests in the test runners.
+    Tests can be registered by their import path e.g. "models.whisper_test:WhisperTest",
+    such tests are imported only when they are selected
     """
 
     _registry = defaultdict(list)
 
+    # arguments of the tests registered by their import path
+    manifest = TestManifest(
+        Path(__file__).parent.parent.joinpath("cache", "tests_manifest.json")
+    )
+
     @classmethod
-    def register(cls, *tests) -> callable:
+    def register(cls, *tests: Union[type[TranscriptTest], str]) -> callable:
         """
         Decorator for registering tests
 
         Args:
-            tests: tests to register
+            tests: tests to register, test classes or their import paths
         """
 
         def _register_test(test_runner):
@@ -31,9 +43,9 @@ class TestRegistry:
         return _register_test
 
     @classmethod
-    def get_registry(cls, test_runner) -> list[TranscriptTest]:
+    def get_registry(cls, test_runner) -> list[type[TranscriptTest]]:
         """
-        Get the registry for a test runner
+        Get the registry for a test runner, imports all registered tests
 
         Args:
             test_runner: test runner to get the registry for
@@ -41,7 +53,136 @@ class TestRegistry:
         Returns:
             registry for the test runner
         """
-        return cls._registry[test_runner]
+        return [cls._load(test) for test in cls._registry[test_runner]]
+
+    @classmethod
+    def discover(cls, test_runner, group: str = ENTRY_POINT_GROUP) -> None:
+        """
+        Register the tests provided by other packages through the entry points,
+        the tests are not imported and tests with already registered names are skipped
+
+        Args:
+            test_runner: test runner to register the tests for
+            group: entry point group
+        """
+
+        names = set(cls.get_names(test_runner))
+
+        for test_path in discover_tests(group):
+            if (name := cls._name(test_path)) not in names:
+                cls._registry[test_runner].append(test_path)
+                names.add(name)
+
+    @classmethod
+    def get_names(cls, test_runner) -> list[str]:
+        """
+        Get the names of the tests registered for a test runner without importing them
+
+        Args:
+            test_runner: test runner to get the names for
+
+        Returns:
+            names of the registered tests
+        """
+        return [cls._name(test) for test in cls._registry[test_runner]]
+
+    @classmethod
+    def get_test(cls, test_runner, name: str) -> type[TranscriptTest]:
+        """
+        Get a test registered for a test runner by its name, only this test is imported
+
+        Args:
+            test_runner: test runner the test is registered for
+            name: name of the test
+
+        Returns:
+            test class
+        """
+
+        return cls._load(cls._find(test_runner, name))
+
+    @classmethod
+    def _find(cls, test_runner, name: str) -> Union[type[TranscriptTest], str]:
+        for test in cls._registry[test_runner]:
+            if cls._name(test) == name:
+                return test
+
+        raise ValueError(f"Test {name} is not registered for {test_runner}")
+
+    @classmethod
+    def add_subparsers(
+        cls,
+        test_runner,
+        parser: argparse.ArgumentParser,
+        argv: Optional[list[str]] = None,
+        help: str = "Select the test you want to run",
+    ) -> None:
+        """
+        Add a subparser for every test registered for the test runner or found through
+        the entry points, only the arguments of the test selected in the arguments are
+        added, from the manifest if possible, so at most the selected test is imported
+
+        Args:
+            test_runner: test runner to add the tests of
+            parser: parser to add the subparsers to
+            argv: command line arguments, sys.argv if None
+            help: help of the subparsers
+        """
+
+        cls.discover(test_runner)
+
+        names = cls.get_names(test_runner)
+        if not names:
+            raise ValueError(
+                f"Registry is empty, no test classes was found for {test_runner}"
+            )
+
+        argv = sys.argv[1:] if argv is None else argv
+        selected = next((arg for arg in argv if arg in names), None)
+
+        subparsers = parser.add_subparsers(required=True, help=help, dest="test_class")
+
+        # Add the subparsers for each test
+        for name in names:
+            subparser = subparsers.add_parser(name)
+
+            if name == selected:
+                test = cls._find(test_runner, name)
+                if isinstance(test, str):
+                    cls.manifest.add_arguments(subparser, test, cls._load)
+                else:
+                    test.common_args(subparser)
+                    test.subparser(subparser)
+
+        parser.add_argument(
+            "--list-tests",
+            action=_ListTests,
+            names=names,
+            help="List the available tests and exit",
+        )
+
+    @staticmethod
+    def _name(test: Union[type[TranscriptTest], str]) -> str:
+        if isinstance(test, str):
+            return test.rpartition(":")[2]
+        return test.__name__
+
+    @staticmethod
+    def _load(test: Union[type[TranscriptTest], str]) -> type[TranscriptTest]:
+        if isinstance(test, str):
+            module, _, name = test.partition(":")
+            return getattr(importlib.import_module(module), name)
+        return test
+
+
+class _ListTests(argparse.Action):
+    def __init__(self, option_strings, dest, names: list[str], help: str = None):
+        super().__init__(option_strings, dest, nargs=0, default=False, help=help)
+        self.names = names
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        print("\n".join(self.names))
+        parser.exit()
 
 
 class TestRunner:
@@ -49,8 +190,35 @@ class TestRunner:
     Base class for test runners, all test runners should inherit from this class
     """
 
-    def __init__(self, tester: TranscriptTest, **kwargs):
-        self.tester = tester
+    def __init__(
+        self,
+        tester: Optional[TranscriptTest] = None,
+        tester_args: Optional[dict[str, Any]] = None,
+        tester_cls: Optional[type[TranscriptTest]] = None,
+        **kwargs,
+    ):
+        if tester is None and (tester_cls is None or tester_args is None):
+            raise ValueError(
+                "Either the tester or its class and arguments are required"
+            )
+
+        self._tester = tester
+        self.tester_cls = tester_cls or type(tester)
+
+        # arguments the tester was created with, needed to create
+        # more instances of the tester e.g. in worker processes
+        self.tester_args = tester_args
+
+    @property
+    def tester(self) -> TranscriptTest:
+        # created on the first use, runners with worker processes may never load the model
+        if self._tester is None:
+            self._tester = self.tester_cls(**self.tester_args)
+        return self._tester
+
+    @tester.setter
+    def tester(self, tester: TranscriptTest) -> None:
+        self._tester = tester
 
     def run(self) -> None:
         """
@@ -78,36 +246,26 @@ class TestRunner:
         logger.info(f"Command line args:\n{pprint.pformat(vars(args))}")
 
         # Get the tester class from the registry
-        tester = [
-            x for x in TestRegistry.get_registry(cls) if x.__name__ == args.test_class
-        ][0]
+        tester = TestRegistry.get_test(cls, args.test_class)
         logger.info(f"Chosen tester name: {tester.__name__}")
 
-        obj = cls(**vars(args), tester=tester(**vars(args)))
+        # the tester is created when the runner uses it
+        obj = cls(**vars(args), tester_cls=tester, tester_args=vars(args))
         logger.add(f"output/logs/{repr(obj)}_{time.strftime('%Y%m%d-%H%M%S')}.log")
         return obj
 
     @classmethod
-    def parser(cls) -> argparse.ArgumentParser:
+    def parser(cls, argv: Optional[list[str]] = None) -> argparse.ArgumentParser:
         """
         Creates a parser for the test runner
+
+        Args:
+            argv: command line arguments, used to import only the selected test,
+                sys.argv if None
         """
 
         parser = argparse.ArgumentParser()
         cls.runner_args(parser)
-
-        if registry := TestRegistry.get_registry(cls):
-            subparsers = parser.add_subparsers(
-                required=True,
-                help="Select the test you want to run",
-                dest="test_class",
-            )
-
-            # Add the subparsers for each test
-            for test in registry:
-                subparser = subparsers.add_parser(test.__name__)
-                test.subparser(subparser)
-        else:
-            raise ValueError(f"Registry is empty, no test classes was found for {cls}")
+        TestRegistry.add_subparsers(cls, parser, argv)
 
         return parser
@@ -1,6 +1,13 @@
 import argparse
-from pathlib import Path
-from typing import Callable, Optional
+from contextlib import nullcontext
+from functools import wraps
+from os import PathLike
+from typing import Callable, ContextManager, Optional, Union
+
+from .audio import Audio
+from .comparator import Comparator
+from .device import compile_modules, configure_threads, inference_context
+from .differs import DIFFERS, get_differ
 
 
 class TranscriptTest:
@@ -8,7 +15,30 @@ class TranscriptTest:
     Base class for transcript tests, all transcript tests should inherit from this class
     """
 
-    def __init__(self, model_name: str, language: str, **kwargs):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # every model transcribes in the inference context, so the optimizations
+        # enabled by the common arguments apply to all of them
+        for name in ("transcribe", "transcribe_batch"):
+            if name in cls.__dict__:
+                setattr(cls, name, _in_inference_context(cls.__dict__[name]))
+
+    def __init__(
+        self,
+        model_name: str,
+        language: str,
+        batch_size: int = 1,
+        device: Optional[str] = None,
+        intra_op_threads: Optional[int] = None,
+        inter_op_threads: Optional[int] = None,
+        inference_mode: bool = False,
+        autocast: Optional[str] = None,
+        torch_compile: bool = False,
+        differ: Union[str, Callable] = "jiwer",
+        normalizer_cache: Optional[PathLike] = None,
+        **kwargs,
+    ):
         # transcriber is a function that takes a path to an audio file and returns a transcript
         # should be provided by the model
         self.transcriber: Optional[Callable] = None
@@ -16,9 +46,42 @@ class TranscriptTest:
         # normalizer is a function that takes a transcript and returns a normalized transcript
         # see libs/normalizers.py for examples
         self.normalizer: Optional[Callable] = None
+
+        # sqlite file where the models keep their normalized transcripts between the runs,
+        # see MemoizedNormalizer in src/normalizers.py
+        self.normalizer_cache: Optional[PathLike] = normalizer_cache
+
+        # differ is a function that takes the normalized model and target transcripts
+        # and returns the metrics, see src/differs.py
+        self.differ: Callable = get_differ(differ)
         self.language: str = language
         self.model_name: str = model_name
 
+        # set to True if transcribe accepts a decoded 16 kHz mono float32 waveform,
+        # the runner can then decode the audio once and share it between the models
+        self.accepts_pcm: bool = False
+
+        # number of audio files or chunks a model should process at once,
+        # used by the models which implement transcribe_batch natively
+        self.batch_size: int = batch_size
+
+        # device requested for the model e.g. cpu or cuda:0, the models
+        # resolve it with src/device.py, None picks cuda:0 if available
+        self.device: Optional[str] = device
+
+        # torch thread pools, limit them when several workers share the CPU cores
+        self.intra_op_threads: Optional[int] = intra_op_threads
+        self.inter_op_threads: Optional[int] = inter_op_threads
+        if intra_op_threads is not None or inter_op_threads is not None:
+            configure_threads(intra_op_threads, inter_op_threads)
+
+        # inference optimizations applied by inference_context, the modules
+        # returned by torch_modules are compiled on the first transcription
+        self.inference_mode: bool = inference_mode
+        self.autocast: Optional[str] = autocast
+        self.torch_compile: bool = torch_compile
+        self._compiled: bool = False
+
     def additional_info(self) -> dict:
         """
         Override this method, should return additional info about the test
@@ -31,6 +94,155 @@ class TranscriptTest:
             "language": self.language,
         }
 
+    def output_settings(self) -> dict:
+        """
+        Override this method, should return the model and the settings the transcripts
+        depend on, the model output cache is keyed by them. The settings which do not
+        change the transcripts e.g. the device, threads or batch size are left out
+
+        Returns:
+            dict with the settings
+        """
+        return {
+            "modelName": self.model_name,
+            "language": self.language,
+            # the reduced precision changes the transcripts
+            "autocast": self.autocast,
+        }
+
+    def runtime_settings(self) -> dict:
+        """
+        Device, threads and inference optimizations the model runs with,
+        add them to the model settings reported by additional_info
+
+        Returns:
+            dict with the runtime settings
+        """
+        return {
+            "device": self.device,
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+            "inference_mode": self.inference_mode,
+            "autocast": self.autocast,
+            "torch_compile": self.torch_compile,
+        }
+
+    def torch_modules(self) -> list:
+        """
+        Override this method, should return the torch modules whose forward
+        is compiled when torch_compile is enabled
+
+        Returns:
+            list of torch modules
+        """
+        return []
+
+    def inference_context(self) -> ContextManager:
+        """
+        Context the transcription should run in, applies the inference optimizations
+        enabled by the common arguments, does nothing if none of them is enabled
+
+        Returns:
+            context manager
+        """
+
+        if self.torch_compile and not self._compiled:
+            compile_modules(self.torch_modules())
+            self._compiled = True
+
+        if not self.inference_mode and self.autocast is None:
+            return nullcontext()
+
+        return inference_context(self.device, self.inference_mode, self.autocast)
+
+    @staticmethod
+    def common_args(subparser: argparse.ArgumentParser):
+        """
+        Add the arguments shared by all tests to the subparser
+
+        Args:
+            subparser: parser to add arguments to
+        """
+
+        subparser.add_argument(
+            "--device",
+            type=str,
+            dest="device",
+            default=None,
+            required=False,
+            help="Device to run the model on, e.g. cpu or cuda:1 "
+            "(default: cuda:0 if available, otherwise cpu)",
+        )
+
+        subparser.add_argument(
+            "--intra-op-threads",
+            type=int,
+            dest="intra_op_threads",
+            default=None,
+            required=False,
+            help="Threads used by torch inside a single operation (default: torch default)",
+        )
+
+        subparser.add_argument(
+            "--inter-op-threads",
+            type=int,
+            dest="inter_op_threads",
+            default=None,
+            required=False,
+            help="Threads used by torch to run independent operations "
+            "(default: torch default)",
+        )
+
+        subparser.add_argument(
+            "--inference-mode",
+            action="store_true",
+            dest="inference_mode",
+            default=False,
+            required=False,
+            help="Transcribe with torch.inference_mode, disabling autograd",
+        )
+
+        subparser.add_argument(
+            "--autocast",
+            type=str,
+            dest="autocast",
+            choices=["bf16"],
+            default=None,
+            required=False,
+            help="Transcribe with torch autocast to the reduced precision (default: None)",
+        )
+
+        subparser.add_argument(
+            "--compile",
+            action="store_true",
+            dest="torch_compile",
+            default=False,
+            required=False,
+            help="Compile the forward pass of the model with torch.compile",
+        )
+
+        subparser.add_argument(
+            "--differ",
+            type=str,
+            dest="differ",
+            choices=list(DIFFERS),
+            default="jiwer",
+            required=False,
+            help="Differ calculating the metrics, wer gives the same results "
+            "as jiwer but faster, alignment also saves the word operations "
+            "(default: jiwer)",
+        )
+
+        subparser.add_argument(
+            "--normalizer-cache",
+            type=str,
+            dest="normalizer_cache",
+            default=None,
+            required=False,
+            help="SQLite file keeping the normalized transcripts between the runs "
+            "and the models (default: None, only in memory)",
+        )
+
     @staticmethod
     def subparser(subparser: argparse.ArgumentParser):
         """
@@ -41,18 +253,43 @@ class TranscriptTest:
         """
         pass
 
-    def transcribe(self, audio_path: Path) -> str:
+    def transcribe(self, audio_path: Audio) -> str:
         """
         Override this method, should transcribe the audio file and return the transcript
 
         Args:
-            audio_path: path to audio file
+            audio_path: path to audio file, or a decoded waveform (see src/audio.py)
+                if accepts_pcm is True
 
         Returns:
             Transcript
         """
         raise NotImplementedError
 
+    def transcribe_batch(self, audio_paths: list[Audio]) -> list[str]:
+        """
+        Override this method if the model can transcribe several audio files at once,
+        by default the audio files are transcribed one by one
+
+        Args:
+            audio_paths: paths to audio files, or decoded waveforms (see src/audio.py)
+                if accepts_pcm is True
+
+        Returns:
+            Transcripts in the order of the audio files
+        """
+        return [self.transcribe(audio_path) for audio_path in audio_paths]
+
+    def comparator(self) -> Optional[Comparator]:
+        """
+        Override this method if compare only normalizes and diffs the transcripts,
+        the runner can then compare them in worker processes without the model
+
+        Returns:
+            comparator doing the same as compare, None if compare needs the tester
+        """
+        return None
+
     def compare(self, model_transcript, target_transcript):
         """
         Override this method, should compare the model transcript to the target transcript
@@ -65,3 +302,12 @@ class TranscriptTest:
             Results of the comparison
         """
         raise NotImplementedError
+
+
+def _in_inference_context(method: Callable) -> Callable:
+    @wraps(method)
+    def wrapper(self: TranscriptTest, *args, **kwargs):
+        with self.inference_context():
+            return method(self, *args, **kwargs)
+
+    return wrapper
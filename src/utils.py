@@ -1,3 +1,4 @@
+import re
 from typing import Any, Mapping
 
 from sqlalchemy.exc import IntegrityError
@@ -39,3 +40,25 @@ def insert_youtube_result(
 
     session.commit()
     return True
+
+
+def parse_size(size: str) -> int:
+    """
+    Parse a human readable size, e.g. 500M, 200G or 1.5T
+
+    Args:
+        size: size with an optional K, M, G or T suffix (powers of 1024)
+
+    Returns:
+        size in bytes
+    """
+
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", str(size), re.I)
+
+    if match is None:
+        raise ValueError(f"Invalid size: {size}")
+
+    value, unit = match.groups()
+    exponent = " KMGT".index(unit.upper() or " ")
+
+    return int(float(value) * 1024**exponent)
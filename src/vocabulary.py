@@ -0,0 +1,151 @@
+import re
+import sys
+import threading
+from array import array
+from typing import Iterable, Sequence
+
+_MULTIPLE_SPACES = re.compile(r"\s\s+")
+
+# typecode of the token arrays, 32-bit unsigned on all supported platforms
+TOKEN_TYPECODE = "I"
+
+
+def split_words(transcript: str) -> list[str]:
+    """
+    Split the transcript into words the same way as the default jiwer transform
+
+    Args:
+        transcript: transcript to split
+
+    Returns:
+        words of the transcript
+    """
+
+    words = _MULTIPLE_SPACES.sub(" ", transcript).strip().split(" ")
+    return [word for word in words if word]
+
+
+class Vocabulary:
+    """
+    Interned words of the transcripts, a transcript is represented by the array of
+    the ids of its words. Transcripts can be compared by their ids only if they were
+    encoded by the same vocabulary
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        """
+        Args:
+            words: initial words, they get the ids 0, 1, 2, ... in their order
+        """
+
+        self._ids: dict[str, int] = {}
+        self._words: list[str] = []
+        self._lock = threading.Lock()
+
+        self.add(words)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._ids
+
+    def add(self, words: Iterable[str]) -> array:
+        """
+        Intern the words, the words already in the vocabulary keep their ids
+
+        Args:
+            words: words to intern
+
+        Returns:
+            ids of the words
+        """
+
+        ids = self._ids
+        tokens = array(TOKEN_TYPECODE)
+
+        # the normalizer can be shared by the threads of the runner
+        with self._lock:
+            for word in words:
+                token = ids.get(word)
+                if token is None:
+                    token = ids[word] = len(self._words)
+                    self._words.append(word)
+                tokens.append(token)
+
+        return tokens
+
+    def encode(self, transcript: str) -> array:
+        """
+        Split the transcript into words and intern them
+
+        Args:
+            transcript: normalized transcript
+
+        Returns:
+            ids of the words of the transcript
+        """
+
+        return self.add(split_words(transcript))
+
+    def words(self, tokens: Iterable[int]) -> list[str]:
+        """
+        Look up the words of the ids
+
+        Args:
+            tokens: ids of the words
+
+        Returns:
+            words
+        """
+
+        words = self._words
+        return [words[token] for token in tokens]
+
+    def decode(self, tokens: Iterable[int]) -> str:
+        """
+        Join the words of the ids, the words are separated by single spaces
+
+        Args:
+            tokens: ids of the words
+
+        Returns:
+            transcript
+        """
+
+        return " ".join(self.words(tokens))
+
+
+def tokens_to_bytes(tokens: Sequence[int]) -> bytes:
+    """
+    Serialize the ids of the words, 4 bytes little-endian per word
+
+    Args:
+        tokens: ids of the words
+
+    Returns:
+        serialized ids
+    """
+
+    data = array(TOKEN_TYPECODE, tokens)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tobytes()
+
+
+def tokens_from_bytes(data: bytes) -> array:
+    """
+    Deserialize the ids of the words serialized by tokens_to_bytes
+
+    Args:
+        data: serialized ids
+
+    Returns:
+        ids of the words
+    """
+
+    tokens = array(TOKEN_TYPECODE)
+    tokens.frombytes(data)
+    if sys.byteorder == "big":
+        tokens.byteswap()
+    return tokens
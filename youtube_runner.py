@@ -1,11 +1,16 @@
 import argparse
 import json
+import multiprocessing
 import os
 import pprint
+import queue
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from os import PathLike
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator, Optional
 
 import sqlalchemy as db
 from loguru import logger
@@ -13,14 +18,33 @@ from sqlalchemy.orm import sessionmaker
 from youtube_transcript_api._errors import TranscriptsDisabled
 
 from generators.youtube_generator import generate
-from models import DummyTest
+from src.cache import (
+    AudioCache,
+    ModelOutputCache,
+    PcmCache,
+    TranscriptCache,
+    file_digest,
+)
+from src.comparator import ComparePool
 from src.database import YouTubeBase
 from src.dataclasses import YouTubeVideo
+from src.dataclasses.youtube_video import AUDIO_FORMATS
+from src.journal import ResultsJournal
+from src.normalizers import title_normalizer
+from src.pipeline import batched, prefetch
 from src.test_runner import TestRegistry, TestRunner
-from src.utils import insert_youtube_result
-
-
-@TestRegistry.register(DummyTest)
+from src.transcript_test import TranscriptTest
+from src.utils import insert_youtube_result, parse_size
+
+
+@TestRegistry.register(
+    "models.dummy_test:DummyTest",
+    "models.whisper_test:WhisperTest",
+    "models.huggingface_test:HuggingfaceTest",
+    "models.nemo_test:NemoTest",
+    "models.espnet2_test:Espnet2Test",
+    "src.server:RemoteTest",
+)
 class YouTubeTestRunner(TestRunner):
     """
     Test runner for youtube videos, uses a testplan generated by youtube_generator
@@ -35,10 +59,25 @@ class YouTubeTestRunner(TestRunner):
         save_transcripts: bool = False,
         save_to_database: bool = False,
         keep_audio: bool = False,
+        pipeline_depth: int = 0,
+        batch_size: int = 1,
+        workers: int = 1,
+        compare_workers: int = 0,
+        resume: bool = False,
+        audio_cache_size: Optional[int] = None,
+        transcript_cache: PathLike = "./cache/transcripts.sqlite",
+        transcript_cache_ttl: float = 30,
+        model_cache: Optional[PathLike] = None,
+        pcm_cache: Optional[PathLike] = None,
+        pcm_cache_size: Optional[int] = parse_size("20G"),
+        audio_format: str = "mp3",
         **kwargs,
     ):
         super().__init__(**kwargs)
 
+        if batch_size < 1:
+            raise ValueError(f"Batch size must be at least 1, got {batch_size}")
+
         self._audio_dir = Path(audio_dir)
         self._output_dir = Path(output_dir)
         self._testplan_path = Path(testplan_path)
@@ -46,19 +85,75 @@ class YouTubeTestRunner(TestRunner):
         self._save_transcripts = save_transcripts
         self._save_to_database = save_to_database
         self._keep_audio = keep_audio
+        self._audio_format = audio_format
+        self._pipeline_depth = pipeline_depth
+        self._batch_size = batch_size
+        self._workers = workers
+        self._compare_workers = compare_workers
+        self._compare_pool: Optional[ComparePool] = None
+        self._comparisons: dict[str, Future] = {}
+        self._resume = resume
+        self._audio_cache_size = audio_cache_size
+        self._audio_cache = None
+        self._transcript_cache_path = Path(transcript_cache)
+        self._transcript_cache_ttl = transcript_cache_ttl
+        self._transcript_cache = None
+        self._model_cache_dir = model_cache
+        self._model_cache = None
+        self._pcm_cache_dir = pcm_cache
+        self._pcm_cache_size = pcm_cache_size
+        self._pcm_cache = None
+
+        # sha256 of the audio of the videos being processed, keys of the caches
+        self._audio_digests: dict[Path, str] = {}
         self._session = None
 
+        if self._audio_cache_size is not None:
+            self._audio_cache = AudioCache(self._audio_dir, self._audio_cache_size)
+
+        if self._transcript_cache_ttl > 0:
+            self._transcript_cache = TranscriptCache(
+                self._transcript_cache_path, self._transcript_cache_ttl * 24 * 60 * 60
+            )
+
+        if self._model_cache_dir is not None:
+            self._model_cache = ModelOutputCache(self._model_cache_dir)
+
+        if self._pcm_cache_dir is not None:
+            self._pcm_cache = PcmCache(self._pcm_cache_dir, self._pcm_cache_size)
+
+        # the tester is not created by the runner whose workers create their own
+        if self._tester is not None:
+            model_name = self._tester.model_name
+        else:
+            model_name = self.tester_args.get("model_name", self.tester_cls.__name__)
+
+        journal_name = (
+            f"{self._testplan_path.stem}_{self.tester_cls.__name__}"
+            f"_{title_normalizer(model_name)}.jsonl"
+        )
+        self._journal = ResultsJournal(
+            Path(__file__).parent.joinpath(self._output_dir, "journals", journal_name)
+        )
+
         if self._save_to_database:
             engine = db.create_engine(f"sqlite:///youtube.sqlite")
             YouTubeBase.metadata.create_all(engine)
             self._session = sessionmaker(bind=engine)()
 
     def run(self) -> None:
-        if self.tester.transcriber is None:
-            raise ValueError("Transcriber is None")
-
-        if self.tester.normalizer is None:
-            logger.warning("Normalizer is None, running without normalizer")
+        # the workers load their own models, the runner does not create the tester
+        if self._workers <= 1:
+            if self.tester.transcriber is None:
+                raise ValueError("Transcriber is None")
+
+            if self.tester.normalizer is None:
+                logger.warning("Normalizer is None, running without normalizer")
+        elif self._pipeline_depth > 0:
+            logger.warning(
+                "Pipeline depth is not used with several workers, "
+                "every worker processes its batches one after another"
+            )
 
         # check if we can generate more testplans if we need to
         if self._iterations > 1 and "GoogleAPI" not in os.environ:
@@ -70,92 +165,607 @@ class YouTubeTestRunner(TestRunner):
         with open(self._testplan_path, encoding="utf8") as f:
             testplan = json.load(f)
 
+        # load the outcomes of the interrupted run or start a new journal
+        if self._resume:
+            outcomes, saved = self._journal.load()
+        else:
+            self._journal.clear()
+            outcomes, saved = {}, {}
+
         # run the testplan
-        for i in range(self._iterations):
-            logger.info(f"Starting {i + 1}/{self._iterations} testplan")
-            logger.info(f"Testplan args:\n{pprint.pformat(testplan['args'])}")
-
-            # iterate over the videos in the testplan
-            for idx, video_details in enumerate(testplan["items"]):
-                logger.info(
-                    f"Testplan status: {idx + 1}/{len(testplan['items'])} video, {i + 1}/{self._iterations} testplan"
+        with self._compare_stage():
+            for i in range(self._iterations):
+                logger.info(f"Starting {i + 1}/{self._iterations} testplan")
+
+                if i in saved and saved[i].exists():
+                    logger.info(
+                        f"Testplan already finished, loading results - {saved[i]}"
+                    )
+                    with open(saved[i], encoding="utf-8") as f:
+                        testplan = json.load(f)
+                else:
+                    logger.info(f"Testplan args:\n{pprint.pformat(testplan['args'])}")
+                    items = self._journal.restore(i, testplan["items"], outcomes)
+
+                    if self._workers > 1:
+                        self._run_workers(items, i)
+                    elif self._pipeline_depth > 0:
+                        self._run_pipelined(items, i)
+                    else:
+                        self._run_serial(items, i)
+
+                    # results have to be attached to the items before they are saved
+                    self._join_comparisons()
+
+                    path = self.save_results(testplan)
+                    self._journal.append_saved(i, path)
+
+                # generate a new testplan if we need to
+                if i + 1 < self._iterations:
+                    args = testplan["args"]
+                    args["pageToken"] = testplan["nextPageToken"]
+                    testplan = generate(args)
+
+        self._journal.clear()
+        logger.info("Testplan finished")
+
+    def _run_serial(self, items: list[dict], iteration: int) -> None:
+        """
+        Run every stage of every batch of videos one after another on the current thread
+
+        Args:
+            items: testplan items
+            iteration: index of the current testplan iteration
+        """
+
+        for start in range(0, len(items), self._batch_size):
+            batch = items[start : start + self._batch_size]
+            self._log_status(start + len(batch) - 1, len(items), iteration)
+            self.process_batch(batch)
+
+            for video_details in batch:
+                self._journal_item(iteration, video_details)
+
+    def _run_pipelined(self, items: list[dict], iteration: int) -> None:
+        """
+        Run the testplan as a pipeline, target transcripts and audio of the upcoming videos
+        are fetched in background threads and the transcripts are compared on a separate
+        thread, so only the transcription of the batches runs on the current thread
+
+        Args:
+            items: testplan items
+            iteration: index of the current testplan iteration
+        """
+
+        comparisons = []
+        done = 0
+
+        def compare_and_record(video_details, model_transcript, target_transcript):
+            self.compare(video_details, model_transcript, target_transcript)
+            self._journal_item(iteration, video_details)
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="compare") as pool:
+            stream = prefetch(self.prepare, items, self._pipeline_depth)
+
+            for batch in batched(stream, self._batch_size):
+                ready = []
+                for video_details, future in batch:
+                    prepared = future.result()
+                    if prepared is None:
+                        self._journal.append(iteration, video_details)
+                    else:
+                        ready.append((video_details, *prepared))
+
+                done += len(batch)
+                self._log_status(done - 1, len(items), iteration)
+
+                model_transcripts = self.transcribe_batch(
+                    [(video_details, audio) for video_details, audio, _ in ready]
                 )
-                video = YouTubeVideo.from_dict(video_details)
-
-                # download the target transcript
-                try:
-                    target_transcript = video.youtube_transcript(self.tester.language)
-                except ValueError as e:
-                    logger.warning(
-                        f"Skipping the video {video.videoId}, ValueError (youtube transcript): {e}"
+
+                for (video_details, _, target_transcript), model_transcript in zip(
+                    ready, model_transcripts
+                ):
+                    if model_transcript is None:
+                        self._journal.append(iteration, video_details)
+                        continue
+
+                    comparisons.append(
+                        pool.submit(
+                            compare_and_record,
+                            video_details,
+                            model_transcript,
+                            target_transcript,
+                        )
                     )
-                    video_details["error"] = f"ValueError (youtube transcript): {e}"
-                    continue
-                except TranscriptsDisabled as e:
-                    logger.warning(
-                        f"Skipping the video {video.videoId}, TranscriptsDisabled (youtube transcript): {e}"
+
+            # results have to be attached to the items before they are saved
+            for comparison in comparisons:
+                comparison.result()
+
+    def _run_workers(self, items: list[dict], iteration: int) -> None:
+        """
+        Shard the testplan across worker processes, every worker creates its own tester,
+        gets the next batch of items once it sends the processed items back. The items
+        of a worker which exits during the batch are recorded with an error, every item
+        is recorded once even if its results arrive after the worker exited
+
+        Args:
+            items: testplan items
+            iteration: index of the current testplan iteration
+        """
+
+        if self.tester_args is None:
+            raise ValueError(
+                "Tester arguments are unknown, can not create testers for the workers. "
+                "Create the runner with from_command_line or set workers to 1."
+            )
+
+        runner_args = {
+            "testplan_path": self._testplan_path,
+            "audio_dir": self._audio_dir,
+            "output_dir": self._output_dir,
+            "save_transcripts": self._save_transcripts,
+            "keep_audio": self._keep_audio,
+            "batch_size": self._batch_size,
+            "audio_format": self._audio_format,
+            "audio_cache_size": self._audio_cache_size,
+            "transcript_cache": self._transcript_cache_path,
+            "transcript_cache_ttl": self._transcript_cache_ttl,
+            "model_cache": self._model_cache_dir,
+            "pcm_cache": self._pcm_cache_dir,
+            "pcm_cache_size": self._pcm_cache_size,
+        }
+
+        # spawn, so every worker initializes its own model and device context
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        tasks = [context.Queue() for _ in range(self._workers)]
+        pending = list(batched(enumerate(items), self._batch_size))
+
+        processes = [
+            context.Process(
+                target=_worker,
+                args=(
+                    n,
+                    self.tester_cls,
+                    self.tester_args,
+                    runner_args,
+                    tasks[n],
+                    results,
+                ),
+                name=f"worker-{n}",
+                daemon=True,
+            )
+            for n in range(self._workers)
+        ]
+
+        # batch processed by every worker, a worker gets one batch at a time
+        assigned: dict[int, Optional[list[tuple[int, dict]]]] = {}
+
+        def assign(n: int) -> None:
+            # a batch given to an exited worker would never be processed
+            if not processes[n].is_alive():
+                assigned.pop(n, None)
+                return
+
+            assigned[n] = pending.pop(0) if pending else None
+            tasks[n].put(assigned[n])
+
+        logger.info(f"Starting {self._workers} workers")
+        for n, process in enumerate(processes):
+            process.start()
+            assign(n)
+
+        done = 0
+        recorded: set[int] = set()
+
+        def record(idx: int, video_details: dict) -> None:
+            nonlocal done
+
+            # the results sent by a worker just before it exited can arrive
+            # after its batch was recorded with the error
+            if idx in recorded:
+                return
+            recorded.add(idx)
+
+            # merge the results into the item of the testplan
+            items[idx].update(video_details)
+            self._journal.append(iteration, items[idx])
+            self._log_status(done, len(items), iteration)
+            done += 1
+
+        while done < len(items):
+            try:
+                n, task = results.get(timeout=5)
+            except queue.Empty:
+                for n, process in enumerate(processes):
+                    if process.is_alive() or assigned.get(n) is None:
+                        continue
+
+                    error = f"{process.name} exited with code {process.exitcode}"
+                    for idx, video_details in assigned.pop(n):
+                        logger.warning(
+                            f"Skipping the video {video_details['videoId']}, "
+                            f"RuntimeError (worker): {error}"
+                        )
+                        record(idx, {"error": f"RuntimeError (worker): {error}"})
+
+                # the remaining batches are given to the workers which are still running
+                if pending and not any(process.is_alive() for process in processes):
+                    codes = [process.exitcode for process in processes]
+                    raise RuntimeError(
+                        f"All workers exited before finishing the testplan, exit codes: {codes}"
                     )
-                    video_details[
-                        "error"
-                    ] = f"TranscriptsDisabled (youtube transcript): {e}"
-                    continue
+                continue
+
+            assign(n)
+            for idx, video_details in task:
+                record(idx, video_details)
+
+        # every worker got None once there were no more batches
+        for process in processes:
+            process.join()
+
+    @contextmanager
+    def _compare_stage(self) -> Iterator[None]:
+        """
+        Start the compare workers for the duration of the run if they are enabled,
+        the comparisons then run in a process pool next to the inference
+        """
+
+        if self._compare_workers < 1:
+            yield
+            return
+
+        if self._workers > 1:
+            logger.info(
+                "Compare workers are not used, the workers compare on their own"
+            )
+            yield
+            return
+
+        comparator = self.tester.comparator()
+        if comparator is None or not comparator.picklable():
+            logger.warning(
+                f"{type(self.tester).__name__} can not compare in worker processes, "
+                f"comparing in the runner process"
+            )
+            yield
+            return
+
+        logger.info(f"Starting {self._compare_workers} compare workers")
+        with ComparePool(comparator, self._compare_workers) as pool:
+            self._compare_pool = pool
+            try:
+                yield
+            finally:
+                self._compare_pool = None
+
+    def _join_comparisons(self) -> None:
+        """
+        Wait until the results of all submitted comparisons are stored in the items
+        """
+
+        comparisons, self._comparisons = self._comparisons, {}
+        for comparison in comparisons.values():
+            comparison.result()
+
+    def _journal_item(self, iteration: int, video_details: dict) -> None:
+        """
+        Journal the processed item, after its results if it is still being compared
+
+        Args:
+            iteration: index of the current testplan iteration
+            video_details: processed testplan item
+        """
+
+        comparison = self._comparisons.get(video_details["videoId"])
+        if comparison is None:
+            self._journal.append(iteration, video_details)
+            return
+
+        # joining the comparisons waits for the journal too
+        journaled = Future()
+        self._comparisons[video_details["videoId"]] = journaled
+
+        def journal(stored: Future) -> None:
+            if error := stored.exception():
+                journaled.set_exception(error)
+                return
+
+            self._journal.append(iteration, video_details)
+            journaled.set_result(None)
+
+        comparison.add_done_callback(journal)
+
+    def _log_status(self, idx: int, total: int, iteration: int) -> None:
+        logger.info(
+            f"Testplan status: {idx + 1}/{total} video, {iteration + 1}/{self._iterations} testplan"
+        )
+
+    def process(self, video_details: dict) -> None:
+        """
+        Run every stage for a single video, the results or the error are stored
+        in the video details
+
+        Args:
+            video_details: testplan item of the video
+        """
+
+        self.process_batch([video_details])
+
+    def process_batch(self, batch: list[dict]) -> None:
+        """
+        Run every stage for a batch of videos, the audio of the whole batch is transcribed
+        at once, the results or the errors are stored in the video details
+
+        Args:
+            batch: testplan items of the videos
+        """
+
+        ready = []
+        for video_details in batch:
+            prepared = self.prepare(video_details)
+            if prepared is not None:
+                ready.append((video_details, *prepared))
+
+        model_transcripts = self.transcribe_batch(
+            [(video_details, audio) for video_details, audio, _ in ready]
+        )
+
+        for (video_details, _, target_transcript), model_transcript in zip(
+            ready, model_transcripts
+        ):
+            if model_transcript is not None:
+                self.compare(video_details, model_transcript, target_transcript)
+
+    def prepare(self, video_details: dict) -> Optional[tuple[Path, str]]:
+        """
+        Download the target transcript and the audio of the video,
+        on failure the error is stored in the video details
+
+        Args:
+            video_details: testplan item of the video
+
+        Returns:
+            path to the audio and the target transcript or None if the video should be skipped
+        """
+
+        video = YouTubeVideo.from_dict(video_details)
+
+        # download the target transcript
+        try:
+            target_transcript = video.youtube_transcript(
+                self.tester.language, cache=self._transcript_cache
+            )
+        except ValueError as e:
+            logger.warning(
+                f"Skipping the video {video.videoId}, ValueError (youtube transcript): {e}"
+            )
+            video_details["error"] = f"ValueError (youtube transcript): {e}"
+            return None
+        except TranscriptsDisabled as e:
+            logger.warning(
+                f"Skipping the video {video.videoId}, TranscriptsDisabled (youtube transcript): {e}"
+            )
+            video_details["error"] = f"TranscriptsDisabled (youtube transcript): {e}"
+            return None
+
+        # download the audio
+        download = partial(video.download_audio, audio_format=self._audio_format)
+        try:
+            if self._audio_cache is not None:
+                audio = self._audio_cache.fetch(
+                    video.videoId, self._audio_format, download
+                )
+            else:
+                audio = download(self._audio_dir)
+        except ValueError as e:
+            logger.warning(
+                f"Skipping the video {video.videoId}, ValueError (download): {e}"
+            )
+            video_details["error"] = f"ValueError (download): {e}"
+            return None
+
+        # decode the audio ahead of the transcription
+        if self._decodes_audio():
+            try:
+                self._pcm_cache.load(audio, self._audio_digest(audio))
+            except ValueError as e:
+                self._audio_digests.pop(audio, None)
+                self._discard_audio(video.videoId, audio)
+                logger.warning(
+                    f"Skipping the video {video.videoId}, ValueError (decode): {e}"
+                )
+                video_details["error"] = f"ValueError (decode): {e}"
+                return None
+
+        return audio, target_transcript
+
+    def transcribe(self, video_details: dict, audio: Path) -> Optional[str]:
+        """
+        Transcribe the audio by the tester, on failure the error is stored in the video details
+
+        Args:
+            video_details: testplan item of the video
+            audio: path to the audio
+
+        Returns:
+            model transcript or None if the video should be skipped
+        """
+
+        return self.transcribe_batch([(video_details, audio)])[0]
+
+    def transcribe_batch(self, batch: list[tuple[dict, Path]]) -> list[Optional[str]]:
+        """
+        Transcribe the audio of a batch of videos by the tester at once, audio found in
+        the model output cache is skipped, on failure the error is stored in the video
+        details of every video transcribed in the batch
 
-                # download the audio
-                try:
-                    audio = video.download_mp3(self._audio_dir)
-                except ValueError as e:
-                    logger.warning(
-                        f"Skipping the video {video.videoId}, ValueError (download): {e}"
+        Args:
+            batch: testplan items of the videos and paths to their audio
+
+        Returns:
+            model transcripts, None for the videos which should be skipped
+        """
+
+        model_transcripts: list[Optional[str]] = [None] * len(batch)
+        pending = []
+        keys = {}
+
+        for n, (video_details, audio) in enumerate(batch):
+            if self._model_cache is not None:
+                key = self._model_cache.key(
+                    audio, self.tester, self._audio_digest(audio)
+                )
+                if (output := self._model_cache.get(key)) is not None:
+                    logger.info(
+                        f"Model output of the video {video_details['videoId']} found in the cache"
                     )
-                    video_details["error"] = f"ValueError (download): {e}"
+                    model_transcripts[n] = output["text"]
                     continue
+                keys[n] = key
+
+            pending.append(n)
 
-                # transcribe the audio
-                try:
-                    model_transcript = self.tester.transcribe(audio)
-                except TimeoutError as e:
-                    logger.warning(
-                        f"Skipping the video {video.videoId}, TimeoutError (model transcript): {e}"
+        try:
+            if pending:
+                outputs = self._transcribe_audio([batch[n][1] for n in pending])
+                if len(outputs) != len(pending):
+                    raise ValueError(
+                        f"Model returned {len(outputs)} transcripts "
+                        f"for {len(pending)} audio files"
                     )
-                    video_details["error"] = f"TimeoutError (model transcript): {e}"
-                    continue
 
-                if not self._keep_audio:
+                for n, model_transcript in zip(pending, outputs):
+                    model_transcripts[n] = model_transcript
+                    if n in keys:
+                        self._model_cache.put(keys[n], model_transcript)
+        except (TimeoutError, ValueError) as e:
+            error = f"{type(e).__name__} (model transcript): {e}"
+            for n in pending:
+                # the transcripts of a failed batch can not be matched to the videos
+                model_transcripts[n] = None
+                video_details = batch[n][0]
+                logger.warning(
+                    f"Skipping the video {video_details['videoId']}, {error}"
+                )
+                video_details["error"] = error
+        finally:
+            for _, audio in batch:
+                self._audio_digests.pop(audio, None)
+
+            if self._audio_cache is not None:
+                for video_details, _ in batch:
+                    self._audio_cache.release(
+                        video_details["videoId"], self._audio_format
+                    )
+
+        # cached audio is removed by the cache once it runs out of space
+        if self._audio_cache is None and not self._keep_audio:
+            for (_, audio), model_transcript in zip(batch, model_transcripts):
+                if model_transcript is not None:
                     audio.unlink()
 
-                # compare the transcripts
-                try:
-                    results = self.tester.compare(model_transcript, target_transcript)
-                    results.update(self.tester.additional_info())
-                    video_details["results"] = results
-                except ValueError as e:
-                    logger.warning(
-                        f"Skipping the video {video.videoId}, ValueError (compare): {e}"
-                    )
-                    video_details["error"] = f"ValueError (compare): {e}"
-                    continue
+        return model_transcripts
 
-                # add the transcripts to the video details if we want to save them
-                if self._save_transcripts:
-                    video_details["modelTranscript"] = model_transcript
-                    video_details["targetTranscript"] = target_transcript
+    def _discard_audio(self, video_id: str, audio: Path) -> None:
+        # the audio of a skipped video is released like the transcribed one
+        if self._audio_cache is not None:
+            self._audio_cache.release(video_id, self._audio_format)
+        elif not self._keep_audio:
+            audio.unlink(missing_ok=True)
 
-            self.save_results(testplan)
+    def _decodes_audio(self) -> bool:
+        return self._pcm_cache is not None and self.tester.accepts_pcm
 
-            # generate a new testplan if we need to
-            if i + 1 < self._iterations:
-                args = testplan["args"]
-                args["pageToken"] = testplan["nextPageToken"]
-                testplan = generate(args)
+    def _audio_digest(self, audio: Path) -> str:
+        # the audio file is read once per video, the caches share its digest
+        if audio not in self._audio_digests:
+            self._audio_digests[audio] = file_digest(audio)
+        return self._audio_digests[audio]
 
-        logger.info("Testplan finished")
+    def _transcribe_audio(self, audio: list[Path]) -> list[str]:
+        # pass the shared decoded waveform to the testers which can use it
+        if self._decodes_audio():
+            audio = [
+                self._pcm_cache.load(path, self._audio_digest(path)) for path in audio
+            ]
+
+        # a single video is transcribed as before, so testers without batching are unaffected
+        if len(audio) == 1:
+            return [self.tester.transcribe(audio[0])]
 
-    def save_results(self, results: dict[str, Any]) -> None:
+        return self.tester.transcribe_batch(audio)
+
+    def compare(
+        self, video_details: dict, model_transcript: str, target_transcript: str
+    ) -> None:
+        """
+        Compare the transcripts and store the results in the video details,
+        with the compare workers the results are stored once the workers finish
+
+        Args:
+            video_details: testplan item of the video
+            model_transcript: transcript from the model
+            target_transcript: transcript from the target
+        """
+
+        store = partial(
+            self._store_results, video_details, model_transcript, target_transcript
+        )
+
+        if self._compare_pool is None:
+            store(partial(self.tester.compare, model_transcript, target_transcript))
+            return
+
+        stored = Future()
+
+        def store_comparison(comparison: Future) -> None:
+            try:
+                store(comparison.result)
+            except BaseException as e:
+                stored.set_exception(e)
+            else:
+                stored.set_result(None)
+
+        self._comparisons[video_details["videoId"]] = stored
+        comparison = self._compare_pool.submit(model_transcript, target_transcript)
+        comparison.add_done_callback(store_comparison)
+
+    def _store_results(
+        self,
+        video_details: dict,
+        model_transcript: str,
+        target_transcript: str,
+        get_results: Callable[[], dict],
+    ) -> None:
+        try:
+            results = get_results()
+            results.update(self.tester.additional_info())
+            video_details["results"] = results
+        except ValueError as e:
+            logger.warning(
+                f"Skipping the video {video_details['videoId']}, ValueError (compare): {e}"
+            )
+            video_details["error"] = f"ValueError (compare): {e}"
+            return
+
+        # add the transcripts to the video details if we want to save them
+        if self._save_transcripts:
+            video_details["modelTranscript"] = model_transcript
+            video_details["targetTranscript"] = target_transcript
+
+    def save_results(self, results: dict[str, Any]) -> Path:
         """
         Save the results to a json file
 
         Args:
             results: results to save
+
+        Returns:
+            path to the saved results
         """
 
         time_str = time.strftime("%Y%m%d-%H%M%S")
@@ -174,6 +784,8 @@ class YouTubeTestRunner(TestRunner):
         ):
             logger.warning(f"Failed to save results to database")
 
+        return path
+
     def __repr__(self):
         try:
             category = f'_{self._testplan_path.name.split("_")[0]}'
@@ -227,8 +839,128 @@ class YouTubeTestRunner(TestRunner):
             default=False,
         )
 
+        parser.add_argument(
+            "--audio-format",
+            required=False,
+            type=str,
+            choices=AUDIO_FORMATS,
+            default="mp3",
+            dest="audio_format",
+            help="Format of the downloaded audio, native keeps the YouTube stream and "
+            "flac stores 16 kHz mono audio, both skip the lossy mp3 encode (default: mp3)",
+        )
+
+        parser.add_argument(
+            "--audio-cache-size",
+            required=False,
+            type=parse_size,
+            default=None,
+            dest="audio_cache_size",
+            help="Keep the downloaded audio in an LRU cache in the audio path limited "
+            "to the given size, e.g. 200G (default: None, no cache)",
+        )
+
+        parser.add_argument(
+            "--transcript-cache",
+            required=False,
+            type=str,
+            default="./cache/transcripts.sqlite",
+            dest="transcript_cache",
+            help="Path to the cache of the target transcripts",
+        )
+
+        parser.add_argument(
+            "--transcript-cache-ttl",
+            required=False,
+            type=float,
+            default=30,
+            dest="transcript_cache_ttl",
+            help="Days after which a cached target transcript is downloaded again, "
+            "0 disables the cache (default: 30)",
+        )
+
+        parser.add_argument(
+            "--model-cache",
+            required=False,
+            type=str,
+            default=None,
+            dest="model_cache",
+            help="Directory of the model output cache, the inference is skipped for audio "
+            "already transcribed with the same model settings (default: None, no cache)",
+        )
+
+        parser.add_argument(
+            "--pcm-cache",
+            required=False,
+            type=str,
+            default=None,
+            dest="pcm_cache",
+            help="Directory where the audio decoded to 16 kHz mono float32 is kept and "
+            "shared between the models (default: None, every model decodes the audio)",
+        )
+
+        parser.add_argument(
+            "--pcm-cache-size",
+            required=False,
+            type=parse_size,
+            default=parse_size("20G"),
+            dest="pcm_cache_size",
+            help="Size limit of the PCM cache, the least recently used files are "
+            "removed when it is exceeded, e.g. 50G (default: 20G)",
+        )
+
         parser.add_argument("-it", "--iterations", required=False, type=int, default=1)
 
+        parser.add_argument(
+            "--pipeline-depth",
+            required=False,
+            type=int,
+            default=0,
+            dest="pipeline_depth",
+            help="Number of videos prepared in background threads ahead of the "
+            "transcription, compare runs off the inference thread (default: 0, serial)",
+        )
+
+        parser.add_argument(
+            "-bs",
+            "--batch-size",
+            required=False,
+            type=int,
+            default=1,
+            dest="batch_size",
+            help="Number of videos transcribed at once, the models which support batching "
+            "also infer their audio chunks in batches of this size (default: 1)",
+        )
+
+        parser.add_argument(
+            "-w",
+            "--workers",
+            required=False,
+            type=int,
+            default=1,
+            dest="workers",
+            help="Number of worker processes, each with its own model instance (default: 1)",
+        )
+
+        parser.add_argument(
+            "--compare-workers",
+            required=False,
+            type=int,
+            default=0,
+            dest="compare_workers",
+            help="Number of processes normalizing and comparing the transcripts while "
+            "the model transcribes the next videos (default: 0, compare in the runner)",
+        )
+
+        parser.add_argument(
+            "--resume",
+            required=False,
+            action="store_true",
+            dest="resume",
+            default=False,
+            help="Resume the interrupted run, videos found in its journal are skipped",
+        )
+
         parser.add_argument(
             "-o",
             "--output",
@@ -239,5 +971,33 @@ class YouTubeTestRunner(TestRunner):
         )
 
 
+def _worker(
+    n: int,
+    tester_cls: type[TranscriptTest],
+    tester_args: dict[str, Any],
+    runner_args: dict[str, Any],
+    tasks: multiprocessing.Queue,
+    results: multiprocessing.Queue,
+) -> None:
+    """
+    Worker process of YouTubeTestRunner, processes batches of testplan items until
+    it gets None
+
+    Args:
+        n: index of the worker
+        tester_cls: class of the tester
+        tester_args: arguments used to create the tester
+        runner_args: arguments used to create the runner
+        tasks: queue with the batches of (index, testplan item) pairs for the worker
+        results: queue for the index of the worker and the processed batch
+    """
+
+    runner = YouTubeTestRunner(tester=tester_cls(**tester_args), **runner_args)
+
+    while (task := tasks.get()) is not None:
+        runner.process_batch([video_details for _, video_details in task])
+        results.put((n, task))
+
+
 if __name__ == "__main__":
     YouTubeTestRunner.from_command_line().run()